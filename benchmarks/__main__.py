@@ -0,0 +1,124 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import argparse
+import contextlib
+import io
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.test.fake_github import FakeGitHub, synthetic_org
+
+
+@dataclass
+class BenchmarkResult:
+    repos: int
+    seconds: float
+    requests: int
+    writes: int
+    requests_by_route: Counter
+    exit_code: int
+
+    @property
+    def requests_per_repo(self) -> float:
+        return self.requests / self.repos if self.repos else 0.0
+
+
+def run_benchmark(size: int, main_args: List[str], drifted: float = 0.1, unprotected: float = 0.05,
+                  out_of_scope: float = 0.1, latency: float = 0.0, seed: int = 0) -> BenchmarkResult:
+    """
+    Runs `python -m github_standards <main_args>` against a local fake of GitHub holding a synthetic org of `size`
+    repos, and measures the wall time and the requests it made.
+    """
+    repos = synthetic_org(size, drifted=drifted, unprotected=unprotected, out_of_scope=out_of_scope, seed=seed)
+    with FakeGitHub(GH_ORG_NAME, repos, latency=latency) as fake, \
+            mock.patch.dict(os.environ, {'GH_TOKEN': 'benchmark'}), \
+            contextlib.redirect_stdout(io.StringIO()):
+        exit_code = 0
+        start = time.perf_counter()
+        try:
+            main(['--api-url', fake.url] + main_args)
+        except SystemExit as e:
+            exit_code = e.code or 0
+        seconds = time.perf_counter() - start
+    return BenchmarkResult(size, seconds, fake.total_requests, fake.total_writes, fake.requests, exit_code)
+
+
+def _fraction(value: str) -> float:
+    number = float(value)
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError(f'{value} is not between 0 and 1')
+    return number
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='benchmarks',
+                                     description='Time github_standards against a local fake of GitHub and count the '
+                                                 'requests it makes. Arguments after -- are passed to '
+                                                 'github_standards, e.g. -- --workers 8 --dry-run')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Number of repos in each synthetic org (default: %(default)s)')
+    parser.add_argument('--drifted', type=_fraction, default=0.1,
+                        help='Fraction of repos with settings and branch protection out of standards '
+                             '(default: %(default)s)')
+    parser.add_argument('--unprotected', type=_fraction, default=0.05,
+                        help='Fraction of repos with an unprotected default branch (default: %(default)s)')
+    parser.add_argument('--out-of-scope', type=_fraction, default=0.1,
+                        help='Fraction of repos without Auto-Apply-Standards (default: %(default)s)')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Delay added to every response, to stand in for the network (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic orgs (default: %(default)s)')
+    parser.add_argument('--routes', action='store_true', help='Also break the requests down by API route')
+    parser.add_argument('--max-requests-per-repo', type=float,
+                        help='Exit non-zero if any run makes more requests per repo than this')
+    parser.add_argument('main_args', nargs=argparse.REMAINDER,
+                        help='Arguments for github_standards, after --')
+    args = parser.parse_args(argv)
+    if args.main_args[:1] == ['--']:
+        args.main_args = args.main_args[1:]
+    return args
+
+
+def main_benchmarks(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    print(f'github_standards {" ".join(args.main_args) or "(no arguments)"}')
+    print(f'{"repos":>8} {"seconds":>9} {"requests":>9} {"requests/repo":>14} {"writes":>7} {"exit":>5}')
+
+    too_many_requests = False
+    for size in args.sizes:
+        result = run_benchmark(size, args.main_args, drifted=args.drifted, unprotected=args.unprotected,
+                               out_of_scope=args.out_of_scope, latency=args.latency_ms / 1000, seed=args.seed)
+        print(f'{result.repos:>8} {result.seconds:>9.2f} {result.requests:>9} {result.requests_per_repo:>14.2f} '
+              f'{result.writes:>7} {result.exit_code:>5}')
+        if args.routes:
+            for route, count in sorted(result.requests_by_route.items()):
+                print(f'{"":>8} {count:>9} {route}')
+        if args.max_requests_per_repo is not None and result.requests_per_repo > args.max_requests_per_repo:
+            too_many_requests = True
+
+    if too_many_requests:
+        print(f'More than {args.max_requests_per_repo} requests per repo')
+        exit(1)
+
+
+if __name__ == '__main__':
+    main_benchmarks()
@@ -15,65 +15,653 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import argparse
 import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
 
-from github import Auth, Github
+from github import Consts, Github
+from github.Organization import Organization
 from github.Repository import Repository
 
-from github_standards.standards import check_and_apply_standard_properties_to_repo, check_and_apply_standard_properties_to_branch
+from github_standards.asyncio_engine import RequestLimiter, apply_standards_to_repo_async, run_for_each_repo_async
+from github_standards.checkpoint import Checkpoint
+from github_standards.cache import ConditionalRequestCache, DEFAULT_MAX_CACHE_BYTES
+from github_standards.config import CredentialConfig, OrgConfig, load_config
+from github_standards.credentials import credential_pool
+from github_standards.events import EventLog, note, read_events, render
+from github_standards.graphql import get_org_repositories
+from github_standards.history import History
+from github_standards.listing import PAGE_SIZE, RepoFilter, list_org_repositories, prefetch
+from github_standards.metrics import RequestMetrics
+from github_standards.plan import Plan, RepoPlan, apply_repo_plan
+from github_standards.policy import DEFAULT_STANDARDS_POLICY, CompiledPolicy, load_policy
+from github_standards.properties import CustomPropertyIndex
+from github_standards.ratelimit import DEFAULT_RESERVE, RateLimitScheduler
+from github_standards.report import Report, merge_reports
+from github_standards.retry import DEFAULT_MAX_RETRIES, TransientRetry
+from github_standards.review import apply_standards_to_repo, apply_standards_to_repo_with_ruleset
+from github_standards.rulesets import check_and_apply_standards_ruleset
+from github_standards.runner import ContextLocalStdout, RunSummary, Tracker, run_for_each_repo, track, track_async
+from github_standards.shard import Shard
+from github_standards.state import DEFAULT_FULL_SWEEP_DAYS, RunState, StateRecorder
+from github_standards.transport import install_middleware
+from github_standards.webhook import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_MAX_PENDING, DebouncedQueue, WebhookServer
 
 GH_ORG_NAME = 'sonatype-nexus-community'
-EXCLUDED_REPO_NAMES = ['.github']
 
+# Without a --config, the one org managed by default, with a token from the GH_TOKEN environment variable
+DEFAULT_ORGS = [OrgConfig(GH_ORG_NAME, (CredentialConfig(token_env='GH_TOKEN'),))]
 
-def apply_standards_to_repo(repo: Repository, do_actual_work: bool = False) -> None:
-    if repo.name not in EXCLUDED_REPO_NAMES:
-        print(f'Reviewing Repo: {repo.name}...')
+# Options naming files that each org of a multi-org run needs its own copy of
+ORG_PATH_OPTIONS = ['cache_dir', 'state_file', 'report_file', 'metrics_prom', 'metrics_json', 'plan_file',
+                    'checkpoint_file', 'event_log']
 
-        if repo.custom_properties.get('Auto-Apply-Standards', 'false') == 'false':
-            print(f'    Skipping {repo.name} as not part of standards management (yet!)')
 
-        print(f'    Assessing Standards for {repo.name}')
-        check_and_apply_standard_properties_to_repo(repo, do_actual_work)
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive number')
+    return number
 
-        main_branch = repo.default_branch
-        if main_branch != 'main':
-            print(f'    WARNING: {repo.name}\'s default branch is not called main it is: {main_branch}')
 
-        if do_actual_work:
-            main_b = repo.get_branch(main_branch)
-            if main_b:
-                check_and_apply_standard_properties_to_branch(repo, main_b, do_actual_work)
+def _shard(value: str) -> Shard:
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-                # @todo: Status Checks as this relies upon GitHub actions being present
-                # main_b.edit_required_status_checks(strict=True, contexts=[
-                #
-                # ])
-            else:
-                print(f'There is no branch {main_branch} in {repo.name}')
 
-        # print(dir(repo.permissions))
+def _policy(value: str) -> CompiledPolicy:
+    try:
+        return load_policy(value)
+    except (OSError, ValueError) as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='github_standards',
+                                     description=f'Apply the Sonatype Community GitHub Standards to {GH_ORG_NAME}, '
+                                                 f'or to the orgs in --config')
+    parser.add_argument('--config',
+                        help='TOML file listing the orgs to manage and the credentials for each (default: '
+                             f'{GH_ORG_NAME} with the token in GH_TOKEN). With several orgs, file options must '
+                             'contain {org}, which is replaced by the org name')
+    parser.add_argument('--policy', type=_policy, default=DEFAULT_STANDARDS_POLICY,
+                        help='TOML file with the standards to apply, the repositories to leave out and overrides for '
+                             'repositories with particular custom properties (default: the Sonatype Community '
+                             'GitHub Standards)')
+    parser.add_argument('--org-workers', type=_positive_int, default=4,
+                        help='Number of orgs to work on at once (default: %(default)s)')
+    parser.add_argument('--api-url', default=Consts.DEFAULT_BASE_URL,
+                        help='Base URL of the GitHub REST API, for GitHub Enterprise Server (default: %(default)s)')
+    parser.add_argument('--workers', type=_positive_int, default=1,
+                        help='Number of repositories to audit and remediate concurrently, or with the asyncio engine '
+                             'the number of requests in flight at once (default: 1)')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='threads',
+                        help='threads works through repositories on a pool of --workers threads; asyncio also makes '
+                             'the independent reads for each repository together (default: %(default)s)')
+    parser.add_argument('--backend', choices=['classic', 'rulesets'], default='classic',
+                        help='Enforce the branch standards with classic protection on the default branch of each '
+                             'repository, or with one org ruleset aimed at every repository in scope '
+                             '(default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report where repositories are not as per standards without changing anything')
+    parser.add_argument('--graphql', action='store_true',
+                        help='Read all repository settings and default branch protection with a few bulk GraphQL '
+                             'queries rather than per repository REST calls (requires --dry-run or plan)')
+    parser.add_argument('--topic', dest='topics', action='append', default=[],
+                        help='Only look at repositories with this topic (may be given more than once, for repositories '
+                             'with all of them). Narrowed down by the search API rather than by listing everything')
+    parser.add_argument('--visibility', choices=['public', 'private', 'internal'],
+                        help='Only look at repositories with this visibility (narrowed down by the search API)')
+    parser.add_argument('--exclude-archived', action='store_true',
+                        help='Leave out archived repositories (narrowed down by the search API)')
+    parser.add_argument('--name-pattern',
+                        help='Only look at repositories whose name matches this pattern, e.g. "nexus-*"')
+    parser.add_argument('--cache-dir',
+                        help='Keep an on-disk cache of GitHub responses here and revalidate them with conditional '
+                             'requests, which do not count against the rate limit when nothing has changed')
+    parser.add_argument('--cache-max-mb', type=_positive_int, default=DEFAULT_MAX_CACHE_BYTES // (1024 * 1024),
+                        help='Size the cache is trimmed back to, least recently used first (default: %(default)s)')
+    parser.add_argument('--rate-limit-reserve', type=int, default=DEFAULT_RESERVE,
+                        help='Requests of the rate limit to leave untouched - the run waits for the limit to reset '
+                             'rather than use them (default: %(default)s)')
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='Times to retry a request that failed with a dropped connection, a timeout or a server '
+                             'error, backing off with jitter. Writes that are not safe to repeat are only retried if '
+                             'they were never sent (default: %(default)s)')
+    parser.add_argument('--checkpoint-file',
+                        help='Journal which repositories are done (and the writes in flight) here as the run goes, '
+                             'so an interrupted run or apply can be continued with --resume. Removed once every '
+                             'repository is done')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted run journalled in --checkpoint-file, skipping the '
+                             'repositories it had done')
+    parser.add_argument('--state-file',
+                        help='Record what each repository looked like in this run, for later --incremental runs')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip repositories that have not changed since they were last found to be as per '
+                             'standards (requires --state-file)')
+    parser.add_argument('--full-sweep-days', type=_positive_int, default=DEFAULT_FULL_SWEEP_DAYS,
+                        help='With --incremental, still assess every repository if the last full run was this many '
+                             'days ago, to catch changes that do not show in the listing (default: %(default)s)')
+    parser.add_argument('--history-db',
+                        help='Save the results of each run and plan, per repository and rule, to this SQLite database '
+                             '(which several orgs and shards can share), for the report command')
+    parser.add_argument('--event-log',
+                        help='Append a JSON line to this file for every standard found not met (with the expected and '
+                             'actual values and whether it was put right) and for the outcome of every repository, '
+                             'for render-events or other tools to read')
+    parser.add_argument('--metrics-prom',
+                        help='Write counters and latency histograms of the GitHub API requests made to this file, in '
+                             'the Prometheus text format (for the node_exporter textfile collector)')
+    parser.add_argument('--metrics-json', help='Write the same metrics to this file as JSON')
+    parser.add_argument('--metrics-per-repo', action='store_true',
+                        help='Also break the API request metrics down by repository')
+    parser.add_argument('--shard', type=_shard,
+                        help='Only process the repositories in shard i of n (e.g. 2/4), chosen by a hash of the '
+                             'repository name, so n jobs can split the organisation between them')
+    parser.add_argument('--report-file',
+                        help='Also write the summary of the run to this file (JSON), for merge-reports')
+
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND',
+                                     help='What to do (default: run - assess and apply the standards in one pass)')
+    commands.add_parser('run', help='Assess every repository and apply the standards where they are not met')
+    plan_parser = commands.add_parser('plan', help='Assess every repository and write the changes needed to a plan, '
+                                                   'without changing anything')
+    plan_parser.add_argument('plan_file', help='Where to write the plan (JSON)')
+    apply_parser = commands.add_parser('apply', help='Make the changes in a saved plan, skipping any repository that '
+                                                     'has changed since the plan was made')
+    apply_parser.add_argument('plan_file', help='The plan to apply')
+    merge_parser = commands.add_parser('merge-reports', help='Combine the --report-file of each shard of a run into '
+                                                             'one summary for the whole organisation')
+    merge_parser.add_argument('report_files', nargs='+', metavar='report_file', help='A report written by one shard')
+    render_parser = commands.add_parser('render-events', help='Print an --event-log for people to read')
+    render_parser.add_argument('events_file', metavar='event_log', help='The event log to print')
+    render_parser.add_argument('--repo', help='Only print the events of this repository')
+    report_parser = commands.add_parser('report', help='Answer questions from the results saved with --history-db, '
+                                                       'without using the GitHub API')
+    report_parser.add_argument('--org', help='Only look at this org (default: every org in the database)')
+    queries = report_parser.add_subparsers(dest='query', metavar='QUERY', required=True)
+    runs_parser = queries.add_parser('runs', help='The most recent runs')
+    runs_parser.add_argument('--limit', type=_positive_int, default=10,
+                             help='Number of runs to list (default: %(default)s)')
+    out_of_standards_parser = queries.add_parser('out-of-standards',
+                                                 help='Repositories that have not met a rule for a while')
+    out_of_standards_parser.add_argument('rule', help='The rule, e.g. has_wiki or required_signatures')
+    out_of_standards_parser.add_argument('--days', type=float, default=7,
+                                         help='For at least this many days (default: %(default)s)')
+    drift_parser = queries.add_parser('drift', help='How often each rule stops being met')
+    drift_parser.add_argument('--days', type=float, default=30,
+                              help='Over the last this many days (default: %(default)s)')
+    changes_parser = queries.add_parser('changes', help='What drifted and what was fixed after a run')
+    changes_parser.add_argument('run', type=int, help='The id of the run, as listed by report runs')
+    serve_parser = commands.add_parser('serve', help='Listen for GitHub webhooks and bring each repository that '
+                                                     'changes back to standards (secret in GH_WEBHOOK_SECRET)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: %(default)s)')
+    serve_parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: %(default)s)')
+    serve_parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                              help='Seconds to wait after the last event for a repository before acting on it '
+                                   '(default: %(default)s)')
+    serve_parser.add_argument('--max-pending', type=_positive_int, default=DEFAULT_MAX_PENDING,
+                              help='Repositories that can be waiting at once, events for others are refused '
+                                   '(default: %(default)s)')
+
+    args = parser.parse_args(argv)
+    args.command = args.command or 'run'
+    if args.incremental and not args.state_file:
+        parser.error('--incremental needs a --state-file to compare against')
+    if args.graphql and args.command == 'run' and not args.dry_run:
+        parser.error('--graphql only supports auditing, use it with --dry-run or plan')
+    if args.graphql and args.command == 'apply':
+        parser.error('--graphql only supports auditing, apply makes its own checks before each change')
+    if args.command == 'serve' and (args.graphql or args.incremental or args.shard or args.report_file):
+        parser.error('serve looks at each repository as events arrive, --graphql, --incremental, --shard and '
+                     '--report-file do not apply')
+    if args.command == 'report' and not args.history_db:
+        parser.error('report needs the --history-db to read')
+    if args.history_db and args.command not in ('run', 'plan', 'report'):
+        parser.error('--history-db only applies to run, plan and report')
+    if args.event_log and args.command not in ('run', 'plan', 'apply'):
+        parser.error('--event-log only applies to run, plan and apply')
+    if args.resume and not args.checkpoint_file:
+        parser.error('--resume needs the --checkpoint-file of the run to continue')
+    if args.checkpoint_file and args.command not in ('run', 'apply'):
+        parser.error('--checkpoint-file and --resume only apply to run and apply')
+    narrowed = args.topics or args.visibility or args.exclude_archived or args.name_pattern
+    if narrowed and args.command not in ('run', 'plan'):
+        parser.error('--topic, --visibility, --exclude-archived and --name-pattern only apply to run and plan')
+    if args.graphql and (args.topics or args.visibility or args.exclude_archived):
+        parser.error('--graphql lists every repository, only --name-pattern can narrow it down')
+    if args.backend == 'rulesets' and args.command in ('plan', 'apply'):
+        parser.error('plan and apply work with classic branch protection only, use --dry-run to see what the '
+                     'rulesets backend would change')
+    if args.backend == 'rulesets' and args.policy.overrides_branch:
+        parser.error('the rulesets backend enforces one set of branch standards for the whole org, the overrides in '
+                     '--policy cannot change them')
+    if args.command == 'merge-reports' and (args.shard or args.report_file):
+        parser.error('merge-reports reads the reports of earlier runs, --shard and --report-file do not apply')
+    return args
+
+
+def review_org(args: argparse.Namespace, gh_org: Organization, plan: Optional[Plan] = None,
+               trackers: Sequence[Tracker] = ()) -> RunSummary:
+    """
+    Assesses every in-scope repository in the organisation, applying the standards unless this is a dry run or the
+    changes are being collected into `plan`. Each of `trackers` (the run's checkpoint, history and event log) follows
+    every repository, see runner.track.
+    """
+    dry_run = args.dry_run or plan is not None
+    policy = args.policy
+    properties = CustomPropertyIndex.for_org(gh_org, excluded_repo_names=policy.exclude)
+
+    state = RunState(args.state_file, policy=policy.digest) if args.state_file else None
+    incremental = args.incremental
+    if incremental and state.full_sweep_due(args.full_sweep_days):
+        print(f'Assessing every repository as the last full run was over {args.full_sweep_days} days ago')
+        incremental = False
+    elif incremental and state.policy != policy.digest:
+        print('Assessing every repository as the standards policy has changed since the last run')
+        incremental = False
+    if incremental:
+        state.load_changes_from_events(gh_org)
+
+    def skip_reason_for(repo: Repository) -> Optional[str]:
+        if incremental and state.is_unchanged(repo, properties.properties_for(repo.name)):
+            return 'it has not changed since the last run'
+        return properties.skip_reason(repo.name)
+
+    # With the rulesets backend the branch standards are checked (and repaired) once for the whole org, up front
+    ruleset_result = None
+    if args.backend == 'rulesets':
+        ruleset_result = check_and_apply_standards_ruleset(gh_org, properties, do_actual_work=not dry_run,
+                                                           policy=policy.base)
+
+    def assess_repo(repo: Repository) -> Optional[str]:
+        skip_reason = skip_reason_for(repo)
+        if skip_reason is not None:
+            note(repo.name, f'skipped as {skip_reason}')
+            return None
+        repo_policy = policy.for_repo(properties.properties_for(repo.name))
+        if ruleset_result is not None:
+            return apply_standards_to_repo_with_ruleset(repo, ruleset_result, do_actual_work=not dry_run,
+                                                        policy=repo_policy)
+        return apply_standards_to_repo(repo=repo, do_actual_work=not dry_run, plan=plan, policy=repo_policy)
+
+    async def assess_repo_async(repo: Repository) -> Optional[str]:
+        skip_reason = skip_reason_for(repo)
+        if skip_reason is not None:
+            note(repo.name, f'skipped as {skip_reason}')
+            return None
+        repo_policy = policy.for_repo(properties.properties_for(repo.name))
+        if ruleset_result is not None:
+            return await limiter.call(apply_standards_to_repo_with_ruleset, repo, ruleset_result,
+                                      not dry_run, repo_policy)
+        return await apply_standards_to_repo_async(repo, limiter, do_actual_work=not dry_run, plan=plan,
+                                                   policy=repo_policy)
+
+    # repo = gh_org.get_repo('github-management')
+    # apply_standards_to_repo(repo=repo, do_actual_work=True)
+
+    # List the repos on a thread of its own, so the next page is on its way while the current one is worked through
+    repo_filter = RepoFilter(tuple(args.topics), args.visibility, args.exclude_archived, args.name_pattern)
+    if args.graphql:
+        repos = (repo for repo in get_org_repositories(gh_org, properties) if repo_filter.matches(repo))
+    else:
+        repos = list_org_repositories(gh_org, repo_filter)
+    repos = prefetch(repos, buffer=PAGE_SIZE)
+    if args.shard is not None:
+        repos = args.shard.select(repos)
+    if state is not None:
+        # after the checkpoint, so the repos a resumed run skips are recorded as well
+        trackers = [*trackers, StateRecorder(state, properties.properties_for, dry_run)]
+    if args.engine == 'asyncio':
+        limiter = RequestLimiter(args.workers)
+        summary = run_for_each_repo_async(repos, track_async(assess_repo_async, trackers), concurrency=args.workers)
+    else:
+        summary = run_for_each_repo(repos, track(assess_repo, trackers), workers=args.workers)
+
+    if state is not None:
+        state.save(full_sweep=not incremental)
+    return summary
+
+
+def serve_webhooks(args: argparse.Namespace, gh_org: Organization, secret: str) -> None:
+    """
+    Runs until interrupted, bringing each repository that a webhook event arrives for back to standards (or, with
+    --dry-run, reporting how it is out of standards).
+    """
+    real_stdout = sys.stdout
+    stdout = ContextLocalStdout(real_stdout)
+    output_lock = threading.Lock()
+    # not logged to a file, but printed as a run prints them
+    events = EventLog()
+
+    @events.track
+    def review(repo: Repository) -> Optional[str]:
+        # the event may have been a change to the custom properties, so they are read afresh
+        properties = CustomPropertyIndex({repo.name: repo.get_custom_properties()},
+                                         excluded_repo_names=args.policy.exclude)
+        skip_reason = properties.skip_reason(repo.name)
+        if skip_reason is not None:
+            note(repo.name, f'skipped as {skip_reason}')
+            return None
+        repo_policy = args.policy.for_repo(properties.properties_for(repo.name))
+        if args.backend == 'rulesets':
+            # the ruleset names every repository in scope, so it is checked against all of them
+            org_properties = CustomPropertyIndex.for_org(gh_org, excluded_repo_names=args.policy.exclude)
+            ruleset_result = check_and_apply_standards_ruleset(gh_org, org_properties, do_actual_work=not args.dry_run,
+                                                               policy=args.policy.base)
+            return apply_standards_to_repo_with_ruleset(repo, ruleset_result, do_actual_work=not args.dry_run,
+                                                        policy=repo_policy)
+        return apply_standards_to_repo(repo=repo, do_actual_work=not args.dry_run, policy=repo_policy)
+
+    def remediate(repo_name: str) -> None:
+        buffer = stdout.capture()
+        try:
+            review(gh_org.get_repo(repo_name))
+        finally:
+            stdout.release()
+            with output_lock:
+                real_stdout.write(buffer.getvalue())
+                real_stdout.flush()
+
+    queue = DebouncedQueue(remediate, debounce=args.debounce, max_pending=args.max_pending)
+    server = WebhookServer((args.host, args.port), secret.encode('utf-8'), gh_org.login, queue)
+    print(f'Listening for webhooks for {gh_org.login} on {args.host}:{server.server_address[1]}')
+    sys.stdout = stdout
+    queue.start(workers=args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        queue.stop()
+        sys.stdout = real_stdout
+    print(f'Stopped, {queue.pending} repositories were still waiting')
+
+
+def merge_report_files(report_files: List[str]) -> None:
+    try:
+        summary, missing_shards = merge_reports(Report.load(report_file) for report_file in report_files)
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    print(summary.report())
+    if missing_shards:
+        print(f'No report for shards {", ".join(missing_shards)} - their repos are not included above')
+    if summary.failed or missing_shards:
+        exit(1)
+
+
+def render_event_log(args: argparse.Namespace) -> None:
+    try:
+        for event in read_events(args.events_file):
+            if args.repo is None or event.get('repo') == args.repo:
+                print(render(event))
+    except (OSError, ValueError) as e:
+        print(e)
+        exit(1)
 
 
-def main() -> None:
-    gh_token = os.getenv('GH_TOKEN', None)
+def _on_branch(branch: str) -> str:
+    # rules checked on the repository or its default branch are saved with no branch
+    return f' on {branch}' if branch else ''
 
-    if not gh_token:
-        print(f'GH_TOKEN environment variable not set.')
+
+def report_history(args: argparse.Namespace) -> None:
+    if not os.path.exists(args.history_db):
+        print(f'There is no history in {args.history_db} yet')
         exit(1)
 
-    with Github(auth=Auth.Token(gh_token)) as gh:
-        gh_org = gh.get_organization(GH_ORG_NAME)
+    history = History(args.history_db)
+    try:
+        if args.query == 'runs':
+            print('Runs (newest first):')
+            for run_id, started_at, org, command, dry_run, shard, assessed, out_of_standards in history.runs(
+                    args.limit, args.org):
+                details = ''.join([f' shard {shard}' if shard else '', ' (dry run)' if dry_run else ''])
+                print(f'    {run_id}: {started_at} {org} {command}{details} - {assessed} assessed, '
+                      f'{out_of_standards} out of standards')
+        elif args.query == 'out-of-standards':
+            repos = history.out_of_standards(args.rule, args.days, args.org)
+            print(f'{len(repos)} repos have not met {args.rule} for {args.days:g} days or more:')
+            for org, repo, branch, since, run_id in repos:
+                print(f'    {org}/{repo}{_on_branch(branch)} since {since} (run {run_id})')
+        elif args.query == 'drift':
+            drift = history.drift(args.days, args.org, args.policy.rules)
+            assessments = drift[0].assessments if drift else 0
+            print(f'Over the last {args.days:g} days ({assessments} assessments):')
+            for rule in sorted(drift, key=lambda rule: (-rule.rate, -rule.open, rule.rule)):
+                print(f'    {rule.rule}: {rule.open} out of standards now, {rule.drifted} drifted, {rule.fixed} fixed '
+                      f'({rule.rate:.1%} of assessments drifted)')
+        else:
+            drifted, fixed = history.changes_since(args.run, args.org)
+            print(f'Since run {args.run}: {len(drifted)} drifted, {len(fixed)} fixed')
+            for heading, changes in [('Drifted', drifted), ('Fixed', fixed)]:
+                if changes:
+                    print(f'    {heading}:')
+                for org, repo, branch, rule, run_id in changes:
+                    print(f'        {org}/{repo}{_on_branch(branch)}: {rule} (run {run_id})')
+    finally:
+        history.close()
+
+
+def _org_args(args: argparse.Namespace, org_name: str) -> argparse.Namespace:
+    org_args = argparse.Namespace(**vars(args))
+    for option in ORG_PATH_OPTIONS:
+        if getattr(args, option, None):
+            setattr(org_args, option, getattr(args, option).replace('{org}', org_name))
+    return org_args
+
+
+def run_org(args: argparse.Namespace, org: OrgConfig, webhook_secret: Optional[str] = None) -> bool:
+    """
+    Runs the command for one org with its own client, credentials, cache and rate limit budget. Returns False if
+    anything failed.
+    """
+    args = _org_args(args, org.name)
+    try:
+        auth = credential_pool(org, args.api_url)
+    except ValueError as e:
+        print(e)
+        return False
+
+    plan = None
+    if args.command == 'apply':
+        try:
+            plan = Plan.load(args.plan_file)
+        except (OSError, ValueError) as e:
+            print(e)
+            return False
+        if plan.org != org.name:
+            print(f'{args.plan_file} is a plan for {plan.org}, not {org.name}')
+            return False
+
+    cache = None
+    if args.cache_dir:
+        cache = ConditionalRequestCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024,
+                                        credential_of=auth.credential_of)
+
+    checkpoint = None
+    if args.checkpoint_file:
+        run = {'org': org.name, 'command': args.command, 'dry_run': args.dry_run, 'backend': args.backend,
+               'shard': str(args.shard) if args.shard else None, 'plan_file': getattr(args, 'plan_file', None),
+               'policy': args.policy.digest}
+        try:
+            checkpoint = Checkpoint(args.checkpoint_file, run, resume=args.resume)
+        except ValueError as e:
+            print(e)
+            return False
+        if args.resume:
+            print(checkpoint.report())
+
+    history = History(args.history_db) if args.history_db else None
+    # without --event-log the events are only printed
+    events = EventLog(args.event_log)
+    # each follows the repos after the one before it, so the event log (last) logs the checkpoint's notes too
+    trackers = [tracker for tracker in (checkpoint, history, events) if tracker is not None]
+    retry = TransientRetry(max_retries=args.retries)
+    scheduler = RateLimitScheduler(reserve=args.rate_limit_reserve, credential_of=auth.credential_of)
+    metrics = RequestMetrics(per_repo=args.metrics_per_repo, credential_of=auth.credential_of)
+
+    summary = None
+    try:
+        # Keep at least one pooled connection per worker so concurrent requests are not made on throwaway connections.
+        # Reads are paced by the scheduler against the actual rate limit, so PyGithub's fixed gap between requests
+        # (which holds every run to 4 requests a second whatever the number of workers) is turned off. Its gap between
+        # writes is kept, as GitHub asks for writes to be spaced out to stay clear of the secondary rate limits.
+        # PyGithub's own retries (immediate, and of POSTs whether or not they are safe to repeat) are replaced by
+        # TransientRetry. Every listing asks for GitHub's largest page size, for a fraction of the requests.
+        with Github(auth=auth, base_url=args.api_url, pool_size=max(args.workers, 10), per_page=PAGE_SIZE,
+                    seconds_between_requests=None, retry=None) as gh:
+            if cache is not None:
+                install_middleware(gh, cache)
+            if checkpoint is not None:
+                # before the retries, so a write is journalled once however many attempts it takes
+                install_middleware(gh, checkpoint)
+            # after the cache, so only what goes over the wire is retried
+            install_middleware(gh, retry)
+            # after the retries, so the scheduler paces (and on rate limits retries) each attempt
+            install_middleware(gh, scheduler)
+            # likewise, so the rate limit left for each credential is what GitHub reported rather than a cached response
+            install_middleware(gh, auth)
+            # last, so each attempt is measured on its own and waiting on the rate limit is not counted as latency
+            install_middleware(gh, metrics)
+            gh_org = gh.get_organization(org.name)
+
+            if args.command == 'serve':
+                serve_webhooks(args, gh_org, webhook_secret)
+            elif args.command == 'apply':
+                repo_plans = plan.repo_plans()
+                if args.shard is not None:
+                    repo_plans = args.shard.select(repo_plans)
+                if args.engine == 'asyncio':
+                    limiter = RequestLimiter(args.workers)
 
-        # repo = gh_org.get_repo('github-management')
-        # apply_standards_to_repo(repo=repo, do_actual_work=True)
+                    async def apply_async(repo_plan: RepoPlan) -> Optional[str]:
+                        return await limiter.call(apply_repo_plan, gh_org, repo_plan)
 
-        # List all Repos
-        for repo in gh_org.get_repos():
-            if repo.custom_properties.get('Auto-Apply-Standards', 'false') != 'false':
-                apply_standards_to_repo(repo=repo, do_actual_work=True)
+                    summary = run_for_each_repo_async(repo_plans, track_async(apply_async, trackers),
+                                                      concurrency=args.workers)
+                else:
+                    def apply(repo_plan: RepoPlan) -> Optional[str]:
+                        return apply_repo_plan(gh_org, repo_plan)
+
+                    summary = run_for_each_repo(repo_plans, track(apply, trackers), workers=args.workers)
+            elif args.command == 'plan':
+                plan = Plan(org.name)
+                summary = review_org(args, gh_org, plan, trackers)
+                plan.save(args.plan_file)
+                print(f'Plan with changes to {len(plan.repos)} repos written to {args.plan_file}')
             else:
-                print(f'Skipping {repo.name} as Auto-Apply-Standards is not true')
+                summary = review_org(args, gh_org, trackers=trackers)
+    finally:
+        # whatever happened to the run, what it did is kept - and a checkpoint that did not finish is kept to resume
+        finished = summary is not None and not summary.failed
+        if checkpoint is not None:
+            checkpoint.close(finished=finished)
+            if not finished:
+                print(f'Checkpoint kept in {args.checkpoint_file}, rerun with --resume to retry only what is not done')
+        if history is not None:
+            run_id = history.save_run(org.name, args.command, dry_run=args.dry_run or args.command == 'plan',
+                                      shard=str(args.shard) if args.shard else None)
+            history.close()
+            print(f'Results saved to {args.history_db} as run {run_id}')
+        events.close()
+        if args.event_log:
+            print(events.report())
+        if summary is not None:
+            print(summary.report())
+            if args.report_file:
+                Report(org.name, summary, args.shard).save(args.report_file)
+        if cache is not None:
+            print(cache.report())
+        print(retry.report())
+        print(scheduler.report())
+        if len(org.credentials) > 1:
+            print(auth.report())
+        print(metrics.report())
+        if args.metrics_prom:
+            metrics.save_prometheus(args.metrics_prom)
+        if args.metrics_json:
+            metrics.save_json(args.metrics_json)
+    return summary is None or not summary.failed
+
+
+def run_orgs(args: argparse.Namespace, orgs: List[OrgConfig]) -> bool:
+    """
+    Runs the command for each org, up to --org-workers at once. The output of each org is kept together and written
+    out in the order the orgs are configured.
+    """
+    real_stdout = sys.stdout
+    stdout = ContextLocalStdout(real_stdout)
+
+    def run_captured(org: OrgConfig) -> Tuple[bool, str]:
+        buffer = stdout.capture()
+        try:
+            print(f'Org {org.name}:')
+            return run_org(args, org), buffer.getvalue()
+        except Exception:
+            traceback.print_exc(file=buffer)
+            return False, buffer.getvalue()
+        finally:
+            stdout.release()
+
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=args.org_workers, thread_name_prefix='github-standards-org') as pool:
+            succeeded = True
+            for future in [pool.submit(run_captured, org) for org in orgs]:
+                ok, output = future.result()
+                real_stdout.write(output)
+                succeeded = succeeded and ok
+    finally:
+        sys.stdout = real_stdout
+    return succeeded
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.command == 'merge-reports':
+        merge_report_files(args.report_files)
+        return
+    if args.command == 'report':
+        report_history(args)
+        return
+    if args.command == 'render-events':
+        render_event_log(args)
+        return
+
+    try:
+        orgs = load_config(args.config) if args.config else DEFAULT_ORGS
+    except (OSError, ValueError) as e:
+        print(e)
+        exit(1)
+    if len(orgs) > 1:
+        if args.command == 'serve':
+            print(f'serve handles a single org, {args.config} lists {len(orgs)}')
+            exit(1)
+        shared = [option for option in ORG_PATH_OPTIONS if '{org}' not in (getattr(args, option, None) or '{org}')]
+        if shared:
+            print(f'{args.config} lists {len(orgs)} orgs, so these options need an {{org}} in their path: '
+                  f'{", ".join(shared)}')
+            exit(1)
+
+    webhook_secret = os.getenv('GH_WEBHOOK_SECRET', None)
+    if args.command == 'serve' and not webhook_secret:
+        print(f'GH_WEBHOOK_SECRET environment variable not set.')
+        exit(1)
+
+    succeeded = run_org(args, orgs[0], webhook_secret) if len(orgs) == 1 else run_orgs(args, orgs)
+    if not succeeded:
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, Iterable, Optional, TextIO, Tuple
+
+from github.Repository import Repository
+
+from github_standards.plan import Plan
+from github_standards.review import assess_repo, get_default_branch, review_protected_branches
+from github_standards.runner import ContextLocalStdout, RunSummary, context_local_stdout
+from github_standards.snapshot import fetch_branch_snapshot, fetch_repo_snapshot
+from github_standards.standards import DEFAULT_POLICY, Policy
+
+AsyncRepoAction = Callable[[Repository], Awaitable[Optional[str]]]
+
+
+class RequestLimiter:
+    """
+    Runs blocking PyGithub calls off the event loop, with at most `limit` of them in flight at once across every repo.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        async with self._semaphore:
+            return await asyncio.to_thread(fn, *args)
+
+
+async def _nothing() -> None:
+    return None
+
+
+async def apply_standards_to_repo_async(repo: Repository, limiter: RequestLimiter, do_actual_work: bool = False,
+                                        plan: Optional[Plan] = None, policy: Policy = DEFAULT_POLICY) -> str:
+    """
+    The asyncio counterpart of `apply_standards_to_repo`: the same reads, checks and writes with the same output, but
+    reads that do not depend on each other are in flight together.
+    """
+    repo_snapshot, main_b = await asyncio.gather(
+        limiter.call(fetch_repo_snapshot, repo, policy.repo_fields),
+        limiter.call(get_default_branch, repo) if policy.checks_branch else _nothing())
+    branch_snapshot = None
+    if main_b:
+        branch_snapshot = await limiter.call(fetch_branch_snapshot, main_b)
+
+    missing_standards = await limiter.call(assess_repo, repo, repo_snapshot, main_b, branch_snapshot, do_actual_work,
+                                           plan, policy)
+    if policy.checks_branch and policy.branch_patterns:
+        # the branches are streamed a page at a time, so they are worked through in order on one thread
+        missing_branch_standards = await limiter.call(review_protected_branches, repo, do_actual_work, plan, policy)
+        if missing_standards != '' and missing_branch_standards != '':
+            missing_standards = f'{missing_standards},'
+        missing_standards = missing_standards + missing_branch_standards
+    return missing_standards
+
+
+async def _run_one(stdout: ContextLocalStdout, action: AsyncRepoAction,
+                   repo: Repository) -> Tuple[Optional[str], str, Optional[BaseException]]:
+    # each task runs in its own copy of the context, which asyncio.to_thread passes on to the threads it uses
+    buffer = stdout.capture()
+    try:
+        return await action(repo), buffer.getvalue(), None
+    except Exception as e:
+        traceback.print_exc(file=buffer)
+        return None, buffer.getvalue(), e
+
+
+async def _run_for_each_repo(repos: Iterable[Repository], action: AsyncRepoAction, concurrency: int,
+                             stdout: ContextLocalStdout, real_stdout: TextIO, summary: RunSummary) -> None:
+    pending: Deque[Tuple[str, asyncio.Task]] = deque()
+
+    async def emit() -> None:
+        repo_name, task = pending.popleft()
+        missing, output, error = await task
+        real_stdout.write(output)
+        summary.record(repo_name, missing, error)
+
+    # paging through the listing blocks too, so it happens off the loop
+    listing = iter(repos)
+    while (repo := await asyncio.to_thread(next, listing, None)) is not None:
+        pending.append((repo.name, asyncio.create_task(_run_one(stdout, action, repo))))
+        if len(pending) >= concurrency * 2:
+            await emit()
+    while pending:
+        await emit()
+
+
+def run_for_each_repo_async(repos: Iterable[Repository], action: AsyncRepoAction, concurrency: int) -> RunSummary:
+    """
+    The asyncio counterpart of `run_for_each_repo`: output is grouped per repo and in listing order, and failures are
+    recorded in the summary, exactly as with the thread pool.
+    """
+    summary = RunSummary()
+    real_stdout = sys.stdout
+    stdout = context_local_stdout(real_stdout)
+
+    async def run() -> None:
+        # room for every in-flight request plus the listing
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=concurrency + 1, thread_name_prefix='github-standards'))
+        await _run_for_each_repo(repos, action, concurrency, stdout, real_stdout, summary)
+
+    sys.stdout = stdout
+    try:
+        asyncio.run(run())
+    finally:
+        sys.stdout = real_stdout
+
+    return summary
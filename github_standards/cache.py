@@ -0,0 +1,175 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+from github_standards.transport import Send
+
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Response headers that describe this particular exchange rather than the cached resource, so they are taken from the
+# 304 response rather than the stored one
+_LIVE_HEADERS = ('date', 'x-ratelimit-limit', 'x-ratelimit-remaining', 'x-ratelimit-reset', 'x-ratelimit-used',
+                 'x-ratelimit-resource', 'x-github-request-id')
+
+# The stored body has already been decoded by requests, so headers describing its encoding on the wire are dropped
+_BODY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+# Share of max_bytes the cache is trimmed back to once it goes over
+_LOW_WATER = 0.9
+
+
+class ConditionalRequestCache:
+    """
+    On-disk cache of GitHub GET responses, used as transport middleware.
+
+    Every cached response is revalidated with `If-None-Match` / `If-Modified-Since`, so nothing stale is ever served:
+    when GitHub answers 304 Not Modified the stored response is returned instead. GitHub does not count 304s against
+    the rate limit. Entries are one file each in `directory`; once they add up to more than `max_bytes` the least
+    recently used are removed until they are back under 90% of it.
+
+    Responses are cached per credential, named by `credential_of` (CredentialPool.credential_of) where it can so that
+    a credential whose token changes - an installation token is replaced every hour - still finds its entries.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+                 credential_of: Callable[[PreparedRequest], Optional[str]] = lambda request: None) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._credential_of = credential_of
+        self.requests = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Entry name -> size, least recently used first. Worked out from the files once, then kept up to date in memory
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        self._sizes: 'OrderedDict[str, int]' = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._total = sum(self._sizes.values())
+
+    def _key(self, request: PreparedRequest) -> str:
+        # GitHub varies responses on Accept and Authorization, so both are part of the key. The credential stands in for
+        # its token when it is known. The token is only ever stored hashed.
+        credential = self._credential_of(request) or request.headers.get('Authorization', '')
+        key = '\n'.join([request.url, request.headers.get('Accept', ''), credential])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json'
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # the modification time carries the order over to the next run
+        os.utime(os.path.join(self.directory, name))
+        with self._lock:
+            if name in self._sizes:
+                self._sizes.move_to_end(name)
+        return entry
+
+    def _write(self, name: str, entry: Dict[str, Any]) -> None:
+        path = os.path.join(self.directory, name)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total += size - self._sizes.pop(name, 0)
+            self._sizes[name] = size
+            evicted = self._evict()
+        for evicted_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, evicted_name))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> List[str]:
+        # Once over the limit, entries are dropped down to the low-water mark rather than just under the limit, so the
+        # writes that follow do not each have to evict again. Called with the lock held; the files are removed after.
+        if self._total <= self.max_bytes:
+            return []
+        evicted = []
+        low_water = self.max_bytes * _LOW_WATER
+        while self._sizes and self._total > low_water:
+            name, size = self._sizes.popitem(last=False)
+            self._total -= size
+            evicted.append(name)
+        return evicted
+
+    @staticmethod
+    def _response_from_entry(request: PreparedRequest, entry: Dict[str, Any], not_modified: Response) -> Response:
+        response = Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        for header in _LIVE_HEADERS:
+            if header in not_modified.headers:
+                response.headers[header] = not_modified.headers[header]
+        response._content = base64.b64decode(entry['body'])
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = not_modified.connection
+        return response
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        if request.method != 'GET':
+            return send(request)
+
+        name = self._key(request)
+        entry = self._read(name) if name in self._sizes else None
+        if entry is not None:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = send(request)
+        with self._lock:
+            self.requests += 1
+            if entry is not None and response.status_code == 304:
+                self.revalidated += 1
+
+        if entry is not None and response.status_code == 304:
+            return self._response_from_entry(request, entry, response)
+
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self._write(name, {
+                'status': response.status_code,
+                'headers': {k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS},
+                'body': base64.b64encode(response.content).decode('ascii'),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            })
+        return response
+
+    def report(self) -> str:
+        return f'HTTP cache: {self.revalidated} of {self.requests} GET requests served from cache (304 Not Modified)'
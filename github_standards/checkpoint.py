@@ -0,0 +1,137 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from requests import PreparedRequest, Response
+
+from github_standards.events import note
+from github_standards.metrics import repo_of
+from github_standards.runner import Tracker
+from github_standards.transport import Send
+
+
+class Checkpoint(Tracker):
+    """
+    A journal of how far a run got, so one that dies part way through (a network outage, a runner timeout) can be
+    resumed rather than started over. One JSON object is appended per line and flushed as the run goes:
+
+    - `{"run": {...}}` first, what the run was, so a journal is only ever resumed by the same run
+    - `{"write": id, "repo": name, "request": "PATCH /repos/..."}` before each write is sent, and
+      `{"written": id, "status": 200}` once GitHub has answered it
+    - `{"done": name, "missing": "..."}` once a repository has been dealt with, with what the action returned
+
+    Resuming skips the repositories that are done, reporting what was found for them then. Any other repository is
+    dealt with again, including those with a write that was sent but never answered - the standards are checked
+    against what is there before anything is changed, so a write that did land is not made twice. It follows the repo
+    action as a Tracker (see runner.track).
+    """
+
+    def __init__(self, path: str, run: Dict[str, Any], resume: bool = False) -> None:
+        self.path = path
+        self.run = run
+        self.resumed: Dict[str, Optional[str]] = {}
+        self.interrupted_writes: List[Tuple[Optional[str], str]] = []
+        self._next_write = 1
+        self._lock = threading.Lock()
+
+        resuming = resume and os.path.exists(path)
+        if resuming:
+            self._load()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a' if resuming else 'w', encoding='utf-8')
+        if not resuming:
+            self._append({'run': run})
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        entries = []
+        for number, line in enumerate(lines, start=1):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # the run died part way through writing its last line
+                if number != len(lines):
+                    raise ValueError(f'{self.path} is not a checkpoint, line {number} is not JSON')
+        if not entries or entries[0].get('run') != self.run:
+            raise ValueError(f'{self.path} is the checkpoint of a different run '
+                             f'({entries[0].get("run") if entries else "empty"}), remove it or leave out --resume')
+
+        writes: Dict[int, Tuple[Optional[str], str]] = {}
+        for entry in entries[1:]:
+            if 'done' in entry:
+                self.resumed[entry['done']] = entry['missing']
+            elif 'write' in entry:
+                writes[entry['write']] = (entry['repo'], entry['request'])
+                self._next_write = max(self._next_write, entry['write'] + 1)
+            elif 'written' in entry:
+                writes.pop(entry['written'], None)
+        self.interrupted_writes = [(repo, request) for repo, request in writes.values() if repo not in self.resumed]
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def done(self, name: str, missing: Optional[str]) -> None:
+        self._append({'done': name, 'missing': missing})
+
+    def started(self, item: Any) -> Optional[Tuple[Optional[str]]]:
+        # those done before the run was resumed are not done again
+        if item.name in self.resumed:
+            note(item.name, 'skipped as it was done before the run was resumed')
+            return (self.resumed[item.name],)
+        return None
+
+    def finished(self, item: Any, missing: Optional[str], error: Optional[BaseException]) -> None:
+        if error is None:
+            self.done(item.name, missing)
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        """
+        Transport middleware that journals each write, so a write that was in flight when the run died is known.
+        """
+        if request.method == 'GET' or request.path_url.split('?')[0].endswith('/graphql'):
+            return send(request)
+        with self._lock:
+            write = self._next_write
+            self._next_write += 1
+        self._append({'write': write, 'repo': repo_of(request.url), 'request': f'{request.method} {request.path_url}'})
+        response = send(request)
+        self._append({'written': write, 'status': response.status_code})
+        return response
+
+    def close(self, finished: bool) -> None:
+        """
+        Closes the journal, removing it when the run `finished` - every repository done - so the next run starts from
+        the beginning. Otherwise it is kept for --resume.
+        """
+        self._file.close()
+        if finished:
+            os.remove(self.path)
+
+    def report(self) -> str:
+        lines = [f'Resuming from {self.path}: {len(self.resumed)} repos were done before']
+        for repo, request in self.interrupted_writes:
+            lines.append(f'    {request} was sent but not answered, {repo or "it"} is checked again')
+        return '\n'.join(lines)
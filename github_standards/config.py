@@ -0,0 +1,88 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import tomllib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CredentialConfig:
+    """
+    One credential to call the GitHub API with: a token read from the environment variable `token_env`, or an
+    installation of the GitHub App `app_id` (its private key read from `private_key_file` or `private_key_env`). The
+    installation is looked up from the org when `installation_id` is not given.
+    """
+    token_env: Optional[str] = None
+    app_id: Optional[int] = None
+    private_key_file: Optional[str] = None
+    private_key_env: Optional[str] = None
+    installation_id: Optional[int] = None
+
+    @property
+    def is_app(self) -> bool:
+        return self.app_id is not None
+
+
+@dataclass(frozen=True, slots=True)
+class OrgConfig:
+    name: str
+    credentials: Tuple[CredentialConfig, ...]
+
+
+def _credential(org_name: str, data: Dict[str, Any]) -> CredentialConfig:
+    unknown = set(data) - set(CredentialConfig.__slots__)
+    if unknown:
+        raise ValueError(f'Unknown credential settings for {org_name}: {", ".join(sorted(unknown))}')
+    credential = CredentialConfig(**data)
+    if credential.is_app == (credential.token_env is not None):
+        raise ValueError(f'Each credential for {org_name} needs either a token_env or an app_id')
+    if credential.is_app and (credential.private_key_file is None) == (credential.private_key_env is None):
+        raise ValueError(f'GitHub App credentials for {org_name} need one of private_key_file or private_key_env')
+    return credential
+
+
+def load_config(path: str) -> List[OrgConfig]:
+    """
+    Reads the orgs to manage, and the credentials for each, from a TOML file such as:
+
+        [[orgs]]
+        name = "sonatype-nexus-community"
+        credentials = [
+            { token_env = "GH_TOKEN" },
+            { app_id = 12345, private_key_file = "app.pem" },
+        ]
+
+    Raises ValueError when the file does not describe at least one org with at least one credential.
+    """
+    with open(path, 'rb') as f:
+        data = tomllib.load(f)
+
+    orgs = []
+    for org in data.get('orgs', []):
+        if 'name' not in org:
+            raise ValueError(f'Every org in {path} needs a name')
+        credentials = tuple(_credential(org['name'], credential) for credential in org.get('credentials', []))
+        if not credentials:
+            raise ValueError(f'No credentials for {org["name"]} in {path}')
+        orgs.append(OrgConfig(org['name'], credentials))
+    if not orgs:
+        raise ValueError(f'No orgs in {path}')
+    names = [org.name for org in orgs]
+    if len(set(names)) != len(names):
+        raise ValueError(f'An org appears more than once in {path}')
+    return orgs
@@ -0,0 +1,161 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from github import Auth, GithubIntegration
+from github.Requester import Requester, WithRequester
+from requests import PreparedRequest, Response
+
+from github_standards.config import CredentialConfig, OrgConfig
+from github_standards.transport import Send
+
+
+class CredentialPool(Auth.Auth, WithRequester['CredentialPool']):
+    """
+    Authenticates each request with whichever of several credentials has the most of its rate limit left, so an org
+    can be worked through on the combined budget of all of them.
+
+    It is also transport middleware: the rate limit headers of each response are put down to the credential that
+    made the request. Credentials that have not been used yet are tried first. GitHub App installation tokens are
+    fetched when first needed and refreshed by PyGithub shortly before they expire.
+
+    Only the core (REST) rate limit is tracked - GraphQL requests are comparatively few. `credential_of` names the
+    credential behind a request, so the rate limit scheduler and the cache can tell them apart.
+    """
+
+    def __init__(self, credentials: List[Auth.Auth], clock: Callable[[], float] = time.time) -> None:
+        super().__init__()
+        if not credentials:
+            raise ValueError('A credential pool needs at least one credential')
+        self._credentials = credentials
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._remaining: List[Optional[int]] = [None] * len(credentials)
+        self._reset: List[float] = [0.0] * len(credentials)
+        self._requests = [0] * len(credentials)
+        self._issued: Dict[str, int] = {}
+        self._identities = [_identity(credential, index) for index, credential in enumerate(credentials)]
+        self._next = 0
+
+    def withRequester(self, requester: Requester) -> 'CredentialPool':
+        super().withRequester(requester)
+        for credential in self._credentials:
+            if isinstance(credential, WithRequester):
+                credential.withRequester(requester)
+        return self
+
+    @property
+    def token_type(self) -> str:
+        # personal access tokens and installation tokens are both sent as `token`
+        return 'token'
+
+    def _budget(self, index: int) -> float:
+        if self._remaining[index] is None or self._reset[index] <= self._clock():
+            return float('inf')
+        return self._remaining[index]
+
+    @property
+    def token(self) -> str:
+        with self._lock:
+            # the most budget left, taking turns between credentials with the same
+            order = [(self._next + offset) % len(self._credentials) for offset in range(len(self._credentials))]
+            index = max(order, key=self._budget)
+            self._next = (index + 1) % len(self._credentials)
+            # read under the lock, so an installation token is only refreshed once
+            token = self._credentials[index].token
+            self._issued[token] = index
+            self._requests[index] += 1
+            return token
+
+    @property
+    def _masked_token(self) -> str:
+        return 'token (credential pool token removed)'
+
+    def _index_of(self, request: PreparedRequest) -> Optional[int]:
+        return self._issued.get(request.headers.get('Authorization', '').removeprefix('token '))
+
+    def credential_of(self, request: PreparedRequest) -> Optional[str]:
+        """
+        The credential `request` is authenticated with, named so that it stays the same when its token changes (as an
+        installation token does every hour) and from one run to the next. None if the pool did not authenticate it.
+        """
+        index = self._index_of(request)
+        return self._identities[index] if index is not None else None
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        response = send(request)
+        index = self._index_of(request)
+        if (index is not None and 'X-RateLimit-Remaining' in response.headers
+                and response.headers.get('X-RateLimit-Resource', 'core') == 'core'):
+            with self._lock:
+                self._remaining[index] = int(response.headers['X-RateLimit-Remaining'])
+                self._reset[index] = float(response.headers.get('X-RateLimit-Reset', 0))
+        return response
+
+    def report(self) -> str:
+        with self._lock:
+            usage = ', '.join(f'#{index + 1} {requests} requests'
+                              + (f' ({self._remaining[index]} left)' if self._remaining[index] is not None else '')
+                              for index, requests in enumerate(self._requests))
+        return f'Credentials: {usage}'
+
+
+def _identity(credential: Auth.Auth, index: int) -> str:
+    if isinstance(credential, Auth.AppInstallationAuth):
+        return f'app {credential.app_id} installation {credential.installation_id}'
+    if isinstance(credential, Auth.Token):
+        # a token is only ever kept hashed
+        return f'token {hashlib.sha256(credential.token.encode("utf-8")).hexdigest()[:16]}'
+    return f'credential {index + 1}'
+
+
+def _private_key(credential: CredentialConfig) -> str:
+    if credential.private_key_file is not None:
+        with open(credential.private_key_file, 'r', encoding='utf-8') as f:
+            return f.read()
+    private_key = os.getenv(credential.private_key_env)
+    if not private_key:
+        raise ValueError(f'{credential.private_key_env} environment variable not set.')
+    return private_key
+
+
+def credential_auth(org_name: str, credential: CredentialConfig, base_url: str) -> Auth.Auth:
+    """
+    The PyGithub auth for one credential. For a GitHub App without an `installation_id` this looks up the app's
+    installation on the org, which is a request.
+    """
+    if not credential.is_app:
+        token = os.getenv(credential.token_env)
+        if not token:
+            raise ValueError(f'{credential.token_env} environment variable not set.')
+        return Auth.Token(token)
+
+    app_auth = Auth.AppAuth(credential.app_id, _private_key(credential))
+    installation_id = credential.installation_id
+    if installation_id is None:
+        with GithubIntegration(auth=app_auth, base_url=base_url) as integration:
+            installation_id = integration.get_org_installation(org_name).id
+    return Auth.AppInstallationAuth(app_auth, installation_id)
+
+
+def credential_pool(org: OrgConfig, base_url: str) -> CredentialPool:
+    return CredentialPool([credential_auth(org.name, credential, base_url) for credential in org.credentials])
@@ -0,0 +1,220 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from github_standards.runner import Tracker
+
+# Repositories the writer can fall behind by before the next one to finish waits for it to catch up
+DEFAULT_MAX_PENDING = 10000
+
+# Most repositories written (and flushed) at once
+_BATCH = 1000
+
+# Event types
+FINDING = 'finding'
+NOTE = 'note'
+REPO = 'repo'
+
+# Actions of a finding: what was done about it
+REPORTED = 'reported'
+APPLIED = 'applied'
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """
+    One line of the event log. A `finding` is a rule a repository (or its `branch`) did not meet, with the value that
+    was `expected` and the `actual` one, and the `action` taken - reported, or applied. A `note` is anything else worth
+    a line, as a `message`. A `repo` event closes each repository with its outcome as the action (assessed, skipped or
+    failed), the rules it was `missing` and the `duration` it took. Events about the org ruleset have the org as their
+    `repo`.
+    """
+    type: str
+    repo: str
+    rule: Optional[str] = None
+    branch: Optional[str] = None
+    expected: Any = None
+    actual: Any = None
+    action: Optional[str] = None
+    missing: Optional[List[str]] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    message: Optional[str] = None
+
+
+# The events of the repository being worked on in the current context (see EventLog.started), each with when it
+# happened, and when it was started on
+_current: ContextVar[Optional[List[Tuple[str, Event]]]] = ContextVar('repo_events', default=None)
+_started: ContextVar[float] = ContextVar('repo_started', default=0.0)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+
+def _entry(event: Event, at: Optional[str] = None) -> Dict[str, Any]:
+    entry = {'time': at} if at is not None else {}
+    entry.update((name, value) for name, value in asdict(event).items() if value is not None)
+    return entry
+
+
+def emit(event: Event) -> None:
+    """
+    Prints an event, and adds it to those of the repository being worked on. Outside of a repository an EventLog is
+    following (such as for the org ruleset) it is only printed.
+    """
+    print(render(_entry(event)))
+    events = _current.get()
+    if events is not None:
+        events.append((_now(), event))
+
+
+def note(repo: str, message: str, branch: Optional[str] = None) -> None:
+    emit(Event(NOTE, repo, branch=branch, message=message))
+
+
+def _line(at: str, event: Event) -> str:
+    return json.dumps(_entry(event, at), default=str) + '\n'
+
+
+_STOP = object()
+
+
+class EventLog(Tracker):
+    """
+    Writes events to a JSON lines file on a thread of its own, so emitting one only waits when the writer is
+    `max_pending` repositories behind. The events of each repository are written together once it is done, whatever the
+    number of workers, and the file is appended to so that a resumed run adds to the log of the interrupted one.
+
+    Each event is printed as it is emitted, and the outcome of each repository as it is done. With no `path` that is
+    all, so the console reads the same with or without a log. It follows a repo action as a Tracker (see runner.track).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_pending: int = DEFAULT_MAX_PENDING,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.path = path
+        self.written = 0
+        self._clock = clock
+        if path is None:
+            return
+        self._queue: Queue = Queue(maxsize=max_pending)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._writer = threading.Thread(target=self._write, name='github-standards-events', daemon=True)
+        self._writer.start()
+
+    def _write(self) -> None:
+        # whatever has queued up is written (and flushed) at once, rather than a write per event
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < _BATCH:
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                pass
+            chunks = [chunk for chunk in batch if chunk is not _STOP]
+            self._file.write(''.join(text for text, _ in chunks))
+            self._file.flush()
+            self.written += sum(count for _, count in chunks)
+            if len(chunks) != len(batch):
+                return
+
+    def _finish(self, name: str, events: List[Tuple[str, Event]], started: float, missing: Optional[str],
+                error: Optional[BaseException] = None) -> None:
+        duration = round(self._clock() - started, 3)
+        if error is not None:
+            outcome = Event(REPO, name, action='failed', duration=duration, error=f'{type(error).__name__}: {error}')
+        elif missing is None:
+            outcome = Event(REPO, name, action='skipped', duration=duration)
+        else:
+            outcome = Event(REPO, name, action='assessed', duration=duration,
+                            missing=[rule for rule in missing.split(',') if rule])
+        print(render(_entry(outcome)))
+        if self.path is None:
+            return
+        # serialised here rather than on the writer, and queued as one chunk so repos run at once are not interleaved
+        lines = [_line(at, event) for at, event in events] + [_line(_now(), outcome)]
+        self._queue.put((''.join(lines), len(lines)))
+
+    def started(self, item: Any) -> None:
+        # an asyncio task has a context of its own, and the threads it hands blocking calls to start from a copy of it,
+        # so they emit to the same events
+        _current.set([])
+        _started.set(self._clock())
+
+    def finished(self, item: Any, missing: Optional[str], error: Optional[BaseException]) -> None:
+        events = _current.get()
+        _current.set(None)
+        self._finish(item.name, events, _started.get(), missing, error)
+
+    def close(self) -> None:
+        """
+        Waits for every event to be written, then closes the log.
+        """
+        if self.path is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._file.close()
+
+    def report(self) -> str:
+        return f'Events: {self.written} written to {self.path}'
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    The events in a log, oldest first. A last line that was only partly written (the run was killed) is left out.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if line.endswith('\n'):
+                    raise ValueError(f'{path} is not an event log, line {number} is not JSON')
+
+
+def render(event: Dict[str, Any]) -> str:
+    """
+    One event as a line for people to read, starting with its time when it has one.
+    """
+    where = f'{event["repo"]}:{event["branch"]}' if event.get('branch') else event['repo']
+    if 'time' in event:
+        where = f'{event["time"]} {where}'
+    if event['type'] == FINDING:
+        return (f'{where} {event["rule"]} is {event.get("actual")}, expected {event.get("expected")} '
+                f'({event.get("action")})')
+    if event['type'] == NOTE:
+        return f'{where} {event["message"]}'
+    details = ''
+    if event.get('missing'):
+        details = f' - missing {",".join(event["missing"])}'
+    elif event.get('error'):
+        details = f' - {event["error"]}'
+    duration = f' in {event["duration"]:.2f}s' if event.get('duration') is not None else ''
+    return f'{where} {event.get("action")}{duration}{details}'
@@ -0,0 +1,187 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from github import GithubException
+from github.Organization import Organization
+from github.Requester import Requester
+
+from github_standards.properties import CustomPropertyIndex
+
+# One page of repositories per query, including everything the standards compare against. 100 is the largest page
+# GitHub allows; the nested fields are all single objects so the query stays well within the node limit.
+ORG_REPOSITORIES_QUERY = '''
+query($org: String!, $cursor: String) {
+  organization(login: $org) {
+    repositories(first: 100, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        updatedAt
+        pushedAt
+        autoMergeAllowed
+        mergeCommitAllowed
+        rebaseMergeAllowed
+        squashMergeAllowed
+        allowUpdateBranch
+        deleteBranchOnMerge
+        hasDiscussionsEnabled
+        hasIssuesEnabled
+        hasProjectsEnabled
+        hasWikiEnabled
+        webCommitSignoffRequired
+        defaultBranchRef {
+          name
+          branchProtectionRule {
+            allowsDeletions
+            allowsForcePushes
+            requiresApprovingReviews
+            requiresCodeOwnerReviews
+            requiredApprovingReviewCount
+            requiresCommitSignatures
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+# GraphQL field -> the REST (PyGithub) attribute name the standards are expressed in
+_REPOSITORY_FIELDS = {
+    'autoMergeAllowed': 'allow_auto_merge',
+    'mergeCommitAllowed': 'allow_merge_commit',
+    'rebaseMergeAllowed': 'allow_rebase_merge',
+    'squashMergeAllowed': 'allow_squash_merge',
+    'allowUpdateBranch': 'allow_update_branch',
+    'deleteBranchOnMerge': 'delete_branch_on_merge',
+    'hasDiscussionsEnabled': 'has_discussions',
+    'hasIssuesEnabled': 'has_issues',
+    'hasProjectsEnabled': 'has_projects',
+    'hasWikiEnabled': 'has_wiki',
+    'webCommitSignoffRequired': 'web_commit_signoff_required',
+}
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class BulkRequiredPullRequestReviews:
+    def __init__(self, rule: Dict[str, Any]) -> None:
+        self.require_code_owner_reviews: bool = rule['requiresCodeOwnerReviews']
+        self.required_approving_review_count: int = rule['requiredApprovingReviewCount'] or 0
+
+
+def _reviews(rule: Optional[Dict[str, Any]]) -> Optional[BulkRequiredPullRequestReviews]:
+    # REST leaves the reviews out of the protection when they are not required, so they are None here too
+    if rule is None or not rule['requiresApprovingReviews']:
+        return None
+    return BulkRequiredPullRequestReviews(rule)
+
+
+def _not_found(message: str) -> GithubException:
+    # mirror the 404 GitHub returns for a part of branch protection that is not enabled
+    return GithubException(status=404, data={'message': message})
+
+
+class BulkBranchProtection:
+    def __init__(self, rule: Dict[str, Any]) -> None:
+        self.allow_deletions: bool = rule['allowsDeletions']
+        self.allow_force_pushes: bool = rule['allowsForcePushes']
+        self.required_pull_request_reviews: Optional[BulkRequiredPullRequestReviews] = _reviews(rule)
+        # only the part of the REST response the standards read that PyGithub has no attribute for
+        self.raw_data: Dict[str, Any] = {'required_signatures': {'enabled': rule['requiresCommitSignatures']}}
+
+
+class BulkBranch:
+    """
+    Read-only stand-in for a PyGithub `Branch`, answered from the bulk query rather than per-branch REST calls.
+    """
+
+    def __init__(self, name: str, rule: Optional[Dict[str, Any]]) -> None:
+        self.name = name
+        self._rule = rule
+
+    def __repr__(self) -> str:
+        return f'Branch(name="{self.name}")'
+
+    def get_protection(self) -> BulkBranchProtection:
+        if self._rule is None:
+            raise _not_found('Branch not protected')
+        return BulkBranchProtection(self._rule)
+
+    def get_required_pull_request_reviews(self) -> BulkRequiredPullRequestReviews:
+        reviews = _reviews(self._rule)
+        if reviews is None:
+            raise _not_found('Required pull request reviews not enabled')
+        return reviews
+
+    def get_required_signatures(self) -> bool:
+        if self._rule is None:
+            raise _not_found('Branch not protected')
+        return self._rule['requiresCommitSignatures']
+
+
+class BulkRepository:
+    """
+    Read-only stand-in for a PyGithub `Repository` built from one node of the bulk query. It carries the same attribute
+    names as `Repository` so the standards checks can run against it unchanged, but has no way to make changes. The
+    protected branches matching the policy's branch patterns are not part of the query, so it also carries what
+    `list_protected_branches` needs to list them over REST.
+    """
+
+    def __init__(self, node: Dict[str, Any], custom_properties: Dict[str, Any], requester: Requester,
+                 url: str) -> None:
+        self.name: str = node['name']
+        self._requester = requester
+        self.url = url
+        self.updated_at = _datetime(node.get('updatedAt'))
+        self.pushed_at = _datetime(node.get('pushedAt'))
+        self.custom_properties = custom_properties
+        for field, attribute in _REPOSITORY_FIELDS.items():
+            setattr(self, attribute, node[field])
+
+        default_branch_ref = node['defaultBranchRef'] or {}
+        self.default_branch: Optional[str] = default_branch_ref.get('name')
+        self._default_branch_rule: Optional[Dict[str, Any]] = default_branch_ref.get('branchProtectionRule')
+
+    def get_branch(self, branch: str) -> Optional[BulkBranch]:
+        # the bulk query only looks at the default branch
+        if branch != self.default_branch:
+            return None
+        return BulkBranch(branch, self._default_branch_rule)
+
+
+def get_org_repositories(gh_org: Organization, properties: CustomPropertyIndex) -> Iterator[BulkRepository]:
+    """
+    Yields every repository in the organisation with its settings and default branch protection, using one GraphQL
+    query per 100 repositories.
+    """
+    cursor = None
+    while True:
+        _, data = gh_org._requester.graphql_query(ORG_REPOSITORIES_QUERY, {'org': gh_org.login, 'cursor': cursor})
+        repositories = data['data']['organization']['repositories']
+        for node in repositories['nodes']:
+            url = f'{gh_org._requester.base_url}/repos/{gh_org.login}/{node["name"]}'
+            yield BulkRepository(node, properties.properties_for(node['name']), gh_org._requester, url)
+
+        if not repositories['pageInfo']['hasNextPage']:
+            break
+        cursor = repositories['pageInfo']['endCursor']
@@ -0,0 +1,220 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from github_standards.runner import Tracker
+
+# runs, assessments and violations are the raw results of every run. streaks (one row for each time a repo stopped
+# meeting a rule, closed when it met it again) and the totals on runs are derived from them as each run is saved, so
+# that the questions asked of the history are answered from an index rather than by replaying every run. branch is the
+# protected branch a rule was checked on, or '' for the repository itself and its default branch.
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    org TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    command TEXT NOT NULL,
+    dry_run INTEGER NOT NULL,
+    shard TEXT,
+    assessed INTEGER NOT NULL,
+    out_of_standards INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assessments (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    repo TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (run_id, repo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS violations (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    PRIMARY KEY (run_id, repo, branch, rule)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS violations_by_rule ON violations (rule, run_id);
+CREATE TABLE IF NOT EXISTS streaks (
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    opened_run INTEGER NOT NULL REFERENCES runs (id),
+    opened_at TEXT NOT NULL,
+    closed_run INTEGER REFERENCES runs (id),
+    closed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS streaks_open ON streaks (rule, opened_at) WHERE closed_run IS NULL;
+CREATE INDEX IF NOT EXISTS streaks_open_by_repo ON streaks (org, repo) WHERE closed_run IS NULL;
+CREATE INDEX IF NOT EXISTS streaks_opened ON streaks (opened_run);
+CREATE INDEX IF NOT EXISTS streaks_closed ON streaks (closed_run);
+CREATE INDEX IF NOT EXISTS streaks_opened_at ON streaks (opened_at, rule);
+CREATE INDEX IF NOT EXISTS streaks_closed_at ON streaks (closed_at, rule);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+'''
+
+
+@dataclass(frozen=True, slots=True)
+class RuleDrift:
+    rule: str
+    open: int
+    drifted: int
+    fixed: int
+    assessments: int
+
+    @property
+    def rate(self) -> float:
+        # how often an assessment found a repo newly out of standards on this rule
+        return self.drifted / self.assessments if self.assessments else 0.0
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat(timespec='seconds')
+
+
+def _violations(missing: str) -> Set[Tuple[str, str]]:
+    # what a repo action returns, e.g. 'has_wiki,release/1.0:allow_force_pushes', as (branch, rule). Branch names
+    # cannot contain a colon.
+    return {(branch, rule) for branch, _, rule in (entry.rpartition(':') for entry in missing.split(',') if entry)}
+
+
+class History(Tracker):
+    """
+    The per-repo, per-rule results of every run, kept in a local SQLite database that can be queried long after the
+    run's logs have gone. The results of a run are collected as it goes (as a Tracker) and saved together at the end in
+    one transaction. Several orgs, or several shards of one, can share a database.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)) -> None:
+        self.path = path
+        self._clock = clock
+        self.started_at = _timestamp(clock())
+        self._outcomes: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        # a generous timeout, as the orgs of a multi-org run save their results at about the same time
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    # Recording a run
+
+    def record(self, name: str, missing: Optional[str], failed: bool = False) -> None:
+        status = 'failed' if failed else 'skipped' if missing is None else 'assessed'
+        with self._lock:
+            self._outcomes[name] = (status, missing)
+
+    def finished(self, item: Any, missing: Optional[str], error: Optional[BaseException]) -> None:
+        self.record(item.name, missing, failed=error is not None)
+
+    def save_run(self, org: str, command: str, dry_run: bool, shard: Optional[str] = None) -> int:
+        """
+        Saves the recorded results as a run and brings the streaks up to date, returning the run's id. Unless this was
+        a dry run what was found missing has been put right, so those streaks end with this run too.
+        """
+        with self._lock:
+            outcomes = dict(self._outcomes)
+        saved_at = _timestamp(self._clock())
+        violated = {name: _violations(missing) for name, (status, missing) in outcomes.items() if status == 'assessed'}
+
+        with self._connection:
+            run_id = self._connection.execute(
+                'INSERT INTO runs (org, started_at, command, dry_run, shard, assessed, out_of_standards) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (org, self.started_at, command, int(dry_run), shard, len(violated),
+                 sum(1 for rules in violated.values() if rules))).lastrowid
+            self._connection.executemany('INSERT INTO assessments (run_id, repo, status) VALUES (?, ?, ?)',
+                                         [(run_id, name, status) for name, (status, _) in sorted(outcomes.items())])
+            self._connection.executemany('INSERT INTO violations (run_id, repo, branch, rule) VALUES (?, ?, ?, ?)',
+                                         [(run_id, name, branch, rule) for name, rules in sorted(violated.items())
+                                          for branch, rule in sorted(rules)])
+
+            open_streaks = set(self._connection.execute(
+                'SELECT repo, branch, rule FROM streaks WHERE org = ? AND closed_run IS NULL', (org,)))
+            opened = [(name, branch, rule) for name, rules in violated.items() for branch, rule in rules
+                      if (name, branch, rule) not in open_streaks]
+            self._connection.executemany(
+                'INSERT INTO streaks (org, repo, branch, rule, opened_run, opened_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(org, name, branch, rule, run_id, self.started_at) for name, branch, rule in sorted(opened)])
+            # only repos assessed in this run say anything about their streaks, the rest are left open
+            closed = [(name, branch, rule) for name, branch, rule in open_streaks | set(opened)
+                      if name in violated and ((branch, rule) not in violated[name] or not dry_run)]
+            self._connection.executemany(
+                'UPDATE streaks SET closed_run = ?, closed_at = ? '
+                'WHERE org = ? AND repo = ? AND branch = ? AND rule = ? AND closed_run IS NULL',
+                [(run_id, saved_at, org, name, branch, rule) for name, branch, rule in sorted(closed)])
+        return run_id
+
+    # Queries
+
+    def runs(self, limit: int = 10, org: Optional[str] = None) -> List[Tuple]:
+        """
+        The most recent runs, newest first: (id, started_at, org, command, dry_run, shard, assessed, out of standards).
+        """
+        return self._connection.execute(
+            'SELECT id, started_at, org, command, dry_run, shard, assessed, out_of_standards '
+            'FROM runs WHERE ? IS NULL OR org = ? ORDER BY id DESC LIMIT ?', (org, org, limit)).fetchall()
+
+    def out_of_standards(self, rule: str, days: float = 0,
+                         org: Optional[str] = None) -> List[Tuple[str, str, str, str, int]]:
+        """
+        The repos (and protected branches) that have not met `rule` for at least `days`, longest first: (org, repo,
+        branch, since, run it was found).
+        """
+        before = _timestamp(self._clock() - timedelta(days=days))
+        return self._connection.execute(
+            'SELECT org, repo, branch, opened_at, opened_run FROM streaks '
+            'WHERE rule = ? AND closed_run IS NULL AND opened_at <= ? AND (? IS NULL OR org = ?) '
+            'ORDER BY opened_at, org, repo, branch', (rule, before, org, org)).fetchall()
+
+    def drift(self, days: float, org: Optional[str] = None, rules: Iterable[str] = ()) -> List[RuleDrift]:
+        """
+        For each rule: how many repos do not meet it now, and how many stopped meeting it (drifted) and started meeting
+        it again (fixed) in the last `days`, out of how many assessments. `rules` (CompiledPolicy.rules) are listed even
+        if they were never out of standards.
+        """
+        since = _timestamp(self._clock() - timedelta(days=days))
+        assessments = self._connection.execute(
+            'SELECT COALESCE(SUM(assessed), 0) FROM runs WHERE started_at >= ? AND (? IS NULL OR org = ?)',
+            (since, org, org)).fetchone()[0]
+        counts = {rule: [0, 0, 0] for rule in rules}
+        for column, query, parameters in [
+                (0, 'closed_run IS NULL', ()),
+                (1, 'opened_at >= ?', (since,)),
+                (2, 'closed_at >= ?', (since,))]:
+            for rule, count in self._connection.execute(
+                    f'SELECT rule, COUNT(*) FROM streaks WHERE {query} AND (? IS NULL OR org = ?) GROUP BY rule',
+                    (*parameters, org, org)):
+                counts.setdefault(rule, [0, 0, 0])[column] = count
+        return [RuleDrift(rule, *values, assessments) for rule, values in counts.items()]
+
+    def changes_since(self, run_id: int, org: Optional[str] = None) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        What drifted and what was fixed in the runs after `run_id`: two lists of (org, repo, branch, rule, run).
+        """
+        drifted = self._connection.execute(
+            'SELECT org, repo, branch, rule, opened_run FROM streaks WHERE opened_run > ? AND (? IS NULL OR org = ?) '
+            'ORDER BY org, repo, branch, rule', (run_id, org, org)).fetchall()
+        fixed = self._connection.execute(
+            'SELECT org, repo, branch, rule, closed_run FROM streaks WHERE closed_run > ? AND (? IS NULL OR org = ?) '
+            'ORDER BY org, repo, branch, rule', (run_id, org, org)).fetchall()
+        return drifted, fixed
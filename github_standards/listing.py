@@ -0,0 +1,159 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import fnmatch
+import threading
+from dataclasses import dataclass
+from queue import Full, Queue
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, TypeVar
+
+from github.Branch import Branch
+from github.Organization import Organization
+from github.PaginatedList import PaginatedList
+from github.Repository import Repository
+
+T = TypeVar('T')
+
+# GitHub's largest page size, used for every paginated listing
+PAGE_SIZE = 100
+
+# The search API returns at most this many results for a query, however many pages are asked for
+SEARCH_RESULT_LIMIT = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class RepoFilter:
+    """
+    Which of the org's repositories to look at. Topics, visibility and archived are narrowed by the server where the
+    search API can be used (see `list_org_repositories`); the name pattern is matched here, as the search API matches
+    names by word rather than by pattern. `matches` applies all of them, so the result is the same either way.
+    """
+    topics: Tuple[str, ...] = ()
+    visibility: Optional[str] = None
+    exclude_archived: bool = False
+    name_pattern: Optional[str] = None
+
+    @property
+    def narrows_server_side(self) -> bool:
+        return bool(self.topics or self.visibility or self.exclude_archived)
+
+    def search_query(self, org_name: str) -> str:
+        # forks are left out of search results unless asked for, the org listing includes them
+        qualifiers = [f'org:{org_name}', 'fork:true'] + [f'topic:{topic}' for topic in self.topics]
+        if self.visibility:
+            qualifiers.append(f'is:{self.visibility}')
+        if self.exclude_archived:
+            qualifiers.append('archived:false')
+        return ' '.join(qualifiers)
+
+    def matches(self, repo: Repository) -> bool:
+        if self.name_pattern and not fnmatch.fnmatchcase(repo.name, self.name_pattern):
+            return False
+        if self.topics and not set(self.topics) <= set(repo.topics or []):
+            return False
+        if self.visibility and repo.visibility != self.visibility:
+            return False
+        return not (self.exclude_archived and repo.archived)
+
+
+def search_org_repositories(gh_org: Organization, repo_filter: RepoFilter) -> Optional[Iterable[Repository]]:
+    """
+    The org's repositories that `repo_filter` narrows the search to, or None when the search finds more than the search
+    API will return (or it timed out) and so cannot be relied on to find them all.
+    """
+    requester = gh_org._requester
+    query = repo_filter.search_query(gh_org.login)
+    parameters = {'q': query, 'per_page': PAGE_SIZE}
+    headers, data = requester.requestJsonAndCheck('GET', '/search/repositories', parameters=parameters)
+    if data['total_count'] > SEARCH_RESULT_LIMIT or data.get('incomplete_results'):
+        print(f'Searching for "{query}" finds {data["total_count"]} repositories, more than the search API can return '
+              f'- listing every repository instead')
+        return None
+    return PaginatedList(Repository, requester, '/search/repositories', parameters, firstData=data,
+                         firstHeaders=headers)
+
+
+def list_org_repositories(gh_org: Organization, repo_filter: RepoFilter = RepoFilter()) -> Iterator[Repository]:
+    """
+    The org's repositories that `repo_filter` matches, found with the search API when that narrows the listing down on
+    the server, otherwise by listing every repository.
+    """
+    repos = search_org_repositories(gh_org, repo_filter) if repo_filter.narrows_server_side else None
+    if repos is None:
+        repos = gh_org.get_repos()
+    return (repo for repo in repos if repo_filter.matches(repo))
+
+
+def list_protected_branches(repo: Repository, patterns: Sequence[str]) -> Iterator[Branch]:
+    """
+    The repository's protected branches whose names match one of `patterns` (e.g. "release/*"), other than the default
+    branch. The listing is narrowed to protected branches by the server and walked a page at a time without keeping
+    the pages already seen, so a repository with thousands of branches takes no more memory than one with ten. Each
+    branch comes from the listing as it is, with no request of its own.
+    """
+    # PaginatedList keeps every element it has iterated over, so its pages are fetched one by one instead
+    branches = PaginatedList(Branch, repo._requester, f'{repo.url}/branches',
+                             {'protected': 'true', 'per_page': PAGE_SIZE})
+    while branches._couldGrow():
+        for branch in branches._fetchNextPage():
+            if branch.name != repo.default_branch and any(fnmatch.fnmatchcase(branch.name, pattern)
+                                                          for pattern in patterns):
+                yield branch
+
+
+_END = object()
+
+
+def prefetch(items: Iterable[T], buffer: int = PAGE_SIZE) -> Iterator[T]:
+    """
+    Iterates `items` on a background thread, up to `buffer` items ahead of the caller. With a paginated listing (and a
+    buffer of at least a page) the next page is fetched while the current one is being worked on, rather than once it
+    is finished with. An error while iterating is raised to the caller when it gets that far.
+    """
+    queue: Queue = Queue(maxsize=buffer)
+    stopped = threading.Event()
+
+    def put(entry: Tuple[object, Optional[BaseException]]) -> bool:
+        # gives up once the caller has stopped iterating, so the thread does not wait on a queue nobody reads
+        while not stopped.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as e:
+            put((_END, e))
+
+    threading.Thread(target=produce, name='github-standards-listing', daemon=True).start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -0,0 +1,242 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from requests import PreparedRequest, Response
+
+from github_standards.transport import Send
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that name a particular org, repo or branch, replaced by placeholders so that requests to the same API
+# endpoint are counted together
+_ENDPOINT_PLACEHOLDERS = [
+    (re.compile(r'/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'/orgs/[^/]+'), '/orgs/{org}'),
+    # a branch name can contain slashes (release/1.0), so it runs up to the endpoints under a branch or the end
+    (re.compile(r'/branches/.+?(?=/protection(?:/|$)|/rename$|$)'), '/branches/{branch}'),
+]
+
+_REPO_PATH = re.compile(r'/repos/[^/]+/([^/]+)')
+
+
+def endpoint_template(url: str) -> str:
+    """
+    The API endpoint `url` is a request to, as it appears in GitHub's REST documentation, e.g.
+    `/repos/{owner}/{repo}/branches/{branch}/protection`.
+    """
+    path = urlparse(url).path
+    for pattern, placeholder in _ENDPOINT_PLACEHOLDERS:
+        path = pattern.sub(placeholder, path)
+    return path
+
+
+def repo_of(url: str) -> Optional[str]:
+    match = _REPO_PATH.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.rate_limit_cost = 0
+        self.statuses: Dict[str, int] = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, status: str, seconds: float, size: int, cost: int) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.bytes += size
+        self.rate_limit_cost += cost
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self, latency_buckets: bool = True) -> Dict[str, Any]:
+        data = {'requests': self.count, 'seconds': round(self.seconds, 6), 'bytes': self.bytes,
+                'rate_limit_cost': self.rate_limit_cost, 'statuses': dict(sorted(self.statuses.items()))}
+        if latency_buckets:
+            data['latency_buckets'] = {str(bound): count for bound, count in
+                                       zip(list(LATENCY_BUCKETS) + ['+Inf'], self.buckets)}
+        return data
+
+
+def _prometheus_labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """
+    Transport middleware that records every request that goes over the wire: the endpoint it was for, its status,
+    latency, response size and what it cost against the rate limit. It is installed after the rate limit scheduler,
+    so each retry is a request of its own and time spent waiting for the rate limit is not counted as latency.
+
+    The rate limit cost is 0 for a `304 Not Modified` (GitHub does not charge for them), the increase in used points
+    for a GraphQL query and 1 for anything else. Each credential has a GraphQL rate limit of its own, so the points used
+    are followed per credential, named by `credential_of` (CredentialPool.credential_of).
+    """
+
+    def __init__(self, per_repo: bool = False, clock: Callable[[], float] = time.perf_counter,
+                 credential_of: Callable[[PreparedRequest], Optional[str]] = lambda request: None) -> None:
+        self.per_repo = per_repo
+        self._clock = clock
+        self._credential_of = credential_of
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], _Stats] = {}
+        self._repos: Dict[str, _Stats] = {}
+        self._graphql_used: Dict[Optional[str], int] = {}
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        start = self._clock()
+        try:
+            response = send(request)
+        except Exception:
+            self._record(request, 'error', self._clock() - start, 0, 0)
+            raise
+        seconds = self._clock() - start
+        self._record(request, str(response.status_code), seconds, len(response.content or b''),
+                     self._rate_limit_cost(request, response))
+        return response
+
+    def _rate_limit_cost(self, request: PreparedRequest, response: Response) -> int:
+        if response.status_code == 304:
+            return 0
+        if response.headers.get('X-RateLimit-Resource') != 'graphql' or 'X-RateLimit-Used' not in response.headers:
+            return 1
+        used = int(response.headers['X-RateLimit-Used'])
+        credential = self._credential_of(request)
+        with self._lock:
+            previous = self._graphql_used.get(credential)
+            self._graphql_used[credential] = used
+        # the first query with a credential (or the first after its limit reset) is charged at least a point
+        return used - previous if previous is not None and used > previous else 1
+
+    def _record(self, request: PreparedRequest, status: str, seconds: float, size: int, cost: int) -> None:
+        key = (request.method, endpoint_template(request.url))
+        repo = repo_of(request.url) if self.per_repo else None
+        with self._lock:
+            self._endpoints.setdefault(key, _Stats()).add(status, seconds, size, cost)
+            if repo is not None:
+                self._repos.setdefault(repo, _Stats()).add(status, seconds, size, cost)
+
+    @property
+    def requests(self) -> int:
+        with self._lock:
+            return sum(stats.count for stats in self._endpoints.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {'requests': sum(stats.count for stats in self._endpoints.values()),
+                    'seconds': round(sum(stats.seconds for stats in self._endpoints.values()), 6),
+                    'endpoints': [dict(method=method, endpoint=endpoint, **stats.to_dict())
+                                  for (method, endpoint), stats in sorted(self._endpoints.items())]}
+            if self.per_repo:
+                data['repos'] = {repo: stats.to_dict(latency_buckets=False)
+                                 for repo, stats in sorted(self._repos.items())}
+            return data
+
+    def save_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def prometheus(self) -> str:
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f'# HELP github_standards_{name} {help_text}')
+            lines.append(f'# TYPE github_standards_{name} {kind}')
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            repos = sorted(self._repos.items())
+
+        metric('requests_total', 'counter', 'GitHub API requests made, by endpoint and response status.')
+        for (method, endpoint), stats in endpoints:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'github_standards_requests_total'
+                             f'{_prometheus_labels(method=method, endpoint=endpoint, status=status)} {count}')
+
+        metric('request_duration_seconds', 'histogram', 'GitHub API request latency, by endpoint.')
+        for (method, endpoint), stats in endpoints:
+            cumulative = 0
+            for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], stats.buckets):
+                cumulative += count
+                labels = _prometheus_labels(method=method, endpoint=endpoint, le=str(bound))
+                lines.append(f'github_standards_request_duration_seconds_bucket{labels} {cumulative}')
+            labels = _prometheus_labels(method=method, endpoint=endpoint)
+            lines.append(f'github_standards_request_duration_seconds_sum{labels} {stats.seconds:.6f}')
+            lines.append(f'github_standards_request_duration_seconds_count{labels} {stats.count}')
+
+        metric('response_bytes_total', 'counter', 'Bytes received from the GitHub API, by endpoint.')
+        for (method, endpoint), stats in endpoints:
+            lines.append(f'github_standards_response_bytes_total'
+                         f'{_prometheus_labels(method=method, endpoint=endpoint)} {stats.bytes}')
+
+        metric('rate_limit_cost_total', 'counter', 'GitHub API rate limit points used, by endpoint.')
+        for (method, endpoint), stats in endpoints:
+            lines.append(f'github_standards_rate_limit_cost_total'
+                         f'{_prometheus_labels(method=method, endpoint=endpoint)} {stats.rate_limit_cost}')
+
+        if self.per_repo:
+            metric('repo_requests_total', 'counter', 'GitHub API requests made, by repository.')
+            for repo, stats in repos:
+                lines.append(f'github_standards_repo_requests_total{_prometheus_labels(repo=repo)} {stats.count}')
+            metric('repo_request_duration_seconds_total', 'counter', 'Time spent on GitHub API requests, by repository.')
+            for repo, stats in repos:
+                lines.append(f'github_standards_repo_request_duration_seconds_total{_prometheus_labels(repo=repo)} '
+                             f'{stats.seconds:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def save_prometheus(self, path: str) -> None:
+        # node_exporter's textfile collector may read the file at any time, so it is replaced in one go
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(temporary, path)
+
+    def report(self, top: int = 5) -> str:
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: item[1].seconds, reverse=True)
+            repos = sorted(self._repos.items(), key=lambda item: item[1].seconds, reverse=True)
+        requests = sum(stats.count for _, stats in endpoints)
+        seconds = sum(stats.seconds for _, stats in endpoints)
+        size = sum(stats.bytes for _, stats in endpoints)
+        lines = [f'API calls: {requests} requests, {seconds:.1f}s, {size / (1024 * 1024):.1f} MB received']
+        for (method, endpoint), stats in endpoints[:top]:
+            lines.append(f'    {method} {endpoint}: {stats.count} requests, {stats.seconds:.1f}s')
+        if repos:
+            lines.append(f'    Most expensive repos:')
+            for repo, stats in repos[:top]:
+                lines.append(f'        {repo}: {stats.count} requests, {stats.seconds:.1f}s')
+        return '\n'.join(lines)
@@ -0,0 +1,194 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from github.Organization import Organization
+
+from github_standards.events import note
+from github_standards.snapshot import BranchSnapshot, RepoSnapshot, fetch_branch_snapshot, fetch_repo_snapshot
+from github_standards.standards import DEFAULT_POLICY, CheckResult, Finding, Policy, \
+    apply_branch_protection_standards, apply_repo_standards, apply_required_signatures, emit_findings, \
+    branch_protection_not_as_per_standards, pull_request_reviews_not_as_per_standards, repo_props_not_as_per_standards
+
+# version 2 plans carry the values to write, as the policy they were made with may differ from repo to repo
+PLAN_VERSION = 2
+
+EDIT_REPO = 'edit_repo'
+EDIT_BRANCH_PROTECTION = 'edit_branch_protection'
+ADD_REQUIRED_SIGNATURES = 'add_required_signatures'
+
+Change = Dict[str, Any]
+
+
+class StalePlanError(Exception):
+    """
+    Raised when a repository no longer looks the way it did when the plan was made, so the planned changes may no
+    longer be right.
+    """
+
+
+def plan_repo_changes(repo_snapshot: RepoSnapshot, branch_snapshot: Optional[BranchSnapshot],
+                      policy: Policy = DEFAULT_POLICY) -> List[Change]:
+    """
+    The writes needed to bring a repository (and its default branch) to standards, with the values that were seen so
+    they can be re-checked before the writes are made, and the values that will be written.
+    """
+    changes: List[Change] = []
+
+    missing = repo_props_not_as_per_standards(repo_snapshot, policy)
+    if missing:
+        changes.append({
+            'action': EDIT_REPO,
+            'actual': {prop: getattr(repo_snapshot, prop) for prop in missing},
+            'expected': {prop: policy.repo_properties[prop] for prop in missing},
+            'write': dict(policy.repo_properties),
+        })
+
+    if branch_snapshot is not None:
+        changes.extend(plan_branch_changes(branch_snapshot, policy))
+
+    return changes
+
+
+def plan_branch_changes(branch_snapshot: BranchSnapshot, policy: Policy = DEFAULT_POLICY) -> List[Change]:
+    """
+    The writes needed to bring one branch to standards.
+    """
+    changes: List[Change] = []
+
+    missing = branch_protection_not_as_per_standards(branch_snapshot, policy) + \
+        pull_request_reviews_not_as_per_standards(branch_snapshot, policy)
+    if not branch_snapshot.protected or missing:
+        standards = {**policy.branch_protection, **policy.pull_request_reviews}
+        changes.append({
+            'action': EDIT_BRANCH_PROTECTION,
+            'branch': branch_snapshot.name,
+            'protected': branch_snapshot.protected,
+            'actual': {prop: getattr(branch_snapshot, prop) for prop in missing},
+            'expected': {prop: standards[prop] for prop in missing},
+            'write': standards,
+        })
+    if policy.required_signatures and not branch_snapshot.required_signatures:
+        changes.append({'action': ADD_REQUIRED_SIGNATURES, 'branch': branch_snapshot.name})
+
+    return changes
+
+
+def _still_as_planned(change: Change, snapshot: Any) -> bool:
+    if change['action'] == ADD_REQUIRED_SIGNATURES:
+        return not snapshot.required_signatures
+    if change['action'] == EDIT_BRANCH_PROTECTION and snapshot.protected != change['protected']:
+        return False
+    return all(getattr(snapshot, prop) == val for prop, val in change['actual'].items())
+
+
+def _findings(change: Change) -> CheckResult:
+    # what a change puts right, as the findings a review would have emitted for it
+    if change['action'] == ADD_REQUIRED_SIGNATURES:
+        return CheckResult((Finding('required_signatures', True, False),), applied=True)
+    findings = [Finding(prop, change['expected'][prop], val) for prop, val in change['actual'].items()]
+    if change['action'] == EDIT_BRANCH_PROTECTION and not change['protected']:
+        findings.insert(0, Finding('protected', True, False))
+    return CheckResult(tuple(findings), applied=True)
+
+
+class RepoPlan:
+    def __init__(self, name: str, changes: List[Change]) -> None:
+        self.name = name
+        self.changes = changes
+
+
+class Plan:
+    """
+    The changes needed across an organisation, keyed by repository. Saved as JSON so it can be reviewed before it is
+    applied.
+    """
+
+    def __init__(self, org: str, repos: Optional[Dict[str, List[Change]]] = None,
+                 created_at: Optional[str] = None) -> None:
+        self.org = org
+        self.repos = repos if repos is not None else {}
+        self.created_at = created_at
+        self._lock = threading.Lock()
+
+    def add(self, repo_name: str, changes: List[Change]) -> None:
+        if changes:
+            with self._lock:
+                self.repos.setdefault(repo_name, []).extend(changes)
+
+    def repo_plans(self) -> List[RepoPlan]:
+        return [RepoPlan(name, changes) for name, changes in sorted(self.repos.items())]
+
+    def save(self, path: str) -> None:
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PLAN_VERSION, 'org': self.org, 'created_at': self.created_at,
+                       'repos': dict(sorted(self.repos.items()))}, f, indent=2)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path: str) -> 'Plan':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != PLAN_VERSION:
+            raise ValueError(f'{path} is a version {data.get("version")} plan, expected version {PLAN_VERSION}')
+        return cls(data['org'], data['repos'], data.get('created_at'))
+
+
+def apply_repo_plan(gh_org: Organization, repo_plan: RepoPlan) -> str:
+    """
+    Makes the planned writes for one repository. Each change is first re-checked against what the repository looks
+    like now and skipped if it no longer matches what was planned, in which case StalePlanError is raised once the
+    remaining changes have been made.
+    """
+    repo = gh_org.get_repo(repo_plan.name)
+    branches = {}
+    applied = []
+    stale = []
+
+    for change in repo_plan.changes:
+        if change['action'] == EDIT_REPO:
+            snapshot = fetch_repo_snapshot(repo)
+        else:
+            if change['branch'] not in branches:
+                branch = repo.get_branch(change['branch'])
+                branches[change['branch']] = (branch, fetch_branch_snapshot(branch))
+            branch, snapshot = branches[change['branch']]
+
+        if not _still_as_planned(change, snapshot):
+            note(repo.name, f'{change["action"]} skipped as it has changed since the plan was made',
+                 change.get('branch'))
+            stale.append(change['action'])
+            continue
+
+        if change['action'] == EDIT_REPO:
+            apply_repo_standards(repo, change['write'])
+        elif change['action'] == EDIT_BRANCH_PROTECTION:
+            # the settings the standards do not cover are written as they are now, not as they were when planned
+            apply_branch_protection_standards(branch, {**snapshot.settings, **change['write']})
+        elif change['action'] == ADD_REQUIRED_SIGNATURES:
+            apply_required_signatures(branch)
+        emit_findings(repo.name, _findings(change), change.get('branch'))
+        applied.extend(change.get('actual') or [change['action']])
+
+    if stale:
+        raise StalePlanError(f'{", ".join(stale)} no longer as planned, plan again')
+    return ','.join(applied)
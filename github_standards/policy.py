@@ -0,0 +1,259 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import json
+import tomllib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from github_standards.snapshot import REPO_SETTINGS
+from github_standards.standards import STANDARD_BRANCH_PROTECTION, STANDARD_PULL_REQUEST_REVIEWS, \
+    STANDARD_REPO_PROPERTIES, Policy
+
+EXCLUDED_REPO_NAMES = ['.github']
+
+# Section of a policy file -> the settings it can hold and the type of each
+SECTIONS: Dict[str, Dict[str, type]] = {
+    'repository': {setting: bool for setting in REPO_SETTINGS},
+    'branch_protection': {'allow_deletions': bool, 'allow_force_pushes': bool, 'required_signatures': bool},
+    'pull_request_reviews': {'require_code_owner_reviews': bool, 'required_approving_review_count': int},
+}
+
+_BRANCH_SECTIONS = ('branch_protection', 'pull_request_reviews')
+
+
+@dataclass(frozen=True, slots=True)
+class Override:
+    """
+    Changes to the standards for repositories whose custom properties match every entry of `when` (a property and the
+    values it may have). The settings in `sections` are added to or replace the standard ones, and the `ignore`d
+    settings (or whole sections) are not checked at all. `branches`, when given, replaces the branch patterns.
+    """
+    when: Mapping[str, Tuple[str, ...]]
+    sections: Mapping[str, Mapping[str, Any]]
+    ignore: Tuple[str, ...] = ()
+    branches: Optional[Tuple[str, ...]] = None
+
+    def matches(self, custom_properties: Mapping[str, Any]) -> bool:
+        for name, values in self.when.items():
+            value = custom_properties.get(name)
+            # multi select properties have a list of values, any of which can match
+            actual = value if isinstance(value, list) else [value]
+            if not any(v in values for v in actual):
+                return False
+        return True
+
+    @property
+    def changes_branch(self) -> bool:
+        if self.branches is not None:
+            return True
+        return any(section in self.sections or section in self.ignore or
+                   any(setting in self.ignore for setting in SECTIONS[section])
+                   for section in _BRANCH_SECTIONS)
+
+
+def _as_policy(sections: Mapping[str, Mapping[str, Any]], branches: Tuple[str, ...]) -> Policy:
+    branch_protection = dict(sections.get('branch_protection', {}))
+    required_signatures = branch_protection.pop('required_signatures', False)
+    return Policy(dict(sections.get('repository', {})), branch_protection,
+                  dict(sections.get('pull_request_reviews', {})), required_signatures, branches)
+
+
+class CompiledPolicy:
+    """
+    A standards policy checked and compiled once, up front: the repositories it excludes, the standards every
+    repository is held to and the overrides that apply to some of them. The Policy for each combination of overrides is
+    only worked out once, so looking up the standards for a repository is a few dictionary lookups.
+    """
+
+    def __init__(self, exclude: List[str], sections: Dict[str, Dict[str, Any]],
+                 overrides: Optional[List[Override]] = None, branches: Tuple[str, ...] = ()) -> None:
+        self.exclude = exclude
+        self.sections = sections
+        self.overrides = overrides or []
+        self.branches = branches
+        self.base = _as_policy(sections, branches)
+        self._policies: Dict[Tuple[int, ...], Policy] = {(): self.base}
+
+    @property
+    def digest(self) -> str:
+        """
+        Identifies what the policy asks for, so runs made with different policies can be told apart.
+        """
+        canonical = {
+            'exclude': sorted(self.exclude),
+            'sections': self.sections,
+            'branches': list(self.branches),
+            'overrides': [{'when': {name: list(values) for name, values in override.when.items()},
+                           'sections': override.sections, 'ignore': list(override.ignore),
+                           'branches': list(override.branches) if override.branches is not None else None}
+                          for override in self.overrides],
+        }
+        return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @property
+    def rules(self) -> Tuple[str, ...]:
+        """
+        Every setting some repository is held to, by the standards or by an override, in the order they are listed.
+        """
+        rules: Dict[str, None] = {}
+        for sections in [self.sections, *(override.sections for override in self.overrides)]:
+            for settings in sections.values():
+                rules.update(dict.fromkeys(settings))
+        return tuple(rules)
+
+    @property
+    def overrides_branch(self) -> bool:
+        """
+        Whether some repositories are held to different branch standards than the rest.
+        """
+        return any(override.changes_branch for override in self.overrides)
+
+    def for_repo(self, custom_properties: Mapping[str, Any]) -> Policy:
+        """
+        The standards for a repository with these custom properties: the base standards with every matching override
+        applied in the order they are listed.
+        """
+        key = tuple(i for i, override in enumerate(self.overrides) if override.matches(custom_properties))
+        policy = self._policies.get(key)
+        if policy is None:
+            sections = {section: dict(settings) for section, settings in self.sections.items()}
+            branches = self.branches
+            for i in key:
+                override = self.overrides[i]
+                if override.branches is not None:
+                    branches = override.branches
+                for section, settings in override.sections.items():
+                    sections.setdefault(section, {}).update(settings)
+                for ignored in override.ignore:
+                    sections.pop(ignored, None)
+                    for settings in sections.values():
+                        settings.pop(ignored, None)
+            policy = self._policies.setdefault(key, _as_policy(sections, branches))
+        return policy
+
+
+def _section(source: str, name: str, data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise ValueError(f'[{name}] in {source} should be a table of settings')
+    unknown = set(data) - set(SECTIONS[name])
+    if unknown:
+        raise ValueError(f'Unknown settings in [{name}] of {source}: {", ".join(sorted(unknown))}')
+    for setting, value in data.items():
+        expected = SECTIONS[name][setting]
+        # bool is an int as far as isinstance is concerned, but true is not a review count
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f'{setting} in [{name}] of {source} should be a {expected.__name__}')
+        if expected is int and value < 0:
+            raise ValueError(f'{setting} in [{name}] of {source} cannot be negative')
+    return dict(data)
+
+
+def _branches(where: str, data: Any) -> Tuple[str, ...]:
+    if not isinstance(data, list) or not all(isinstance(pattern, str) and pattern for pattern in data):
+        raise ValueError(f'branches in {where} should be a list of branch name patterns, e.g. ["release/*"]')
+    return tuple(data)
+
+
+def _override(source: str, number: int, data: Any) -> Override:
+    where = f'override {number} of {source}'
+    if not isinstance(data, dict):
+        raise ValueError(f'[[overrides]] in {source} should be tables')
+    unknown = set(data) - {'when', 'ignore', 'branches', *SECTIONS}
+    if unknown:
+        raise ValueError(f'Unknown keys in {where}: {", ".join(sorted(unknown))}')
+    when = data.get('when')
+    if not isinstance(when, dict) or not when:
+        raise ValueError(f'{where} needs a when, e.g. when = {{ Repo-Type = "docs" }}')
+    values = {}
+    for name, value in when.items():
+        value = value if isinstance(value, list) else [value]
+        if not value or not all(isinstance(v, str) for v in value):
+            raise ValueError(f'{name} in the when of {where} should be a value or a list of values')
+        values[name] = tuple(value)
+    ignore = data.get('ignore', [])
+    known = {*SECTIONS, *(setting for settings in SECTIONS.values() for setting in settings)}
+    if not isinstance(ignore, list) or not all(isinstance(name, str) for name in ignore):
+        raise ValueError(f'ignore in {where} should be a list of settings or sections')
+    if set(ignore) - known:
+        raise ValueError(f'Unknown settings ignored in {where}: {", ".join(sorted(set(ignore) - known))}')
+    sections = {name: _section(where, name, data[name]) for name in SECTIONS if name in data}
+    branches = _branches(where, data['branches']) if 'branches' in data else None
+    return Override(values, sections, tuple(ignore), branches)
+
+
+def compile_policy(data: Dict[str, Any], source: str = 'the policy') -> CompiledPolicy:
+    """
+    Checks and compiles a policy read from `source`. Raises ValueError on anything it does not recognise, so a typo
+    cannot quietly turn a standard off.
+    """
+    unknown = set(data) - {'exclude', 'branches', 'overrides', *SECTIONS}
+    if unknown:
+        raise ValueError(f'Unknown keys in {source}: {", ".join(sorted(unknown))}')
+    exclude = data.get('exclude', EXCLUDED_REPO_NAMES)
+    if not isinstance(exclude, list) or not all(isinstance(name, str) for name in exclude):
+        raise ValueError(f'exclude in {source} should be a list of repository names')
+    sections = {name: _section(source, name, data[name]) for name in SECTIONS if name in data}
+    overrides = data.get('overrides', [])
+    if not isinstance(overrides, list):
+        raise ValueError(f'overrides in {source} should be written as [[overrides]]')
+    return CompiledPolicy(list(exclude), sections,
+                          [_override(source, number, override) for number, override in enumerate(overrides, 1)],
+                          _branches(source, data.get('branches', [])))
+
+
+def load_policy(path: str) -> CompiledPolicy:
+    """
+    Reads the standards from a TOML file such as:
+
+        exclude = [".github"]
+        branches = ["release/*"]
+
+        [repository]
+        has_wiki = false
+        delete_branch_on_merge = true
+
+        [branch_protection]
+        allow_force_pushes = false
+        required_signatures = true
+
+        [pull_request_reviews]
+        required_approving_review_count = 1
+
+        [[overrides]]
+        when = { Repo-Type = "docs" }
+        ignore = ["branch_protection", "pull_request_reviews"]
+        repository = { has_wiki = true }
+
+    Only the settings listed are checked. Protected branches matching `branches` are held to the branch standards as
+    well as the default branch. Raises ValueError when the file is not a valid policy.
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f'{path} is not valid TOML: {e}')
+    return compile_policy(data, path)
+
+
+# The standards applied without a --policy
+DEFAULT_STANDARDS_POLICY = compile_policy({
+    'repository': STANDARD_REPO_PROPERTIES,
+    'branch_protection': {**STANDARD_BRANCH_PROTECTION, 'required_signatures': True},
+    'pull_request_reviews': STANDARD_PULL_REQUEST_REVIEWS,
+})
@@ -0,0 +1,58 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from typing import Any, Dict, Iterable, List, Optional
+
+from github.Organization import Organization
+
+AUTO_APPLY_STANDARDS = 'Auto-Apply-Standards'
+
+
+class CustomPropertyIndex:
+    """
+    The custom property values of every repository in an organisation, loaded with one paginated request at startup so
+    that deciding which repositories are in scope never needs a request per repository.
+    """
+
+    def __init__(self, values: Dict[str, Dict[str, Any]], excluded_repo_names: Iterable[str] = ()) -> None:
+        self.values = values
+        self.excluded_repo_names = set(excluded_repo_names)
+
+    @classmethod
+    def for_org(cls, gh_org: Organization, excluded_repo_names: Iterable[str] = ()) -> 'CustomPropertyIndex':
+        values = {repo_values.repository_name: repo_values.properties
+                  for repo_values in gh_org.list_custom_property_values()}
+        return cls(values, excluded_repo_names)
+
+    def properties_for(self, repo_name: str) -> Dict[str, Any]:
+        return self.values.get(repo_name, {})
+
+    def skip_reason(self, repo_name: str) -> Optional[str]:
+        """
+        Why the repository is not part of standards management, or None when it is.
+        """
+        if repo_name in self.excluded_repo_names:
+            return 'it is excluded from standards management'
+        if self.properties_for(repo_name).get(AUTO_APPLY_STANDARDS) in (None, 'false'):
+            return f'{AUTO_APPLY_STANDARDS} is not true'
+        return None
+
+    def managed_repo_names(self) -> List[str]:
+        """
+        The repositories that are part of standards management, as skip_reason decides - whichever backend applies them.
+        """
+        return sorted(name for name in self.values if self.skip_reason(name) is None)
@@ -0,0 +1,199 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from requests import PreparedRequest, Response
+
+from github_standards.transport import Send
+
+DEFAULT_RESERVE = 100
+
+
+class _Budget:
+    """
+    What we know of one rate limit resource (core, graphql, search...) from the most recent response headers, plus how
+    much of it this run has used.
+    """
+
+    def __init__(self) -> None:
+        self.limit = 0
+        self.remaining = 0
+        self.reset = 0.0
+        self.next_slot = 0.0
+        self.consumed = 0
+        self._window_reset: Optional[float] = None
+        self._window_first_used = 0
+        self._window_max_used = 0
+
+    def observe(self, limit: int, remaining: int, reset: float, used: Optional[int]) -> None:
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        if used is None:
+            return
+        if reset != self._window_reset:
+            # a new rate limit window, bank what we used in the previous one
+            self.consumed += self.window_consumed
+            self._window_reset = reset
+            self._window_first_used = used
+            self._window_max_used = used
+        else:
+            self._window_max_used = max(self._window_max_used, used)
+
+    @property
+    def window_consumed(self) -> int:
+        if self._window_reset is None:
+            return 0
+        return self._window_max_used - self._window_first_used + 1
+
+    @property
+    def total_consumed(self) -> int:
+        return self.consumed + self.window_consumed
+
+
+class RateLimitScheduler:
+    """
+    Transport middleware that keeps a run within GitHub's rate limits, shared by every thread using the same client.
+
+    - While plenty of budget is left requests go straight through. Once less than `low_water` of the limit remains,
+      requests are spaced out so what is left (less `reserve`) lasts until the limit resets, and with only `reserve`
+      left they wait for the reset.
+    - Secondary (abuse) rate limit responses pause *all* requests for the `Retry-After` the server asked for (or an
+      exponential backoff when it did not say) and the request is then retried, up to `max_retries` times.
+
+    Each credential has rate limits of its own, so with a CredentialPool the budgets are kept per credential (as named
+    by `credential_of`) and one that is running low only holds back the requests made with it.
+
+    `report()` describes how much budget the run consumed, so the job can be scheduled knowing its cost.
+    """
+
+    def __init__(self, reserve: int = DEFAULT_RESERVE, low_water: float = 0.2, secondary_backoff: float = 60,
+                 max_retries: int = 3, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.time,
+                 credential_of: Callable[[PreparedRequest], Optional[str]] = lambda request: None) -> None:
+        self.reserve = reserve
+        self.low_water = low_water
+        self.secondary_backoff = secondary_backoff
+        self.max_retries = max_retries
+        self.requests = 0
+        self.secondary_limits = 0
+        self.waited = 0.0
+        self._sleep = sleep
+        self._clock = clock
+        self._credential_of = credential_of
+        self._lock = threading.Lock()
+        # (credential, resource) -> budget
+        self._budgets: Dict[Tuple[Optional[str], str], _Budget] = {}
+        self._paused_until = 0.0
+
+    @staticmethod
+    def _resource_for(request: PreparedRequest) -> str:
+        path = request.path_url.split('?')[0]
+        if path.endswith('/graphql'):
+            return 'graphql'
+        if '/search/' in path:
+            return 'search'
+        return 'core'
+
+    def _delay_before_request(self, credential: Optional[str], resource: str) -> float:
+        now = self._clock()
+        with self._lock:
+            delay = max(self._paused_until - now, 0)
+            budget = self._budgets.get((credential, resource))
+            if budget is not None and budget.limit > 0 and budget.reset > now:
+                if budget.remaining <= self.reserve:
+                    delay = max(delay, budget.reset - now)
+                elif budget.remaining < budget.limit * self.low_water:
+                    interval = (budget.reset - now) / (budget.remaining - self.reserve)
+                    slot = max(now + delay, budget.next_slot)
+                    budget.next_slot = slot + interval
+                    delay = slot - now
+                # count this request against what is left so concurrent callers see it before the response arrives
+                budget.remaining -= 1
+            self.requests += 1
+            self.waited += delay
+        return delay
+
+    def _observe(self, credential: Optional[str], resource: str, response: Response) -> None:
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        resource = headers.get('X-RateLimit-Resource', resource)
+        used = headers.get('X-RateLimit-Used')
+        with self._lock:
+            self._budgets.setdefault((credential, resource), _Budget()).observe(
+                limit=int(headers.get('X-RateLimit-Limit', 0)),
+                remaining=int(headers['X-RateLimit-Remaining']),
+                reset=float(headers.get('X-RateLimit-Reset', 0)),
+                used=int(used) if used is not None else None)
+
+    def _retry_delay(self, response: Response, attempt: int) -> Optional[float]:
+        if response.status_code not in (403, 429):
+            return None
+        if 'Retry-After' in response.headers:
+            return float(response.headers['Retry-After'])
+        if response.headers.get('X-RateLimit-Remaining') == '0' and 'X-RateLimit-Reset' in response.headers:
+            return max(float(response.headers['X-RateLimit-Reset']) - self._clock(), 0) + 1
+        if 'secondary rate limit' in response.text.lower():
+            return self.secondary_backoff * 2 ** attempt
+        # an ordinary permission error
+        return None
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        resource = self._resource_for(request)
+        credential = self._credential_of(request)
+        attempt = 0
+        while True:
+            delay = self._delay_before_request(credential, resource)
+            if delay > 0:
+                self._sleep(delay)
+
+            response = send(request)
+            self._observe(credential, resource, response)
+
+            retry_delay = self._retry_delay(response, attempt)
+            if retry_delay is None or attempt >= self.max_retries:
+                return response
+
+            attempt += 1
+            print(f'    Rate limited by GitHub on {request.method} {request.path_url}, '
+                  f'pausing all requests for {retry_delay:.0f}s')
+            with self._lock:
+                self.secondary_limits += 1
+                self._paused_until = max(self._paused_until, self._clock() + retry_delay)
+
+    def _by_resource(self) -> Dict[str, Tuple[int, int, int]]:
+        # consumed, remaining and limit of each resource, added up across credentials. Called with the lock held.
+        totals: Dict[str, Tuple[int, int, int]] = {}
+        for (_, resource), budget in self._budgets.items():
+            consumed, remaining, limit = totals.get(resource, (0, 0, 0))
+            totals[resource] = (consumed + budget.total_consumed, remaining + budget.remaining, limit + budget.limit)
+        return dict(sorted(totals.items()))
+
+    def consumed(self) -> Dict[str, int]:
+        with self._lock:
+            return {resource: consumed for resource, (consumed, _, _) in self._by_resource().items()}
+
+    def report(self) -> str:
+        with self._lock:
+            budgets = ', '.join(f'{resource} {consumed} used ({remaining} of {limit} left)'
+                                for resource, (consumed, remaining, limit) in self._by_resource().items())
+            return (f'Rate limit: {self.requests} requests, {budgets or "no budget reported"}, '
+                    f'{self.secondary_limits} secondary limits hit, {self.waited:.0f}s spent waiting')
@@ -0,0 +1,93 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from github_standards.runner import RunSummary
+from github_standards.shard import Shard
+
+REPORT_VERSION = 1
+
+
+class Report:
+    """
+    The outcome of a run (or of one shard of a run) saved as JSON, so the reports of the jobs in a CI matrix can be
+    brought back together with `merge-reports`.
+    """
+
+    def __init__(self, org: str, summary: RunSummary, shard: Optional[Shard] = None) -> None:
+        self.org = org
+        self.summary = summary
+        self.shard = shard
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': REPORT_VERSION, 'org': self.org,
+                       'shard': str(self.shard) if self.shard is not None else None,
+                       'assessed': self.summary.assessed, 'skipped': self.summary.skipped,
+                       'out_of_standards': dict(sorted(self.summary.out_of_standards.items())),
+                       'failed': dict(sorted(self.summary.failed.items()))}, f, indent=2)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path: str) -> 'Report':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != REPORT_VERSION:
+            raise ValueError(f'{path} is a version {data.get("version")} report, expected version {REPORT_VERSION}')
+        summary = RunSummary()
+        summary.assessed = data['assessed']
+        summary.skipped = data['skipped']
+        summary.out_of_standards = data['out_of_standards']
+        summary.failed = data['failed']
+        return cls(data['org'], summary, Shard.parse(data['shard']) if data['shard'] is not None else None)
+
+
+def merge_reports(reports: Iterable[Report]) -> Tuple[RunSummary, List[str]]:
+    """
+    Combines the reports of the shards of one run into an org wide summary. Also returns the shards that have no
+    report (their job failed before writing one, or was never started), as the summary does not cover those repos.
+
+    Raises ValueError when the reports cannot be from the same run: different orgs, a different number of shards, the
+    same shard twice, or a mix of sharded and unsharded reports.
+    """
+    reports = list(reports)
+    if not reports:
+        raise ValueError('No reports to merge')
+    orgs = {report.org for report in reports}
+    if len(orgs) > 1:
+        raise ValueError(f'Reports are for different orgs: {", ".join(sorted(orgs))}')
+    counts = {report.shard.count if report.shard is not None else None for report in reports}
+    if len(counts) > 1:
+        raise ValueError('Reports are from runs split into a different number of shards')
+    (count,) = counts
+
+    summary = RunSummary()
+    if count is None:
+        if len(reports) > 1:
+            raise ValueError('Reports are each for the whole org, there is nothing to merge')
+        summary.merge(reports[0].summary)
+        return summary, []
+
+    seen: Dict[int, Report] = {}
+    for report in reports:
+        if report.shard.index in seen:
+            raise ValueError(f'More than one report for shard {report.shard}')
+        seen[report.shard.index] = report
+        summary.merge(report.summary)
+    return summary, [str(Shard(index, count)) for index in range(1, count + 1) if index not in seen]
@@ -0,0 +1,117 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from requests import PreparedRequest, Response
+from requests.exceptions import ChunkedEncodingError, ConnectionError, ConnectTimeout, Timeout
+
+from github_standards.transport import Send
+
+DEFAULT_MAX_RETRIES = 4
+
+# Server errors that say nothing about the request itself - GitHub answers 502 when it gives up on a slow request
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+# POSTs that are safe to repeat: GraphQL queries (this tool makes no mutations) and turning on required signatures
+_IDEMPOTENT_POST_SUFFIXES = ('/graphql', '/protection/required_signatures')
+
+
+def is_idempotent(request: PreparedRequest) -> bool:
+    """
+    Whether making `request` twice has the same effect as making it once. The PATCHes and PUTs this tool makes set
+    absolute values, so they are; a POST that creates something (such as the org ruleset) is not.
+    """
+    if request.method != 'POST':
+        return True
+    return request.path_url.split('?')[0].endswith(_IDEMPOTENT_POST_SUFFIXES)
+
+
+class TransientRetry:
+    """
+    Transport middleware that retries requests which failed for reasons that have nothing to do with the request - a
+    dropped connection, a timeout or a 5xx - with exponential backoff and full jitter, so workers that failed together
+    do not retry together.
+
+    Only idempotent requests are retried after they may have reached GitHub. A request that is not idempotent is only
+    retried when the connection could not be made, as it was then never sent. Rate limit responses are left to the
+    RateLimitScheduler, and anything else (a 404, a 422) is a real answer and is passed straight back.
+    """
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = 1.0, max_delay: float = 30.0,
+                 sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[float, float], float] = random.uniform) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retried = 0
+        self.gave_up = 0
+        self._sleep = sleep
+        self._jitter = jitter
+        self._lock = threading.Lock()
+
+    def _transient(self, request: PreparedRequest, response: Optional[Response],
+                   error: Optional[Exception]) -> Optional[str]:
+        # why the request can be retried, or None when it cannot
+        if error is not None:
+            if isinstance(error, ConnectTimeout) or is_idempotent(request) and isinstance(
+                    error, (ConnectionError, Timeout, ChunkedEncodingError)):
+                return type(error).__name__
+            return None
+        if response.status_code in TRANSIENT_STATUSES and is_idempotent(request):
+            return str(response.status_code)
+        return None
+
+    def _delay(self, response: Optional[Response], attempt: int) -> float:
+        if response is not None and 'Retry-After' in response.headers:
+            return float(response.headers['Retry-After'])
+        return self._jitter(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        attempt = 0
+        while True:
+            response, error = None, None
+            try:
+                response = send(request)
+            except (ConnectionError, Timeout, ChunkedEncodingError) as e:
+                error = e
+
+            reason = self._transient(request, response, error)
+            if reason is None or attempt >= self.max_retries:
+                if reason is not None:
+                    with self._lock:
+                        self.gave_up += 1
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self._delay(response, attempt)
+            attempt += 1
+            print(f'    {request.method} {request.path_url} failed ({reason}), retrying in {delay:.1f}s '
+                  f'(attempt {attempt} of {self.max_retries})')
+            with self._lock:
+                self.retried += 1
+            if response is not None:
+                response.close()
+            self._sleep(delay)
+
+    def report(self) -> str:
+        with self._lock:
+            return f'Retries: {self.retried} transient failures retried, gave up on {self.gave_up}'
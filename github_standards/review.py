@@ -0,0 +1,138 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from typing import Optional
+
+from github.Branch import Branch
+from github.Repository import Repository
+
+from github_standards.events import note
+from github_standards.listing import list_protected_branches
+from github_standards.plan import Plan, plan_branch_changes, plan_repo_changes
+from github_standards.rulesets import STANDARDS_RULESET_NAME
+from github_standards.snapshot import BranchSnapshot, RepoSnapshot, fetch_branch_snapshot, fetch_repo_snapshot, \
+    not_found_as_none
+from github_standards.standards import DEFAULT_POLICY, CheckResult, Policy, emit_findings, \
+    check_and_apply_standard_properties_to_repo, check_and_apply_standard_properties_to_branch
+
+
+def assess_repo(repo: Repository, repo_snapshot: RepoSnapshot, main_b: Optional[Branch],
+                branch_snapshot: Optional[BranchSnapshot], do_actual_work: bool = False,
+                plan: Optional[Plan] = None, policy: Policy = DEFAULT_POLICY) -> str:
+    """
+    Checks (and unless `do_actual_work` is False, applies) the standards against snapshots that have already been
+    fetched, so the only requests made here are writes.
+    """
+    if plan is not None:
+        plan.add(repo.name, plan_repo_changes(repo_snapshot, branch_snapshot, policy))
+
+    missing_standards = str(check_and_apply_standard_properties_to_repo(repo, do_actual_work, snapshot=repo_snapshot,
+                                                                        policy=policy))
+
+    main_branch = repo.default_branch
+    if main_branch != 'main':
+        note(repo.name, f'WARNING: the default branch is not called main, it is {main_branch}')
+
+    if main_b:
+        missing_branch_standards = check_and_apply_standard_properties_to_branch(repo, main_b, do_actual_work,
+                                                                                 snapshot=branch_snapshot,
+                                                                                 policy=policy)
+        missing_standards = _join(missing_standards, str(missing_branch_standards))
+
+        # @todo: Status Checks as this relies upon GitHub actions being present
+        # main_b.edit_required_status_checks(strict=True, contexts=[
+        #
+        # ])
+    elif policy.checks_branch:
+        note(repo.name, f'there is no branch {main_branch}')
+    else:
+        note(repo.name, 'branch standards do not apply')
+
+    # print(dir(repo.permissions))
+    return missing_standards
+
+
+def get_default_branch(repo: Repository) -> Optional[Branch]:
+    """
+    The repository's default branch, or None when there is no such branch - as in an empty repository.
+    """
+    return not_found_as_none(lambda: repo.get_branch(repo.default_branch))
+
+
+def apply_standards_to_repo(repo: Repository, do_actual_work: bool = False, plan: Optional[Plan] = None,
+                            policy: Policy = DEFAULT_POLICY) -> str:
+    # Whether the repo is in scope at all is decided up front from the org's custom properties (see
+    # CustomPropertyIndex), so by this point we know it is managed
+
+    # Fetch everything the standards need first (and only that), the checks then make no requests other than the writes
+    repo_snapshot = fetch_repo_snapshot(repo, policy.repo_fields)
+    main_b, branch_snapshot = None, None
+    if policy.checks_branch:
+        main_b = get_default_branch(repo)
+        if main_b:
+            branch_snapshot = fetch_branch_snapshot(main_b)
+
+    missing_standards = assess_repo(repo, repo_snapshot, main_b, branch_snapshot, do_actual_work, plan, policy)
+    if policy.checks_branch and policy.branch_patterns:
+        missing_standards = _join(missing_standards, review_protected_branches(repo, do_actual_work, plan, policy))
+    return missing_standards
+
+
+def review_protected_branches(repo: Repository, do_actual_work: bool = False, plan: Optional[Plan] = None,
+                              policy: Policy = DEFAULT_POLICY) -> str:
+    """
+    Checks (and unless `do_actual_work` is False, applies) the branch standards on every protected branch matching
+    the policy's branch patterns. The branches are streamed from the listing and each is done with before the next is
+    looked at, so only the standards they are missing are kept - each prefixed with the branch, e.g.
+    release/1.0:allow_force_pushes.
+    """
+    missing = []
+    for branch in list_protected_branches(repo, policy.branch_patterns):
+        snapshot = fetch_branch_snapshot(branch)
+        if plan is not None:
+            plan.add(repo.name, plan_branch_changes(snapshot, policy))
+        result = check_and_apply_standard_properties_to_branch(repo, branch, do_actual_work, snapshot=snapshot,
+                                                               policy=policy)
+        missing.extend(f'{branch.name}:{standard}' for standard in result.missing)
+    return ','.join(missing)
+
+
+def _join(missing_standards: str, more_missing_standards: str) -> str:
+    if missing_standards != '' and more_missing_standards != '':
+        missing_standards = f'{missing_standards},'
+    return missing_standards + more_missing_standards
+
+
+def apply_standards_to_repo_with_ruleset(repo: Repository, ruleset_result: CheckResult,
+                                         do_actual_work: bool = False, policy: Policy = DEFAULT_POLICY) -> str:
+    """
+    Reviews a repo whose branch standards are enforced by the org ruleset (see check_and_apply_standards_ruleset)
+    rather than by protecting its default branch. Only the repo settings are read and written here; whatever the
+    ruleset was found to be missing is missing from every repo it covers, so its findings are the repo's too.
+    """
+    repo_snapshot = fetch_repo_snapshot(repo, policy.repo_fields)
+
+    missing_standards = str(check_and_apply_standard_properties_to_repo(repo, do_actual_work, snapshot=repo_snapshot,
+                                                                        policy=policy))
+
+    main_branch = repo.default_branch
+    if main_branch != 'main':
+        note(repo.name, f'WARNING: the default branch is not called main, it is {main_branch}')
+    note(repo.name, f'branch standards are enforced by the org ruleset {STANDARDS_RULESET_NAME}', main_branch)
+    emit_findings(repo.name, ruleset_result, main_branch)
+
+    return _join(missing_standards, str(ruleset_result))
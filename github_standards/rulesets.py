@@ -0,0 +1,227 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from typing import Any, Dict, List, Optional
+
+from github.Organization import Organization
+
+from github_standards.events import note
+from github_standards.properties import CustomPropertyIndex
+from github_standards.standards import DEFAULT_POLICY, CheckResult, Finding, Policy, emit_findings
+
+STANDARDS_RULESET_NAME = 'Sonatype Community Standards'
+
+# Ruleset rule type -> the branch protection standard it enforces. These rules forbid what the standard sets to False.
+_RESTRICTION_RULES = {
+    'deletion': 'allow_deletions',
+    'non_fast_forward': 'allow_force_pushes',
+}
+
+# pull_request rule parameter -> the pull request review standard it is named after in classic protection
+_PULL_REQUEST_PARAMETERS = {
+    'require_code_owner_review': 'require_code_owner_reviews',
+    'required_approving_review_count': 'required_approving_review_count',
+}
+
+
+def _restrictions(policy: Policy) -> Dict[str, str]:
+    return {rule_type: standard for rule_type, standard in _RESTRICTION_RULES.items()
+            if policy.branch_protection.get(standard) is False}
+
+
+def _pull_request_parameters(policy: Policy) -> Dict[str, str]:
+    return {parameter: standard for parameter, standard in _PULL_REQUEST_PARAMETERS.items()
+            if standard in policy.pull_request_reviews}
+
+
+def standard_rules(policy: Policy = DEFAULT_POLICY) -> List[Dict[str, Any]]:
+    """
+    The branch standards of `policy` as ruleset rules.
+    """
+    rules: List[Dict[str, Any]] = [{'type': rule_type} for rule_type in _restrictions(policy)]
+    if policy.pull_request_reviews:
+        rules.append({'type': 'pull_request', 'parameters': {
+            # parameters GitHub requires on every pull_request rule, left at their defaults
+            'dismiss_stale_reviews_on_push': False,
+            'require_code_owner_review': False,
+            'require_last_push_approval': False,
+            'required_approving_review_count': 0,
+            'required_review_thread_resolution': False,
+            **{parameter: policy.pull_request_reviews[standard]
+               for parameter, standard in _pull_request_parameters(policy).items()},
+        }})
+    if policy.required_signatures:
+        rules.append({'type': 'required_signatures'})
+    return rules
+
+
+def _ref_names(policy: Policy) -> List[str]:
+    return ['~DEFAULT_BRANCH'] + [f'refs/heads/{pattern}' for pattern in policy.branch_patterns]
+
+
+def standard_conditions(properties: CustomPropertyIndex, policy: Policy = DEFAULT_POLICY) -> Dict[str, Any]:
+    """
+    The default branch (and the branches matching the policy's branch patterns) of every repository in scope - exactly
+    the repositories and branches the standards are applied to with classic branch protection, as both backends decide
+    what is in scope with CustomPropertyIndex. GitHub takes only one repository condition alongside the ref names, so
+    rather than matching on Auto-Apply-Standards (which could not leave out the excluded repositories) the repositories
+    are named.
+    """
+    return {
+        'ref_name': {'include': _ref_names(policy), 'exclude': []},
+        'repository_name': {'include': properties.managed_repo_names(),
+                            'exclude': sorted(properties.excluded_repo_names)},
+    }
+
+
+def _targets_repos_in_scope(conditions: Dict[str, Any], properties: CustomPropertyIndex, policy: Policy) -> bool:
+    # the standard branches of exactly the repos in scope. Refs and repos excluded by hand are left be.
+    ref_name = conditions.get('ref_name') or {}
+    repository_name = conditions.get('repository_name') or {}
+    return (set(_ref_names(policy)) <= set(ref_name.get('include', []))
+            and sorted(repository_name.get('include', [])) == properties.managed_repo_names()
+            and properties.excluded_repo_names <= set(repository_name.get('exclude', [])))
+
+
+def _union(current: List[Any], standard: List[Any]) -> List[Any]:
+    return current + [entry for entry in standard if entry not in current]
+
+
+def merged_conditions(ruleset: Optional[Dict[str, Any]], properties: CustomPropertyIndex,
+                      policy: Policy = DEFAULT_POLICY) -> Dict[str, Any]:
+    """
+    The conditions to write: the standard ones, with whatever was added to the ruleset's own by hand kept - other refs,
+    and exclusions. Which repositories it includes is ours to say, and GitHub takes one repository condition only, so
+    any other is replaced.
+    """
+    standard = standard_conditions(properties, policy)
+    current = (ruleset or {}).get('conditions') or {}
+    ref_name = current.get('ref_name') or {}
+    repository_name = current.get('repository_name') or {}
+    return {
+        'ref_name': {**ref_name,
+                     'include': _union(ref_name.get('include', []), standard['ref_name']['include']),
+                     'exclude': ref_name.get('exclude', [])},
+        'repository_name': {**repository_name,
+                            'include': standard['repository_name']['include'],
+                            'exclude': _union(repository_name.get('exclude', []),
+                                              standard['repository_name']['exclude'])},
+    }
+
+
+def ruleset_not_as_per_standards(ruleset: Optional[Dict[str, Any]], properties: CustomPropertyIndex,
+                                 policy: Policy = DEFAULT_POLICY) -> List[str]:
+    """
+    The standards the org ruleset does not enforce, named as the branch standards are (plus `ruleset_enforcement` and
+    `ruleset_conditions` for a ruleset that is not active or not aimed at the right branches). Rules and conditions
+    beyond the standard ones are left alone.
+    """
+    restrictions = _restrictions(policy)
+    pull_request_parameters = _pull_request_parameters(policy)
+    if ruleset is None:
+        return list(restrictions.values()) + list(pull_request_parameters.values()) + \
+            (['required_signatures'] if policy.required_signatures else [])
+
+    missing = []
+    if ruleset.get('enforcement') != 'active':
+        missing.append('ruleset_enforcement')
+    if not _targets_repos_in_scope(ruleset.get('conditions') or {}, properties, policy):
+        missing.append('ruleset_conditions')
+
+    rules = {rule['type']: rule for rule in ruleset.get('rules', [])}
+    missing.extend(standard for rule_type, standard in restrictions.items() if rule_type not in rules)
+    parameters = (rules.get('pull_request') or {}).get('parameters') or {}
+    missing.extend(standard for parameter, standard in pull_request_parameters.items()
+                   if parameters.get(parameter) != policy.pull_request_reviews[standard])
+    if policy.required_signatures and 'required_signatures' not in rules:
+        missing.append('required_signatures')
+    return missing
+
+
+def fetch_standards_ruleset(gh_org: Organization) -> Optional[Dict[str, Any]]:
+    """
+    The org's standards ruleset, found by name, or None when there is not one. Two requests: the (short) list of
+    rulesets, then the ruleset itself, as the list leaves out its rules.
+    """
+    requester = gh_org._requester
+    _, rulesets = requester.requestJsonAndCheck('GET', f'{gh_org.url}/rulesets', parameters={'per_page': 100})
+    for summary in rulesets:
+        if summary['name'] == STANDARDS_RULESET_NAME:
+            _, ruleset = requester.requestJsonAndCheck('GET', f'{gh_org.url}/rulesets/{summary["id"]}')
+            return ruleset
+    return None
+
+
+def apply_standards_ruleset(gh_org: Organization, ruleset: Optional[Dict[str, Any]], properties: CustomPropertyIndex,
+                            policy: Policy = DEFAULT_POLICY) -> Dict[str, Any]:
+    """
+    Creates the standards ruleset, or brings the existing one back to standards in a single write. Rules that are not
+    part of the standards are kept, as are the conditions added by hand (see merged_conditions).
+    """
+    rules = standard_rules(policy)
+    body = {'name': STANDARDS_RULESET_NAME, 'target': 'branch', 'enforcement': 'active',
+            'conditions': merged_conditions(ruleset, properties, policy)}
+    if ruleset is None:
+        _, created = gh_org._requester.requestJsonAndCheck('POST', f'{gh_org.url}/rulesets',
+                                                           input=dict(body, rules=rules))
+        note(gh_org.login, f'org ruleset {STANDARDS_RULESET_NAME} created')
+        return created
+
+    standard_types = {rule['type'] for rule in rules}
+    body['rules'] = [rule for rule in ruleset.get('rules', []) if rule['type'] not in standard_types] + rules
+    _, updated = gh_org._requester.requestJsonAndCheck('PUT', f'{gh_org.url}/rulesets/{ruleset["id"]}', input=body)
+    note(gh_org.login, f'org ruleset {STANDARDS_RULESET_NAME} updated')
+    return updated
+
+
+def _finding(standard: str, ruleset: Optional[Dict[str, Any]], properties: CustomPropertyIndex,
+             policy: Policy) -> Finding:
+    # what the ruleset should have for a standard it does not enforce, and what it has
+    if standard == 'ruleset_enforcement':
+        return Finding(standard, 'active', ruleset.get('enforcement'))
+    if standard == 'ruleset_conditions':
+        return Finding(standard, standard_conditions(properties, policy), ruleset.get('conditions'))
+    if standard == 'required_signatures':
+        return Finding(standard, True, None)
+    for parameter, pull_request_standard in _PULL_REQUEST_PARAMETERS.items():
+        if standard == pull_request_standard:
+            rules = {rule['type']: rule for rule in (ruleset or {}).get('rules', [])}
+            parameters = (rules.get('pull_request') or {}).get('parameters') or {}
+            return Finding(standard, policy.pull_request_reviews[standard], parameters.get(parameter))
+    return Finding(standard, policy.branch_protection[standard], None)
+
+
+def check_and_apply_standards_ruleset(gh_org: Organization, properties: CustomPropertyIndex,
+                                      do_actual_work: bool = False, policy: Policy = DEFAULT_POLICY) -> CheckResult:
+    """
+    Checks (and unless `do_actual_work` is False, repairs) the org ruleset that enforces the branch standards on every
+    repository in scope (as `properties` has it). The standards it did not enforce are what every repository in scope
+    was missing; they are emitted as findings of the org here, and of each repository by
+    apply_standards_to_repo_with_ruleset. A rule that is not there at all is found with None as its actual value.
+    """
+    ruleset = fetch_standards_ruleset(gh_org)
+    if ruleset is None:
+        note(gh_org.login, f'org ruleset {STANDARDS_RULESET_NAME} does not exist')
+
+    missing = ruleset_not_as_per_standards(ruleset, properties, policy)
+    if missing and do_actual_work:
+        apply_standards_ruleset(gh_org, ruleset, properties, policy)
+
+    result = CheckResult(tuple(_finding(standard, ruleset, properties, policy) for standard in missing),
+                         applied=do_actual_work and bool(missing))
+    emit_findings(gh_org.login, result)
+    return result
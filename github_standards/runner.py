@@ -0,0 +1,241 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import io
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, TextIO, Tuple
+
+from github.Repository import Repository
+
+# A repo action returns the comma-joined list of standards the repo was missing ('' when compliant), or None when the
+# repo was skipped
+RepoAction = Callable[[Repository], Optional[str]]
+
+# The same, for anything with a `name` the action is run for - a repository, or a plan's repository
+Action = Callable[[Any], Optional[str]]
+AsyncAction = Callable[[Any], Awaitable[Optional[str]]]
+
+
+class ContextLocalStdout(io.TextIOBase):
+    """
+    Stand-in for sys.stdout that sends writes to the buffer of the current context (when it has one), so the output
+    for each repo can be kept together rather than interleaved with other repos. A context is a worker thread, or an
+    asyncio task together with the threads it hands blocking calls to.
+    """
+
+    def __init__(self, target: TextIO) -> None:
+        self._target = target
+        self._buffer: ContextVar[Optional[io.StringIO]] = ContextVar('repo_output', default=None)
+
+    def capture(self) -> io.StringIO:
+        buffer = io.StringIO()
+        self._buffer.set(buffer)
+        return buffer
+
+    def release(self) -> None:
+        self._buffer.set(None)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        buffer = self._buffer.get()
+        if buffer is None:
+            return self._target.write(s)
+        return buffer.write(s)
+
+    def flush(self) -> None:
+        self._target.flush()
+
+
+class Tracker:
+    """
+    Something kept up to date as a run works through its repos. `started` is called with each repo before the action
+    is, and `finished` with what the action returned for it - or the exception it raised, which is then raised again.
+    See track for following an action with several.
+    """
+
+    def started(self, item: Any) -> Optional[Tuple[Optional[str]]]:
+        """
+        The repo's result, for the action not to be run at all - in a tuple, as the result itself may be None.
+        """
+        return None
+
+    def finished(self, item: Any, missing: Optional[str], error: Optional[BaseException]) -> None:
+        pass
+
+    def track(self, action: Action) -> Action:
+        return track(action, [self])
+
+    def track_async(self, action: AsyncAction) -> AsyncAction:
+        return track_async(action, [self])
+
+
+def _tracked(action: Action, tracker: Tracker) -> Action:
+    def tracked(item: Any) -> Optional[str]:
+        result = tracker.started(item)
+        if result is not None:
+            return result[0]
+        try:
+            missing = action(item)
+        except Exception as e:
+            tracker.finished(item, None, e)
+            raise
+        tracker.finished(item, missing, None)
+        return missing
+
+    return tracked
+
+
+def _tracked_async(action: AsyncAction, tracker: Tracker) -> AsyncAction:
+    async def tracked(item: Any) -> Optional[str]:
+        result = tracker.started(item)
+        if result is not None:
+            return result[0]
+        try:
+            missing = await action(item)
+        except Exception as e:
+            tracker.finished(item, None, e)
+            raise
+        tracker.finished(item, missing, None)
+        return missing
+
+    return tracked
+
+
+def track(action: Action, trackers: Iterable[Tracker]) -> Action:
+    """
+    Wraps a repo action so each of `trackers` follows it, the first innermost: a tracker later in the list sees what
+    the earlier ones did, and can stop them being started at all.
+    """
+    for tracker in trackers:
+        action = _tracked(action, tracker)
+    return action
+
+
+def track_async(action: AsyncAction, trackers: Iterable[Tracker]) -> AsyncAction:
+    """
+    The asyncio counterpart of `track`.
+    """
+    for tracker in trackers:
+        action = _tracked_async(action, tracker)
+    return action
+
+
+class RunSummary:
+    """
+    Collects the outcome of every repo in a run and renders it in a stable (name sorted) order, so that the logs of two
+    runs can be diffed regardless of how many workers were used.
+    """
+
+    def __init__(self) -> None:
+        self.assessed = 0
+        self.skipped = 0
+        self.out_of_standards: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+
+    @property
+    def processed(self) -> int:
+        return self.assessed + self.skipped + len(self.failed)
+
+    def record(self, repo_name: str, missing: Optional[str], error: Optional[BaseException]) -> None:
+        if error is not None:
+            self.failed[repo_name] = f'{type(error).__name__}: {error}'
+        elif missing is None:
+            self.skipped += 1
+        else:
+            self.assessed += 1
+            if missing != '':
+                self.out_of_standards[repo_name] = missing
+
+    def merge(self, other: 'RunSummary') -> None:
+        """
+        Adds the outcomes from `other`, a summary of a different set of repos (such as another shard of the same org).
+        """
+        self.assessed += other.assessed
+        self.skipped += other.skipped
+        self.out_of_standards.update(other.out_of_standards)
+        self.failed.update(other.failed)
+
+    def report(self) -> str:
+        lines = [f'Summary: {self.processed} repos processed, {self.assessed} assessed, {self.skipped} skipped, '
+                 f'{len(self.failed)} failed']
+        if self.out_of_standards:
+            lines.append(f'    Out of standards ({len(self.out_of_standards)}):')
+            for name in sorted(self.out_of_standards):
+                lines.append(f'        {name}: {self.out_of_standards[name]}')
+        if self.failed:
+            lines.append(f'    Failed ({len(self.failed)}):')
+            for name in sorted(self.failed):
+                lines.append(f'        {name}: {self.failed[name]}')
+        return '\n'.join(lines)
+
+
+def context_local_stdout(stdout: TextIO) -> ContextLocalStdout:
+    # When the caller's output is itself being captured (e.g. one of several orgs run at once) the existing stand-in is
+    # reused, so the output of each repo ends up in the caller's buffer rather than escaping it
+    return stdout if isinstance(stdout, ContextLocalStdout) else ContextLocalStdout(stdout)
+
+
+def _run_one(stdout: ContextLocalStdout, action: RepoAction,
+             repo: Repository) -> Tuple[Optional[str], str, Optional[BaseException]]:
+    buffer = stdout.capture()
+    try:
+        return action(repo), buffer.getvalue(), None
+    except Exception as e:
+        traceback.print_exc(file=buffer)
+        return None, buffer.getvalue(), e
+    finally:
+        stdout.release()
+
+
+def run_for_each_repo(repos: Iterable[Repository], action: RepoAction, workers: int = 1) -> RunSummary:
+    """
+    Runs `action` for every repo on a pool of `workers` threads.
+
+    The output of each repo is written out as one block and in the order the repos were listed, so a run with many
+    workers reads the same as a serial one. A failure in one repo is recorded in the summary rather than stopping the
+    run. At most `workers * 2` repos are in flight at any time, so listing does not run ahead of the pool.
+    """
+    summary = RunSummary()
+    real_stdout = sys.stdout
+    stdout = context_local_stdout(real_stdout)
+    pending: Deque[Tuple[str, Future]] = deque()
+
+    def emit() -> None:
+        repo_name, future = pending.popleft()
+        missing, output, error = future.result()
+        real_stdout.write(output)
+        summary.record(repo_name, missing, error)
+
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='github-standards') as pool:
+            for repo in repos:
+                pending.append((repo.name, pool.submit(_run_one, stdout, action, repo)))
+                if len(pending) >= workers * 2:
+                    emit()
+            while pending:
+                emit()
+    finally:
+        sys.stdout = real_stdout
+
+    return summary
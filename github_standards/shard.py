@@ -0,0 +1,63 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable, Iterator, TypeVar
+
+Named = TypeVar('Named')
+
+
+def shard_of(repo_name: str, count: int) -> int:
+    """
+    The shard (1 to `count`) a repository belongs to. This depends only on the name, so every job in a matrix agrees on
+    it without talking to the others, and it does not move between runs the way a position in the listing would.
+    """
+    digest = hashlib.sha256(repo_name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """
+    One of `count` disjoint slices of the organisation's repositories, numbered from 1.
+    """
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 1 <= self.index <= self.count:
+            raise ValueError(f'{self} is not a shard, expected i/n with 1 <= i <= n')
+
+    def __str__(self) -> str:
+        return f'{self.index}/{self.count}'
+
+    @classmethod
+    def parse(cls, value: str) -> 'Shard':
+        index, separator, count = value.partition('/')
+        if not separator or not index.isdigit() or not count.isdigit():
+            raise ValueError(f'{value} is not a shard, expected i/n such as 1/4')
+        return cls(int(index), int(count))
+
+    def includes(self, repo_name: str) -> bool:
+        return shard_of(repo_name, self.count) == self.index
+
+    def select(self, items: Iterable[Named]) -> Iterator[Named]:
+        """
+        The items (repositories, or anything else with a `name`) that belong to this shard, in their original order.
+        """
+        return (item for item in items if self.includes(item.name))
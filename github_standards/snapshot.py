@@ -0,0 +1,159 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from github import GithubException
+from github.Branch import Branch
+from github.BranchProtection import BranchProtection
+from github.Repository import Repository
+from github.RequiredPullRequestReviews import RequiredPullRequestReviews
+
+
+@dataclass(frozen=True, slots=True)
+class RepoSnapshot:
+    """
+    Every repository setting the standards look at, read once up front. Checks run against this rather than the
+    PyGithub object so that a check can never trigger a request of its own. Settings that were not read are None.
+    """
+    name: str
+    allow_auto_merge: Optional[bool] = None
+    allow_merge_commit: Optional[bool] = None
+    allow_rebase_merge: Optional[bool] = None
+    allow_squash_merge: Optional[bool] = None
+    allow_update_branch: Optional[bool] = None
+    delete_branch_on_merge: Optional[bool] = None
+    has_discussions: Optional[bool] = None
+    has_issues: Optional[bool] = None
+    has_projects: Optional[bool] = None
+    has_wiki: Optional[bool] = None
+    web_commit_signoff_required: Optional[bool] = None
+
+
+# Every setting a RepoSnapshot can hold
+REPO_SETTINGS = RepoSnapshot.__slots__[1:]
+
+
+@dataclass(frozen=True, slots=True)
+class BranchSnapshot:
+    """
+    The protection of one branch, read once up front. The protection fields are None when the branch is not protected
+    (or that part of the protection is not enabled). `settings` is the whole of the protection as arguments to
+    Branch.edit_protection, so a write can keep what the standards do not cover.
+    """
+    name: str
+    protected: bool
+    allow_deletions: Optional[bool]
+    allow_force_pushes: Optional[bool]
+    require_code_owner_reviews: Optional[bool]
+    required_approving_review_count: Optional[int]
+    required_signatures: bool
+    settings: Mapping[str, Any] = field(default_factory=dict)
+
+
+def fetch_repo_snapshot(repo: Repository, fields: Iterable[str] = REPO_SETTINGS) -> RepoSnapshot:
+    """
+    Reads the repository `fields`. The merge settings are not part of the organisation listing, so for a listed
+    repository the first of them read completes the object with a single GET - every other field then comes from that
+    same response. Reading only fields that are in the listing (such as has_wiki) makes no request at all.
+    """
+    return RepoSnapshot(name=repo.name, **{field: getattr(repo, field) for field in fields})
+
+
+def not_found_as_none(fetch: Callable[[], Any]) -> Any:
+    # GitHub returns a 404 for any part of branch protection that is not enabled, and for the default branch of an empty
+    # repository - which has no branches at all
+    try:
+        return fetch()
+    except GithubException as e:
+        if e.status != 404:
+            raise
+        return None
+
+
+def fetch_branch_snapshot(branch: Branch) -> BranchSnapshot:
+    """
+    Reads the protection of a branch with a single request. Its required pull request reviews and required signatures
+    are part of the same response, and an unprotected branch (a 404) has neither, so they are never read on their own.
+    """
+    return build_branch_snapshot(branch.name, not_found_as_none(branch.get_protection))
+
+
+# Protection settings that are switched on or off, as {"enabled": ...} in the protection GET
+_ENABLED_SETTINGS = ('enforce_admins', 'required_linear_history', 'allow_force_pushes', 'allow_deletions',
+                     'block_creations', 'required_conversation_resolution', 'lock_branch', 'allow_fork_syncing')
+
+
+def _restrictions(data: Mapping[str, Any], users: str, teams: str, apps: str) -> Dict[str, Any]:
+    # users are named by login, teams and apps by slug
+    return {users: [user['login'] for user in data.get('users', [])],
+            teams: [team['slug'] for team in data.get('teams', [])],
+            apps: [app['slug'] for app in data.get('apps', [])]}
+
+
+def protection_settings(raw: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    A branch protection, as returned by its GET, as arguments to Branch.edit_protection. The PUT that method makes
+    turns off every part of the protection it is not given, so a write sends these with the standards over them.
+    """
+    settings: Dict[str, Any] = {}
+    status_checks = raw.get('required_status_checks')
+    if status_checks:
+        settings.update(strict=status_checks.get('strict', False), contexts=status_checks.get('contexts', []))
+    for name in _ENABLED_SETTINGS:
+        if raw.get(name) is not None:
+            settings[name] = raw[name]['enabled']
+    reviews = raw.get('required_pull_request_reviews')
+    if reviews:
+        for name in ('dismiss_stale_reviews', 'require_code_owner_reviews', 'required_approving_review_count',
+                     'require_last_push_approval'):
+            if name in reviews:
+                settings[name] = reviews[name]
+        if 'dismissal_restrictions' in reviews:
+            settings.update(_restrictions(reviews['dismissal_restrictions'], 'dismissal_users', 'dismissal_teams',
+                                          'dismissal_apps'))
+        if 'bypass_pull_request_allowances' in reviews:
+            settings.update(_restrictions(reviews['bypass_pull_request_allowances'],
+                                          'users_bypass_pull_request_allowances',
+                                          'teams_bypass_pull_request_allowances',
+                                          'apps_bypass_pull_request_allowances'))
+    if raw.get('restrictions') is not None:
+        settings.update(_restrictions(raw['restrictions'], 'user_push_restrictions', 'team_push_restrictions',
+                                      'app_push_restrictions'))
+    return settings
+
+
+def build_branch_snapshot(name: str, protection: Optional[BranchProtection]) -> BranchSnapshot:
+    if protection is None:
+        return BranchSnapshot(name=name, protected=False, allow_deletions=None, allow_force_pushes=None,
+                              require_code_owner_reviews=None, required_approving_review_count=None,
+                              required_signatures=False)
+    # the reviews are left out of the protection when they are not required
+    reviews: Optional[RequiredPullRequestReviews] = protection.required_pull_request_reviews
+    raw = protection.raw_data
+    return BranchSnapshot(
+        name=name,
+        protected=True,
+        allow_deletions=protection.allow_deletions,
+        allow_force_pushes=protection.allow_force_pushes,
+        require_code_owner_reviews=reviews.require_code_owner_reviews if reviews is not None else None,
+        required_approving_review_count=reviews.required_approving_review_count if reviews is not None else None,
+        # PyGithub has no attribute for the signatures, though GitHub includes them
+        required_signatures=bool((raw.get('required_signatures') or {}).get('enabled')),
+        settings=protection_settings(raw),
+    )
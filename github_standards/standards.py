@@ -15,101 +15,182 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from github import Repository, Branch
+
+from github_standards.events import APPLIED, FINDING, REPORTED, Event, emit
+from github_standards.snapshot import BranchSnapshot, RepoSnapshot, fetch_branch_snapshot, fetch_repo_snapshot
 
-from github import Repository, Branch, GithubException
-from github.BranchProtection import BranchProtection
+STANDARD_REPO_PROPERTIES = {
+    'allow_auto_merge': False,
+    'allow_merge_commit': True,
+    'allow_rebase_merge': False,
+    'allow_squash_merge': True,
+    'allow_update_branch': True,
+    'delete_branch_on_merge': True,
+    'has_discussions': True,
+    'has_issues': True,
+    'has_projects': False,
+    'has_wiki': False,
+    'web_commit_signoff_required': True
+}
 
+STANDARD_BRANCH_PROTECTION = {
+    'allow_deletions': False,
+    'allow_force_pushes': False,
+}
+
+STANDARD_PULL_REQUEST_REVIEWS = {
+    'require_code_owner_reviews': True,
+    'required_approving_review_count': 1,  # Perhaps we should allow this to be greater than 1?
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Policy:
+    """
+    The standards one repository is held to. Settings that are not listed are not checked, and a policy that lists no
+    branch settings leaves the default branch alone - it is not even read. See github_standards.policy for how a policy
+    is loaded from a file.
+    """
+    repo_properties: Mapping[str, Any]
+    branch_protection: Mapping[str, Any]
+    pull_request_reviews: Mapping[str, Any]
+    required_signatures: bool
+    # branches, besides the default branch, held to the branch standards where they are protected
+    branch_patterns: Tuple[str, ...] = ()
+
+    @property
+    def repo_fields(self) -> Tuple[str, ...]:
+        return tuple(self.repo_properties)
+
+    @property
+    def checks_branch(self) -> bool:
+        return bool(self.branch_protection or self.pull_request_reviews or self.required_signatures)
+
+
+DEFAULT_POLICY = Policy(STANDARD_REPO_PROPERTIES, STANDARD_BRANCH_PROTECTION, STANDARD_PULL_REQUEST_REVIEWS,
+                        required_signatures=True)
+
+
+@dataclass(frozen=True, slots=True)
+class Finding:
+    """
+    A standard that is not met: the value it should have and the value it was found with.
+    """
+    rule: str
+    expected: Any
+    actual: Any
+
+
+@dataclass(frozen=True, slots=True)
+class CheckResult:
+    """
+    What a check found, and whether it put it right. Its str() is the comma-joined rules that were not met ('' when
+    every one was), as a repo action returns them.
+    """
+    findings: Tuple[Finding, ...] = ()
+    applied: bool = False
+
+    @property
+    def missing(self) -> List[str]:
+        return [finding.rule for finding in self.findings]
+
+    def __str__(self) -> str:
+        return ','.join(self.missing)
+
+
+def emit_findings(repo_name: str, result: CheckResult, branch: Optional[str] = None) -> None:
+    action = APPLIED if result.applied else REPORTED
+    for finding in result.findings:
+        emit(Event(FINDING, repo_name, finding.rule, branch, finding.expected, finding.actual, action))
+
+
+def repo_props_not_as_per_standards(snapshot: RepoSnapshot, policy: Policy = DEFAULT_POLICY) -> List[str]:
+    return [prop for prop, val in policy.repo_properties.items() if getattr(snapshot, prop) != val]
+
+
+def branch_protection_not_as_per_standards(snapshot: BranchSnapshot, policy: Policy = DEFAULT_POLICY) -> List[str]:
+    # an unprotected branch has no protection settings to compare, it just needs protecting
+    if not snapshot.protected:
+        return []
+    return [prop for prop, val in policy.branch_protection.items() if getattr(snapshot, prop) != val]
+
+
+def pull_request_reviews_not_as_per_standards(snapshot: BranchSnapshot, policy: Policy = DEFAULT_POLICY) -> List[str]:
+    return [prop for prop, val in policy.pull_request_reviews.items() if getattr(snapshot, prop) != val]
+
+
+def apply_repo_standards(repo: Repository, properties: Mapping[str, Any] = STANDARD_REPO_PROPERTIES) -> None:
+    repo.edit(**properties)
+
+
+def apply_branch_protection_standards(branch: Branch, protection: Optional[Mapping[str, Any]] = None) -> None:
+    # Each PUT to branch protection replaces the whole protection, so everything we want is sent in a single write -
+    # which is why callers pass the branch's current settings (BranchSnapshot.settings) with the standards over them
+    if protection is None:
+        protection = {**STANDARD_BRANCH_PROTECTION, **STANDARD_PULL_REQUEST_REVIEWS}
+    branch.edit_protection(**protection)
+
+
+def protection_write(snapshot: BranchSnapshot, policy: Policy = DEFAULT_POLICY) -> Dict[str, Any]:
+    """
+    The protection to write to bring a branch to standards: what it has now, with the standards over it.
+    """
+    return {**snapshot.settings, **policy.branch_protection, **policy.pull_request_reviews}
+
+
+def apply_required_signatures(branch: Branch) -> None:
+    # Required signatures have their own endpoint, GitHub does not accept them as part of the protection PUT
+    branch.add_required_signatures()
+
+
+def check_and_apply_standard_properties_to_repo(repo: Repository, do_actual_work: bool = False,
+                                                snapshot: Optional[RepoSnapshot] = None,
+                                                policy: Policy = DEFAULT_POLICY) -> CheckResult:
+    if snapshot is None:
+        snapshot = fetch_repo_snapshot(repo, policy.repo_fields)
 
-def check_and_apply_standard_properties_to_repo(repo: Repository, do_actual_work: bool = False) -> str:
     # check if repo is already in spec
-    standard_props = {
-        'allow_auto_merge': False,
-        'allow_merge_commit': True,
-        'allow_rebase_merge': False,
-        'allow_squash_merge': True,
-        'allow_update_branch': True,
-        'delete_branch_on_merge': True,
-        'has_discussions': True,
-        'has_issues': True,
-        'has_projects': False,
-        'has_wiki': False,
-        'web_commit_signoff_required': True
-    }
-
-    props_not_as_per_standards = ''
-    for prop, val in standard_props.items():
-        if getattr(repo, prop) != val:
-            print(f'        {prop} is not set to {val} in {repo.name}')
-            if props_not_as_per_standards != '':
-                props_not_as_per_standards = f'{props_not_as_per_standards},'
-            props_not_as_per_standards = props_not_as_per_standards + prop
-
-    if props_not_as_per_standards != '':
-        print(f'    Setting Standards for {repo.name} - missing {props_not_as_per_standards}')
-        if do_actual_work:
-            repo.edit(**standard_props)
-            print(f'        Repo Standards applied')
+    missing = repo_props_not_as_per_standards(snapshot, policy)
+    if missing and do_actual_work:
+        apply_repo_standards(repo, policy.repo_properties)
+
+    findings = tuple(Finding(prop, policy.repo_properties[prop], getattr(snapshot, prop)) for prop in missing)
+    result = CheckResult(findings, applied=do_actual_work and bool(findings))
+    emit_findings(repo.name, result)
+    return result
 
-    return props_not_as_per_standards
 
+def check_and_apply_standard_properties_to_branch(repo, branch: Branch, do_actual_work: bool = False,
+                                                  snapshot: Optional[BranchSnapshot] = None,
+                                                  policy: Policy = DEFAULT_POLICY) -> CheckResult:
+    if snapshot is None:
+        snapshot = fetch_branch_snapshot(branch)
 
-def check_and_apply_standard_properties_to_branch(repo, branch: Branch, do_actual_work: bool = False) -> str:
-    branch_protection: Optional[BranchProtection] = None
-    try:
-        branch_protection = branch.get_protection()
-    except GithubException:
-        # GH returns a 404 when Branch Protection is not yet enabled for the branch in question
-        print(f'    Branch {branch} is not protected in {repo.name}')
+    if not snapshot.protected:
+        # not a standard of its own (protecting the branch is how the others are met), but worth a line in the log
+        emit(Event(FINDING, repo.name, 'protected', branch.name, True, False, APPLIED if do_actual_work else REPORTED))
 
     # check if branch is already in spec
-    standard_branch_protection = {
-        'allow_deletions': False,
-        'allow_force_pushes': False,
-    }
-    props_not_as_per_standards = ''
-    if branch_protection is not None:
-        for prop, val in standard_branch_protection.items():
-            if getattr(branch_protection, prop) != val:
-                print(f'        {prop} is not set to {val} in {repo.name}')
-                if props_not_as_per_standards != '':
-                    props_not_as_per_standards = f'{props_not_as_per_standards},'
-                props_not_as_per_standards = props_not_as_per_standards + prop
-
-    if branch_protection is None or props_not_as_per_standards != '':
-        print(f'    Setting Standards for {repo.name} - missing {props_not_as_per_standards}')
-        if do_actual_work:
-            branch.edit_protection(**standard_branch_protection)
-            print(f'        Branch Standards applied')
-
-    standard_pull_request_reviews = {
-        'require_code_owner_reviews': True,
-        'required_approving_review_count': 1,  # Perhaps we should allow this to be greater than 1?
-    }
-    missing_pr_standards = ''
-    for prop, val in standard_pull_request_reviews.items():
-        if getattr(branch.get_required_pull_request_reviews(), prop) != val:
-            print(f'        {prop} is not set to {val} in {repo.name}')
-            if missing_pr_standards != '':
-                missing_pr_standards = f'{missing_pr_standards},'
-            missing_pr_standards = missing_pr_standards + prop
-
-    if missing_pr_standards != '':
-        print(f'    Setting Standards for {repo.name} - missing {missing_pr_standards}')
-        if do_actual_work:
-            branch.edit_protection(**standard_pull_request_reviews)
-            print(f'        Branch Standards applied')
-
-    if not branch.get_required_signatures():
-        print(f'        required_signatures is not set to True in {repo.name}')
-        if missing_pr_standards != '':
-            missing_pr_standards = f'{missing_pr_standards},'
-        missing_pr_standards = missing_pr_standards + 'required_signatures'
-        if do_actual_work:
-            branch.add_required_signatures()
-            print(f'        Branch required signatures applied')
+    missing_protection = branch_protection_not_as_per_standards(snapshot, policy)
+    missing_pr_reviews = pull_request_reviews_not_as_per_standards(snapshot, policy)
 
-    if missing_pr_standards != '':
-        props_not_as_per_standards = f'{props_not_as_per_standards},'
+    # only write protection when something it covers is out of standards
+    if do_actual_work and (not snapshot.protected or missing_protection or missing_pr_reviews):
+        apply_branch_protection_standards(branch, protection_write(snapshot, policy))
 
-    return props_not_as_per_standards + missing_pr_standards
+    missing_signatures = []
+    if policy.required_signatures and not snapshot.required_signatures:
+        missing_signatures.append('required_signatures')
+        if do_actual_work:
+            apply_required_signatures(branch)
+
+    standards = {**policy.branch_protection, **policy.pull_request_reviews, 'required_signatures': True}
+    missing = missing_protection + missing_pr_reviews + missing_signatures
+    result = CheckResult(tuple(Finding(prop, standards[prop], getattr(snapshot, prop)) for prop in missing),
+                         applied=do_actual_work and bool(missing))
+    emit_findings(repo.name, result, branch.name)
+    return result
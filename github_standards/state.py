@@ -0,0 +1,201 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+from github import GithubException
+from github.Organization import Organization
+from github.Repository import Repository
+
+from github_standards.runner import Tracker
+
+DEFAULT_FULL_SWEEP_DAYS = 7
+
+# Attributes that come back with the organisation repository listing (so reading them costs no extra requests) and
+# that a change to standards-relevant settings would show up in
+_FINGERPRINT_ATTRIBUTES = ['default_branch', 'has_discussions', 'has_issues', 'has_projects', 'has_wiki']
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def fingerprint(repo: Repository, custom_properties: Dict[str, Any]) -> str:
+    settings = {attribute: getattr(repo, attribute, None) for attribute in _FINGERPRINT_ATTRIBUTES}
+    settings['custom_properties'] = custom_properties
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _repo_state(repo: Repository, custom_properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'updated_at': _timestamp(getattr(repo, 'updated_at', None)),
+        'pushed_at': _timestamp(getattr(repo, 'pushed_at', None)),
+        'fingerprint': fingerprint(repo, custom_properties),
+    }
+
+
+class RunState:
+    """
+    What the previous runs saw of each repository, persisted as JSON between runs so an incremental run can skip
+    repositories that have not changed since they were last found to be as per standards.
+
+    Each repository recorded or forgotten is also appended to a journal next to the state file as it happens, so what a
+    run that dies part way through found out is not lost: the next run picks it up from the journal. `save` folds the
+    journal into the state file. `policy` is the digest of the standards policy this run records repositories against.
+    """
+
+    def __init__(self, path: str, policy: Optional[str] = None) -> None:
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self.run_policy = policy
+        self.repos: Dict[str, Dict[str, Any]] = {}
+        self.last_run: Optional[datetime] = None
+        self.last_full_sweep: Optional[datetime] = None
+        # digest of the standards policy the repos were recorded against
+        self.policy: Optional[str] = None
+        self.changed_by_events: Set[str] = set()
+        self._journal_started = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.repos = data.get('repos', {})
+            if data.get('last_run'):
+                self.last_run = datetime.fromisoformat(data['last_run'])
+            if data.get('last_full_sweep'):
+                self.last_full_sweep = datetime.fromisoformat(data['last_full_sweep'])
+            self.policy = data.get('policy')
+        if os.path.exists(self.journal_path):
+            self._replay_journal()
+
+    def _replay_journal(self) -> None:
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        saved_policy = self.policy
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the run died part way through writing its last line
+                continue
+            if 'policy' in entry:
+                # repos recorded against another policy than the rest, so the next incremental run is a full one
+                if entry['policy'] != saved_policy:
+                    self.policy = None
+            elif 'forget' in entry:
+                self.repos.pop(entry['forget'], None)
+            elif 'repo' in entry:
+                self.repos[entry['repo']] = entry['state']
+
+    def _journal(self, entry: Dict[str, Any]) -> None:
+        # called with the lock held. Opened for each entry, as there is one per repository at most
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            if not self._journal_started:
+                f.write(json.dumps({'policy': self.run_policy}) + '\n')
+                self._journal_started = True
+            f.write(json.dumps(entry) + '\n')
+
+    def full_sweep_due(self, full_sweep_days: int) -> bool:
+        if self.last_full_sweep is None:
+            return True
+        return datetime.now(timezone.utc) - self.last_full_sweep >= timedelta(days=full_sweep_days)
+
+    def load_changes_from_events(self, gh_org: Organization) -> None:
+        """
+        Notes every repository with organisation activity since the last run, to catch changes that do not move a
+        repository's `updated_at` / `pushed_at`. The events feed only covers recent public activity, so this is best
+        effort - the periodic full sweep is what catches anything else.
+        """
+        if self.last_run is None:
+            return
+        try:
+            for event in gh_org.get_events():
+                if event.created_at < self.last_run:
+                    break
+                if event.repo is not None:
+                    self.changed_by_events.add(event.repo.name.split('/')[-1])
+        except GithubException as e:
+            print(f'Organisation events are not available ({e.status}), relying on repository timestamps only')
+
+    def is_unchanged(self, repo: Repository, custom_properties: Dict[str, Any]) -> bool:
+        if repo.name in self.changed_by_events:
+            return False
+        with self._lock:
+            previous = self.repos.get(repo.name)
+        return previous is not None and previous == _repo_state(repo, custom_properties)
+
+    def record(self, repo: Repository, custom_properties: Dict[str, Any]) -> None:
+        state = _repo_state(repo, custom_properties)
+        with self._lock:
+            self.repos[repo.name] = state
+            self._journal({'repo': repo.name, 'state': state})
+
+    def forget(self, repo: Repository) -> None:
+        with self._lock:
+            self.repos.pop(repo.name, None)
+            self._journal({'forget': repo.name})
+
+    def save(self, full_sweep: bool) -> None:
+        now = datetime.now(timezone.utc)
+        self.policy = self.run_policy
+        self.last_run = now
+        if full_sweep:
+            self.last_full_sweep = now
+        data = {
+            'last_run': _timestamp(self.last_run),
+            'last_full_sweep': _timestamp(self.last_full_sweep),
+            'policy': self.policy,
+            'repos': dict(sorted(self.repos.items())),
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{self.path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(f'{self.path}.tmp', self.path)
+        with self._lock:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_started = False
+
+
+class StateRecorder(Tracker):
+    """
+    Records in `state` what each repository looked like once it has been dealt with, or forgets it when it may have
+    been left out of standards: it failed part way, or it was found out of standards by a dry run. Following the repo
+    action after a run's checkpoint (see runner.track), the repositories a resumed run skips are recorded too.
+    """
+
+    def __init__(self, state: RunState, properties_for: Callable[[str], Dict[str, Any]], dry_run: bool) -> None:
+        self.state = state
+        self.properties_for = properties_for
+        self.dry_run = dry_run
+
+    def finished(self, item: Any, missing: Optional[str], error: Optional[BaseException]) -> None:
+        if error is not None or (self.dry_run and missing):
+            self.state.forget(item)
+        else:
+            self.state.record(item, self.properties_for(item.name))
@@ -0,0 +1,513 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlparse
+
+from github_standards.properties import AUTO_APPLY_STANDARDS
+from github_standards.standards import STANDARD_REPO_PROPERTIES
+
+# Fields of the full repository that GitHub leaves out when listing an org's repositories, so reading them from a
+# listed repository costs a request per repository
+_FULL_REPOSITORY_ONLY = {'allow_auto_merge', 'allow_merge_commit', 'allow_rebase_merge', 'allow_squash_merge',
+                         'allow_update_branch', 'delete_branch_on_merge', 'web_commit_signoff_required'}
+
+# REST attribute -> GraphQL field, the reverse of github_standards.graphql._REPOSITORY_FIELDS
+_GRAPHQL_FIELDS = {
+    'allow_auto_merge': 'autoMergeAllowed',
+    'allow_merge_commit': 'mergeCommitAllowed',
+    'allow_rebase_merge': 'rebaseMergeAllowed',
+    'allow_squash_merge': 'squashMergeAllowed',
+    'allow_update_branch': 'allowUpdateBranch',
+    'delete_branch_on_merge': 'deleteBranchOnMerge',
+    'has_discussions': 'hasDiscussionsEnabled',
+    'has_issues': 'hasIssuesEnabled',
+    'has_projects': 'hasProjectsEnabled',
+    'has_wiki': 'hasWikiEnabled',
+    'web_commit_signoff_required': 'webCommitSignoffRequired',
+}
+
+IN_SPEC_PROTECTION = {'allow_deletions': False, 'allow_force_pushes': False, 'require_code_owner_reviews': True,
+                      'required_approving_review_count': 1, 'required_signatures': True}
+
+_TIMESTAMP = '2024-01-01T00:00:00Z'
+
+
+@dataclass
+class FakeRepo:
+    name: str
+    settings: Dict[str, bool] = field(default_factory=lambda: dict(STANDARD_REPO_PROPERTIES))
+    default_branch: str = 'main'
+    # None when the default branch is not protected
+    protection: Optional[Dict[str, Any]] = field(default_factory=lambda: dict(IN_SPEC_PROTECTION))
+    # the other branches, each with its protection (None when not protected)
+    branches: Dict[str, Optional[Dict[str, Any]]] = field(default_factory=dict)
+    custom_properties: Dict[str, str] = field(default_factory=lambda: {AUTO_APPLY_STANDARDS: 'true'})
+    topics: List[str] = field(default_factory=list)
+    visibility: str = 'public'
+    archived: bool = False
+    # an empty repository has no branches at all, not even its default branch
+    empty: bool = False
+
+
+def synthetic_org(size: int, drifted: float = 0.1, unprotected: float = 0.05, out_of_scope: float = 0.1,
+                  seed: int = 0) -> List[FakeRepo]:
+    """
+    `size` repositories, as per standards apart from the given fractions: `drifted` have some settings and branch
+    protection changed, `unprotected` have no protection on their default branch and `out_of_scope` do not have
+    Auto-Apply-Standards set. The same arguments always give the same organisation.
+    """
+    rng = random.Random(seed)
+    repos = []
+    for i in range(size):
+        repo = FakeRepo(f'repo-{i:05d}')
+        if rng.random() < out_of_scope:
+            repo.custom_properties = {AUTO_APPLY_STANDARDS: 'false'}
+        if rng.random() < drifted:
+            for setting in rng.sample(sorted(STANDARD_REPO_PROPERTIES), rng.randint(1, 3)):
+                repo.settings[setting] = not repo.settings[setting]
+            field_name = rng.choice(sorted(IN_SPEC_PROTECTION))
+            if field_name == 'required_approving_review_count':
+                repo.protection[field_name] = 0
+            else:
+                repo.protection[field_name] = not repo.protection[field_name]
+        if rng.random() < unprotected:
+            repo.protection = None
+        repos.append(repo)
+    return repos
+
+
+class FakeGitHub:
+    """
+    Just enough of the GitHub REST and GraphQL APIs, served locally, to run github_standards against an organisation
+    of `repos`. Writes change the repositories (and the org `rulesets`, by id), so a second run sees the result of the
+    first.
+
+    Every request is counted by method and route in `requests`, the writes among them in `writes` and the tokens they
+    were made with in `tokens`. `latency` seconds are added to every response to stand in for the network, and the
+    next `failures[route]` requests to a route (such as 'PATCH /repos/{org}/{repo}') are answered with a 502 to stand
+    in for an outage.
+    """
+
+    def __init__(self, org: str, repos: List[FakeRepo], latency: float = 0.0) -> None:
+        self.org = org
+        self.repos = {repo.name: repo for repo in repos}
+        self.latency = latency
+        self.rulesets: Dict[int, Dict[str, Any]] = {}
+        self.failures: Counter = Counter()
+        self.requests: Counter = Counter()
+        self.writes: Counter = Counter()
+        self.tokens: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def __enter__(self) -> 'FakeGitHub':
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    @property
+    def total_writes(self) -> int:
+        return sum(self.writes.values())
+
+    def count(self, method: str, route: str, authorization: Optional[str]) -> None:
+        with self._lock:
+            self.requests[f'{method} {route}'] += 1
+            if authorization:
+                self.tokens[authorization.split(' ', 1)[-1]] += 1
+            if method != 'GET' and route != '/graphql':
+                self.writes[f'{method} {route}'] += 1
+
+    def fail(self, route: str) -> bool:
+        with self._lock:
+            if self.failures[route] > 0:
+                self.failures[route] -= 1
+                return True
+            return False
+
+    # Responses
+
+    def org_json(self) -> Dict[str, Any]:
+        return {'login': self.org, 'name': self.org, 'url': f'{self.url}/orgs/{self.org}'}
+
+    def repo_json(self, repo: FakeRepo, full: bool = True) -> Dict[str, Any]:
+        data = {'name': repo.name, 'full_name': f'{self.org}/{repo.name}', 'url': f'{self.url}/repos/{self.org}/{repo.name}',
+                'default_branch': repo.default_branch, 'updated_at': _TIMESTAMP, 'pushed_at': _TIMESTAMP,
+                'topics': repo.topics, 'visibility': repo.visibility, 'private': repo.visibility != 'public',
+                'archived': repo.archived, 'fork': False}
+        data.update((setting, value) for setting, value in repo.settings.items()
+                    if full or setting not in _FULL_REPOSITORY_ONLY)
+        return data
+
+    @staticmethod
+    def branch_names(repo: FakeRepo) -> List[str]:
+        return [] if repo.empty else [repo.default_branch, *repo.branches]
+
+    @staticmethod
+    def protection_of(repo: FakeRepo, branch: str) -> Optional[Dict[str, Any]]:
+        return repo.protection if branch == repo.default_branch else repo.branches.get(branch)
+
+    def branch_json(self, repo: FakeRepo, branch: Optional[str] = None) -> Dict[str, Any]:
+        branch = branch or repo.default_branch
+        # names such as release/1.0 are escaped, so the protection URLs built on this one stay one path segment
+        url = f'{self.url}/repos/{self.org}/{repo.name}/branches/{quote(branch, safe="")}'
+        return {'name': branch, 'protected': self.protection_of(repo, branch) is not None, 'url': url,
+                'protection_url': f'{url}/protection', 'commit': {'sha': '0' * 40}}
+
+    def protection_json(self, repo: FakeRepo, branch: Optional[str] = None) -> Dict[str, Any]:
+        protection = self.protection_of(repo, branch or repo.default_branch)
+        return {'url': self.branch_json(repo, branch)['protection_url'],
+                'allow_deletions': {'enabled': protection['allow_deletions']},
+                'allow_force_pushes': {'enabled': protection['allow_force_pushes']},
+                'required_signatures': {'enabled': protection['required_signatures']},
+                # GitHub leaves the reviews out when they are not required
+                **({'required_pull_request_reviews': self.reviews_json(repo, branch)}
+                   if protection['required_approving_review_count'] > 0 else {}),
+                **({'required_status_checks': dict(protection['required_status_checks'], checks=[])}
+                   if protection.get('required_status_checks') else {}),
+                **({'enforce_admins': {'enabled': protection['enforce_admins']}} if 'enforce_admins' in protection
+                   else {})}
+
+    def reviews_json(self, repo: FakeRepo, branch: Optional[str] = None) -> Dict[str, Any]:
+        protection = self.protection_of(repo, branch or repo.default_branch)
+        return {'url': f'{self.branch_json(repo, branch)["protection_url"]}/required_pull_request_reviews',
+                'require_code_owner_reviews': protection['require_code_owner_reviews'],
+                'required_approving_review_count': protection['required_approving_review_count'],
+                'dismiss_stale_reviews': False}
+
+    def graphql_node(self, repo: FakeRepo) -> Dict[str, Any]:
+        rule = None
+        if repo.protection is not None:
+            rule = {'allowsDeletions': repo.protection['allow_deletions'],
+                    'allowsForcePushes': repo.protection['allow_force_pushes'],
+                    'requiresApprovingReviews': repo.protection['required_approving_review_count'] > 0,
+                    'requiresCodeOwnerReviews': repo.protection['require_code_owner_reviews'],
+                    'requiredApprovingReviewCount': repo.protection['required_approving_review_count'],
+                    'requiresCommitSignatures': repo.protection['required_signatures']}
+        node = {'name': repo.name, 'updatedAt': _TIMESTAMP, 'pushedAt': _TIMESTAMP,
+                'defaultBranchRef': {'name': repo.default_branch, 'branchProtectionRule': rule}}
+        node.update((graphql_field, repo.settings[setting]) for setting, graphql_field in _GRAPHQL_FIELDS.items())
+        return node
+
+    def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        page_size = int(re.search(r'first: (\d+)', query).group(1))
+        # the cursor is the name of the last repository on the previous page
+        names = sorted(self.repos)
+        start = bisect.bisect_right(names, variables['cursor']) if variables.get('cursor') else 0
+        page = names[start:start + page_size]
+        has_next_page = start + page_size < len(names)
+        return {'data': {'organization': {'repositories': {
+            'pageInfo': {'hasNextPage': has_next_page, 'endCursor': page[-1] if page else None},
+            'nodes': [self.graphql_node(self.repos[name]) for name in page],
+        }}}}
+
+    def search(self, query: str) -> List[FakeRepo]:
+        # the qualifiers github_standards searches with, each of which must match
+        repos = list(self.repos.values())
+        for qualifier in query.split():
+            name, _, value = qualifier.partition(':')
+            if name == 'org' and value != self.org:
+                return []
+            if name == 'topic':
+                repos = [repo for repo in repos if value in repo.topics]
+            elif name == 'is':
+                repos = [repo for repo in repos if repo.visibility == value]
+            elif name == 'archived':
+                repos = [repo for repo in repos if repo.archived == (value == 'true')]
+        return repos
+
+    def property_values_json(self, repo: FakeRepo) -> Dict[str, Any]:
+        return {'repository_id': hash(repo.name), 'repository_name': repo.name,
+                'repository_full_name': f'{self.org}/{repo.name}',
+                'properties': [{'property_name': name, 'value': value}
+                               for name, value in repo.custom_properties.items()]}
+
+    def ruleset_json(self, ruleset_id: int, full: bool = True) -> Dict[str, Any]:
+        ruleset = self.rulesets[ruleset_id]
+        data = {'id': ruleset_id, 'name': ruleset['name'], 'target': ruleset.get('target', 'branch'),
+                'source_type': 'Organization', 'source': self.org, 'enforcement': ruleset.get('enforcement'),
+                '_links': {'self': {'href': f'{self.url}/orgs/{self.org}/rulesets/{ruleset_id}'}}}
+        if full:
+            data.update(conditions=ruleset.get('conditions'), rules=ruleset.get('rules', []))
+        return data
+
+    # Writes
+
+    def edit_repo(self, repo: FakeRepo, body: Dict[str, Any]) -> None:
+        repo.settings.update((setting, value) for setting, value in body.items() if setting in repo.settings)
+
+    def edit_protection(self, repo: FakeRepo, body: Dict[str, Any], branch: Optional[str] = None) -> None:
+        branch = branch or repo.default_branch
+        reviews = body.get('required_pull_request_reviews') or {}
+        previous = self.protection_of(repo, branch)
+        protection = {'allow_deletions': bool(body.get('allow_deletions')),
+                      'allow_force_pushes': bool(body.get('allow_force_pushes')),
+                      'require_code_owner_reviews': bool(reviews.get('require_code_owner_reviews')),
+                      'required_approving_review_count': reviews.get('required_approving_review_count') or 0,
+                      'required_signatures': previous['required_signatures'] if previous is not None else False}
+        # the settings the standards do not cover, which a PUT without them turns off
+        if body.get('required_status_checks'):
+            protection['required_status_checks'] = body['required_status_checks']
+        if body.get('enforce_admins') is not None:
+            protection['enforce_admins'] = body['enforce_admins']
+        if branch == repo.default_branch:
+            repo.protection = protection
+        else:
+            repo.branches[branch] = protection
+
+
+_ROUTES = [
+    ('GET', r'/orgs/(?P<org>[^/]+)', 'org'),
+    ('GET', r'/orgs/(?P<org>[^/]+)/repos', 'org_repos'),
+    ('GET', r'/orgs/(?P<org>[^/]+)/properties/values', 'property_values'),
+    ('GET', r'/orgs/(?P<org>[^/]+)/events', 'events'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)', 'repo'),
+    ('PATCH', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)', 'edit_repo'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/properties/values', 'repo_property_values'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches', 'branches'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)', 'branch'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)/protection', 'protection'),
+    ('PUT', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)/protection', 'edit_protection'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)/protection/'
+            r'required_pull_request_reviews', 'reviews'),
+    ('GET', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)/protection/required_signatures',
+     'signatures'),
+    ('POST', r'/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)/branches/(?P<branch>[^/]+)/protection/required_signatures',
+     'add_signatures'),
+    ('GET', r'/orgs/(?P<org>[^/]+)/rulesets', 'rulesets'),
+    ('POST', r'/orgs/(?P<org>[^/]+)/rulesets', 'create_ruleset'),
+    ('GET', r'/orgs/(?P<org>[^/]+)/rulesets/(?P<ruleset_id>\d+)', 'ruleset'),
+    ('PUT', r'/orgs/(?P<org>[^/]+)/rulesets/(?P<ruleset_id>\d+)', 'edit_ruleset'),
+    ('GET', r'/search/repositories', 'search_repos'),
+    ('POST', r'/graphql', 'graphql'),
+]
+
+
+def _route_template(pattern: str) -> str:
+    return re.sub(r'\(\?P<(\w+)>[^)]*\)', lambda m: '{' + m.group(1) + '}', pattern)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep connections alive like GitHub does, without Nagle delaying the body that follows the headers
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: ThreadingHTTPServer
+
+    def do_GET(self) -> None:
+        self._handle('GET')
+
+    def do_POST(self) -> None:
+        self._handle('POST')
+
+    def do_PUT(self) -> None:
+        self._handle('PUT')
+
+    def do_PATCH(self) -> None:
+        self._handle('PATCH')
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _handle(self, method: str) -> None:
+        fake: FakeGitHub = self.server.fake
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        for route_method, pattern, name in _ROUTES:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                route = _route_template(pattern)
+                fake.count(method, route, self.headers.get('Authorization'))
+                if fake.fail(f'{method} {route}'):
+                    self._respond(502, {'message': 'Server Error'})
+                    return
+                if match.groupdict().get('org', fake.org) != fake.org:
+                    self._respond(404, {'message': 'Not Found'})
+                    return
+                with fake._lock:
+                    status, data, headers = getattr(self, f'_{name}')(fake, match.groupdict(), body,
+                                                                       parse_qs(url.query))
+                self._respond(status, data, headers)
+                return
+        fake.count(method, url.path, self.headers.get('Authorization'))
+        self._respond(404, {'message': 'Not Found'})
+
+    def _respond(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        fake: FakeGitHub = self.server.fake
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        # a limit far beyond any benchmark, so requests are counted but never held back
+        self.send_header('X-RateLimit-Limit', '100000000')
+        self.send_header('X-RateLimit-Remaining', str(100000000 - fake.total_requests))
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        resource = 'graphql' if self.path == '/graphql' else 'search' if self.path.startswith('/search/') else 'core'
+        self.send_header('X-RateLimit-Resource', resource)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _paginate(self, fake: FakeGitHub, render: Callable[[Any], Any], query: Dict[str, List[str]],
+                  repos: Optional[List[Any]] = None) -> Tuple[int, Any, Dict]:
+        # pages of GitHub's default size unless asked otherwise, and never more than its maximum of 100
+        per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+        page = int(query.get('page', ['1'])[0])
+        repos = list(fake.repos.values()) if repos is None else repos
+        headers = {}
+        if page * per_page < len(repos):
+            next_query = urlencode({**{name: values[0] for name, values in query.items()},
+                                    'per_page': per_page, 'page': page + 1})
+            headers['Link'] = f'<{fake.url}{urlparse(self.path).path}?{next_query}>; rel="next"'
+        return 200, [render(repo) for repo in repos[(page - 1) * per_page:page * per_page]], headers
+
+    def _repo(self, fake: FakeGitHub, params: Dict[str, str], *_) -> Tuple[int, Any, Dict]:
+        repo = fake.repos.get(params['repo'])
+        if repo is None:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, fake.repo_json(repo), {}
+
+    def _branch_protection(self, fake: FakeGitHub, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        repo = fake.repos.get(params['repo'])
+        if repo is None:
+            return None
+        return fake.protection_of(repo, unquote(params['branch']))
+
+    def _org(self, fake, params, body, query):
+        return 200, fake.org_json(), {}
+
+    def _org_repos(self, fake, params, body, query):
+        return self._paginate(fake, lambda repo: fake.repo_json(repo, full=False), query)
+
+    def _property_values(self, fake, params, body, query):
+        return self._paginate(fake, fake.property_values_json, query)
+
+    def _repo_property_values(self, fake, params, body, query):
+        repo = fake.repos.get(params['repo'])
+        if repo is None:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, fake.property_values_json(repo)['properties'], {}
+
+    def _events(self, fake, params, body, query):
+        return 200, [], {}
+
+    def _edit_repo(self, fake, params, body, query):
+        status, data, headers = self._repo(fake, params)
+        if status == 200:
+            fake.edit_repo(fake.repos[params['repo']], body)
+            data = fake.repo_json(fake.repos[params['repo']])
+        return status, data, headers
+
+    def _branches(self, fake, params, body, query):
+        repo = fake.repos.get(params['repo'])
+        if repo is None:
+            return 404, {'message': 'Not Found'}, {}
+        names = fake.branch_names(repo)
+        if query.get('protected') == ['true']:
+            names = [name for name in names if fake.protection_of(repo, name) is not None]
+        return self._paginate(fake, lambda name: fake.branch_json(repo, name), query, names)
+
+    def _branch(self, fake, params, body, query):
+        repo = fake.repos.get(params['repo'])
+        if repo is None or unquote(params['branch']) not in fake.branch_names(repo):
+            return 404, {'message': 'Branch not found'}, {}
+        return 200, fake.branch_json(repo, unquote(params['branch'])), {}
+
+    def _protection(self, fake, params, body, query):
+        if self._branch_protection(fake, params) is None:
+            return 404, {'message': 'Branch not protected'}, {}
+        return 200, fake.protection_json(fake.repos[params['repo']], unquote(params['branch'])), {}
+
+    def _edit_protection(self, fake, params, body, query):
+        repo = fake.repos.get(params['repo'])
+        if repo is None or unquote(params['branch']) not in fake.branch_names(repo):
+            return 404, {'message': 'Not Found'}, {}
+        fake.edit_protection(repo, body, unquote(params['branch']))
+        return 200, fake.protection_json(repo, unquote(params['branch'])), {}
+
+    def _reviews(self, fake, params, body, query):
+        protection = self._branch_protection(fake, params)
+        if protection is None or protection['required_approving_review_count'] == 0:
+            return 404, {'message': 'Required pull request reviews not enabled'}, {}
+        return 200, fake.reviews_json(fake.repos[params['repo']], unquote(params['branch'])), {}
+
+    def _signatures(self, fake, params, body, query):
+        protection = self._branch_protection(fake, params)
+        if protection is None:
+            return 404, {'message': 'Branch not protected'}, {}
+        protection_url = fake.branch_json(fake.repos[params['repo']], unquote(params['branch']))['protection_url']
+        return 200, {'url': f'{protection_url}/required_signatures', 'enabled': protection['required_signatures']}, {}
+
+    def _add_signatures(self, fake, params, body, query):
+        protection = self._branch_protection(fake, params)
+        if protection is None:
+            return 404, {'message': 'Branch not protected'}, {}
+        protection['required_signatures'] = True
+        protection_url = fake.branch_json(fake.repos[params['repo']], unquote(params['branch']))['protection_url']
+        return 200, {'url': f'{protection_url}/required_signatures', 'enabled': True}, {}
+
+    def _graphql(self, fake, params, body, query):
+        return 200, fake.graphql(body['query'], body.get('variables') or {}), {}
+
+    def _rulesets(self, fake, params, body, query):
+        return 200, [fake.ruleset_json(ruleset_id, full=False) for ruleset_id in sorted(fake.rulesets)], {}
+
+    def _create_ruleset(self, fake, params, body, query):
+        ruleset_id = max(fake.rulesets, default=0) + 1
+        fake.rulesets[ruleset_id] = body
+        return 201, fake.ruleset_json(ruleset_id), {}
+
+    def _ruleset(self, fake, params, body, query):
+        ruleset_id = int(params['ruleset_id'])
+        if ruleset_id not in fake.rulesets:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, fake.ruleset_json(ruleset_id), {}
+
+    def _edit_ruleset(self, fake, params, body, query):
+        ruleset_id = int(params['ruleset_id'])
+        if ruleset_id not in fake.rulesets:
+            return 404, {'message': 'Not Found'}, {}
+        fake.rulesets[ruleset_id].update(body)
+        return 200, fake.ruleset_json(ruleset_id), {}
+
+    def _search_repos(self, fake, params, body, query):
+        repos = fake.search(query['q'][0])
+        status, items, headers = self._paginate(fake, lambda repo: fake.repo_json(repo, full=False), query, repos)
+        return status, {'total_count': len(repos), 'incomplete_results': False, 'items': items}, headers
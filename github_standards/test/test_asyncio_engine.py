@@ -0,0 +1,132 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import unittest
+
+from github import GithubException
+
+from github_standards.asyncio_engine import RequestLimiter, apply_standards_to_repo_async, run_for_each_repo_async
+from github_standards.review import apply_standards_to_repo
+from github_standards.runner import run_for_each_repo
+from github_standards.standards import STANDARD_REPO_PROPERTIES
+
+# Repo settings and default branch protection as GitHub reported them, covering in spec, drifted and unprotected
+FIXTURES = [
+    {'name': 'in-spec', 'settings': {},
+     'protection': {'allow_deletions': False, 'allow_force_pushes': False},
+     'reviews': {'require_code_owner_reviews': True, 'required_approving_review_count': 1}, 'signatures': True},
+    {'name': 'drifted', 'settings': {'has_wiki': True, 'allow_rebase_merge': True},
+     'protection': {'allow_deletions': True, 'allow_force_pushes': False},
+     'reviews': {'require_code_owner_reviews': False, 'required_approving_review_count': 1}, 'signatures': False},
+    {'name': 'unprotected', 'settings': {'has_projects': True},
+     'protection': None, 'reviews': None, 'signatures': None},
+    {'name': 'master-branch', 'default_branch': 'master', 'settings': {},
+     'protection': {'allow_deletions': False, 'allow_force_pushes': True},
+     'reviews': {'require_code_owner_reviews': True, 'required_approving_review_count': 2}, 'signatures': True},
+]
+
+
+class _Record:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class _FakeBranch:
+    def __init__(self, fixture, writes):
+        self.name = fixture.get('default_branch', 'main')
+        self._fixture = fixture
+        self._writes = writes
+
+    def __repr__(self):
+        return f'Branch(name="{self.name}")'
+
+    def _read(self, key):
+        if self._fixture[key] is None:
+            raise GithubException(status=404, data=None)
+        return self._fixture[key]
+
+    def get_protection(self):
+        protection = self._read('protection')
+        return _Record(**protection, required_pull_request_reviews=_Record(**self._fixture['reviews']),
+                       raw_data={'required_signatures': {'enabled': self._fixture['signatures']}})
+
+    def edit_protection(self, **kwargs):
+        self._writes.append((self._fixture['name'], 'edit_protection', tuple(sorted(kwargs.items()))))
+
+    def add_required_signatures(self):
+        self._writes.append((self._fixture['name'], 'add_required_signatures', ()))
+
+
+class _FakeRepo:
+    def __init__(self, fixture, writes):
+        self.__dict__.update(STANDARD_REPO_PROPERTIES)
+        self.__dict__.update(fixture['settings'])
+        self.name = fixture['name']
+        self.default_branch = fixture.get('default_branch', 'main')
+        self._fixture = fixture
+        self._writes = writes
+
+    def get_branch(self, name):
+        return _FakeBranch(self._fixture, self._writes)
+
+    def edit(self, **kwargs):
+        self._writes.append((self.name, 'edit', tuple(sorted(kwargs.items()))))
+
+
+class TestAsyncioEngine(unittest.TestCase):
+    def _run_sync(self):
+        writes = []
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            summary = run_for_each_repo([_FakeRepo(f, writes) for f in FIXTURES],
+                                        lambda repo: apply_standards_to_repo(repo, True), workers=2)
+        return out.getvalue(), summary.report(), writes
+
+    def _run_async(self):
+        writes = []
+        out = io.StringIO()
+        limiter = RequestLimiter(3)
+        with contextlib.redirect_stdout(out):
+            summary = run_for_each_repo_async([_FakeRepo(f, writes) for f in FIXTURES],
+                                              lambda repo: apply_standards_to_repo_async(repo, limiter, True),
+                                              concurrency=3)
+        return out.getvalue(), summary.report(), writes
+
+    def test_same_output_summary_and_writes_as_sync_engine(self):
+        sync_output, sync_summary, sync_writes = self._run_sync()
+        async_output, async_summary, async_writes = self._run_async()
+
+        self.assertEqual(async_output, sync_output)
+        self.assertEqual(async_summary, sync_summary)
+        self.assertEqual(sorted(async_writes), sorted(sync_writes))
+        self.assertIn('drifted: allow_rebase_merge,has_wiki,allow_deletions,require_code_owner_reviews,'
+                      'required_signatures', async_summary)
+
+    def test_failures_are_recorded(self):
+        async def action(repo):
+            raise RuntimeError('boom')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = run_for_each_repo_async([_Record(name='bad')], action, concurrency=1)
+
+        self.assertEqual(summary.failed, {'bad': 'RuntimeError: boom'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.properties import AUTO_APPLY_STANDARDS
+from github_standards.test.fake_github import FakeGitHub, FakeRepo, synthetic_org
+
+try:
+    from benchmarks.__main__ import run_benchmark
+except ImportError:
+    # the harness is in the repository but not the package, so it is only there when the tests run from a checkout
+    run_benchmark = None
+
+needs_harness = unittest.skipIf(run_benchmark is None, 'the benchmarks package is not importable')
+
+PER_REPO_READS = ['GET /repos/{org}/{repo}',
+                  'GET /repos/{org}/{repo}/branches/{branch}',
+                  'GET /repos/{org}/{repo}/branches/{branch}/protection']
+
+# the reviews and signatures come with the protection, so they are never read on their own
+SUB_RESOURCE_READS = ['GET /repos/{org}/{repo}/branches/{branch}/protection/required_pull_request_reviews',
+                      'GET /repos/{org}/{repo}/branches/{branch}/protection/required_signatures']
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    Smoke tests for the benchmark harness, which also pin down how many requests a run makes per repo.
+    """
+
+    @needs_harness
+    def test_dry_run_request_counts(self):
+        in_scope = sum(1 for repo in synthetic_org(50) if repo.custom_properties[AUTO_APPLY_STANDARDS] == 'true')
+
+        result = run_benchmark(50, ['--dry-run'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.writes, 0)
+        for route in PER_REPO_READS:
+            self.assertEqual(result.requests_by_route[route], in_scope, route)
+        for route in SUB_RESOURCE_READS:
+            self.assertNotIn(route, result.requests_by_route)
+
+    @needs_harness
+    def test_graphql_dry_run_makes_no_per_repo_requests(self):
+        result = run_benchmark(250, ['--dry-run', '--graphql'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.requests_by_route['POST /graphql'], 3)
+        for route in PER_REPO_READS:
+            self.assertNotIn(route, result.requests_by_route)
+
+    def test_second_run_finds_nothing_to_do(self):
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+        unprotected = FakeRepo('unprotected', protection=None)
+        repos = [FakeRepo('in-spec'), drifted, unprotected]
+
+        with FakeGitHub(GH_ORG_NAME, repos) as fake, mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), \
+                contextlib.redirect_stdout(io.StringIO()):
+            main(['--api-url', fake.url])
+            writes = dict(fake.writes)
+            fake.writes.clear()
+            main(['--api-url', fake.url])
+
+        self.assertEqual(writes, {'PATCH /repos/{org}/{repo}': 1,
+                                  'PUT /repos/{org}/{repo}/branches/{branch}/protection': 1,
+                                  'POST /repos/{org}/{repo}/branches/{branch}/protection/required_signatures': 1})
+        self.assertEqual(dict(fake.writes), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
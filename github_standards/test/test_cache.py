@@ -0,0 +1,138 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from github import Auth, Github
+
+from github_standards.cache import ConditionalRequestCache
+from github_standards.credentials import CredentialPool
+from github_standards.transport import install_middleware
+
+ORG = {'login': 'my-org', 'url': 'http://127.0.0.1/orgs/my-org', 'name': 'My Org'}
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    calls = []
+
+    def do_GET(self):
+        _ETagHandler.calls.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.send_header('X-RateLimit-Remaining', '4999')
+            self.end_headers()
+            return
+        body = json.dumps(dict(ORG, name=f'My Org {self.etag}')).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', self.etag)
+        self.send_header('X-RateLimit-Remaining', '4998')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConditionalRequestCache(unittest.TestCase):
+    def setUp(self):
+        _ETagHandler.etag = '"v1"'
+        _ETagHandler.calls = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_dir.cleanup()
+
+    def _get_org_name(self, cache, auth=None):
+        with Github(auth=auth or Auth.Token('token'), base_url=self.base_url, retry=None) as gh:
+            install_middleware(gh, cache)
+            return gh.get_organization('my-org').name
+
+    def test_second_run_is_served_from_cache(self):
+        first = ConditionalRequestCache(self.cache_dir.name)
+        self.assertEqual(self._get_org_name(first), 'My Org "v1"')
+
+        # a fresh cache object over the same directory, as a new run would have
+        second = ConditionalRequestCache(self.cache_dir.name)
+        self.assertEqual(self._get_org_name(second), 'My Org "v1"')
+
+        self.assertEqual(_ETagHandler.calls, [None, '"v1"'])
+        self.assertEqual(second.revalidated, 1)
+
+    def test_entries_outlast_the_token_of_an_installation(self):
+        installation = Auth.AppInstallationAuth(Auth.AppAuth(1, 'private key'), 2)
+        # a run an hour after the last, by when the installation has a new token
+        for token in ('first hour', 'second hour'):
+            pool = CredentialPool([installation])
+            cache = ConditionalRequestCache(self.cache_dir.name, credential_of=pool.credential_of)
+            with mock.patch.object(Auth.AppInstallationAuth, 'token', new_callable=mock.PropertyMock,
+                                   return_value=token):
+                self.assertEqual(self._get_org_name(cache, pool), 'My Org "v1"')
+
+        self.assertEqual(_ETagHandler.calls, [None, '"v1"'])
+        self.assertEqual(cache.revalidated, 1)
+
+    def test_changed_resource_is_refetched(self):
+        cache = ConditionalRequestCache(self.cache_dir.name)
+        self._get_org_name(cache)
+        _ETagHandler.etag = '"v2"'
+
+        self.assertEqual(self._get_org_name(cache), 'My Org "v2"')
+        self.assertEqual(cache.revalidated, 0)
+
+    def test_cache_is_trimmed_to_max_bytes(self):
+        cache = ConditionalRequestCache(self.cache_dir.name, max_bytes=1)
+        self._get_org_name(cache)
+
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+
+    def test_least_recently_used_are_evicted_to_the_low_water_mark(self):
+        entry = {'body': 'x' * 90}
+        size = len(json.dumps(entry))
+        cache = ConditionalRequestCache(self.cache_dir.name, max_bytes=size * 10)
+        for n in range(10):
+            cache._write(f'{n}.json', entry)
+        cache._read('0.json')
+
+        # one over the limit evicts down to 90% of it: the two least recently used entries, 1 and 2
+        cache._write('10.json', entry)
+        self.assertEqual(sorted(os.listdir(self.cache_dir.name), key=lambda n: int(n.split('.')[0])),
+                         ['0.json', *(f'{n}.json' for n in range(3, 11))])
+
+        # and a new run picks the entries up from the directory
+        reopened = ConditionalRequestCache(self.cache_dir.name, max_bytes=size * 10)
+        self.assertEqual(reopened._total, size * 9)
+        self.assertEqual(len(reopened._sizes), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
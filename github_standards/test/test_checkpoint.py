@@ -0,0 +1,124 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from github_standards import __main__ as cli
+from github_standards.checkpoint import Checkpoint
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+RUN = {'org': 'my-org', 'command': 'run'}
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+
+    def test_resume_skips_what_was_done(self):
+        checkpoint = Checkpoint(self.path, RUN)
+        checkpoint.done('first', '')
+        checkpoint.done('second', 'has_wiki')
+        checkpoint.close(finished=False)
+
+        resumed = Checkpoint(self.path, RUN, resume=True)
+        seen = []
+        action = resumed.track(lambda repo: seen.append(repo.name) or '')
+        with contextlib.redirect_stdout(io.StringIO()):
+            outcomes = [action(SimpleNamespace(name=name)) for name in ['first', 'second', 'third']]
+        resumed.close(finished=True)
+
+        self.assertEqual(outcomes, ['', 'has_wiki', ''])
+        self.assertEqual(seen, ['third'])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_without_resume_starts_over(self):
+        checkpoint = Checkpoint(self.path, RUN)
+        checkpoint.done('first', '')
+        checkpoint.close(finished=False)
+
+        checkpoint = Checkpoint(self.path, RUN)
+        checkpoint.close(finished=False)
+        self.assertEqual(checkpoint.resumed, {})
+
+    def test_different_run_is_refused(self):
+        Checkpoint(self.path, RUN).close(finished=False)
+
+        with self.assertRaisesRegex(ValueError, 'different run'):
+            Checkpoint(self.path, dict(RUN, command='apply'), resume=True)
+
+    def test_torn_last_line_and_interrupted_writes(self):
+        with open(self.path, 'w') as f:
+            f.write(json.dumps({'run': RUN}) + '\n')
+            f.write(json.dumps({'write': 1, 'repo': 'first', 'request': 'PATCH /repos/my-org/first'}) + '\n')
+            f.write(json.dumps({'written': 1, 'status': 200}) + '\n')
+            f.write(json.dumps({'done': 'first', 'missing': 'has_wiki'}) + '\n')
+            f.write(json.dumps({'write': 2, 'repo': 'second', 'request': 'PATCH /repos/my-org/second'}) + '\n')
+            f.write('{"done": "sec')
+
+        checkpoint = Checkpoint(self.path, RUN, resume=True)
+        checkpoint.close(finished=False)
+
+        self.assertEqual(checkpoint.resumed, {'first': 'has_wiki'})
+        self.assertEqual(checkpoint.interrupted_writes, [('second', 'PATCH /repos/my-org/second')])
+        self.assertIn('PATCH /repos/my-org/second was sent but not answered', checkpoint.report())
+
+
+class TestResume(unittest.TestCase):
+
+    def test_interrupted_run_is_resumed(self):
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+        repos = [FakeRepo(f'repo-{n}') for n in range(4)]
+        repos[3].settings['has_wiki'] = True
+        original = cli.apply_standards_to_repo
+
+        def fail_on_repo_2(repo, **kwargs):
+            if repo.name == 'repo-2':
+                raise ConnectionError('network is down')
+            return original(repo, **kwargs)
+
+        with FakeGitHub(cli.GH_ORG_NAME, repos) as fake, mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}):
+            with mock.patch.object(cli, 'apply_standards_to_repo', fail_on_repo_2), \
+                    contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                cli.main(['--api-url', fake.url, '--checkpoint-file', path])
+            self.assertTrue(os.path.exists(path))
+
+            fake.requests.clear()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                cli.main(['--api-url', fake.url, '--checkpoint-file', path, '--resume'])
+
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}'], 1)
+        self.assertIn('repo-3 skipped as it was done before the run was resumed', output.getvalue())
+        # what was found before the resume is still in the summary
+        self.assertIn('repo-3: has_wiki', output.getvalue())
+        self.assertFalse(os.path.exists(path))
+
+    def test_resume_needs_checkpoint_file(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.parse_args(['--resume'])
+
+
+if __name__ == '__main__':
+    unittest.main()
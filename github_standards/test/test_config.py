@@ -0,0 +1,110 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from github_standards.__main__ import main
+from github_standards.config import CredentialConfig, OrgConfig, load_config
+from github_standards.test.fake_github import FakeGitHub, synthetic_org
+
+
+class TestLoadConfig(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'orgs.toml')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _load(self, text):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return load_config(self.path)
+
+    def test_orgs_and_credentials(self):
+        orgs = self._load('''
+[[orgs]]
+name = "first-org"
+credentials = [
+    { token_env = "FIRST_TOKEN" },
+    { app_id = 12345, private_key_file = "app.pem" },
+]
+
+[[orgs]]
+name = "second-org"
+credentials = [{ app_id = 12345, private_key_env = "APP_KEY", installation_id = 42 }]
+''')
+
+        self.assertEqual(orgs, [
+            OrgConfig('first-org', (CredentialConfig(token_env='FIRST_TOKEN'),
+                                    CredentialConfig(app_id=12345, private_key_file='app.pem'))),
+            OrgConfig('second-org', (CredentialConfig(app_id=12345, private_key_env='APP_KEY', installation_id=42),)),
+        ])
+
+    def test_invalid_configs(self):
+        for text in ('',
+                     '[[orgs]]\ncredentials = [{ token_env = "T" }]',
+                     '[[orgs]]\nname = "org"',
+                     '[[orgs]]\nname = "org"\ncredentials = [{ token = "secret" }]',
+                     '[[orgs]]\nname = "org"\ncredentials = [{ token_env = "T", app_id = 1, private_key_env = "K" }]',
+                     '[[orgs]]\nname = "org"\ncredentials = [{ app_id = 1 }]',
+                     '[[orgs]]\nname = "org"\ncredentials = [{ token_env = "T" }]\n'
+                     '[[orgs]]\nname = "org"\ncredentials = [{ token_env = "T" }]'):
+            with self.assertRaises(ValueError, msg=text):
+                self._load(text)
+
+
+class TestMultipleOrgs(unittest.TestCase):
+    def test_orgs_run_separately(self):
+        with tempfile.TemporaryDirectory() as directory, FakeGitHub('fake-org', synthetic_org(5)) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}):
+            config = os.path.join(directory, 'orgs.toml')
+            with open(config, 'w', encoding='utf-8') as f:
+                f.write('[[orgs]]\nname = "missing-org"\ncredentials = [{ token_env = "GH_TOKEN" }]\n'
+                        '[[orgs]]\nname = "fake-org"\ncredentials = [{ token_env = "GH_TOKEN" }]\n')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), self.assertRaises(SystemExit) as exit_code:
+                main(['--api-url', fake.url, '--config', config, '--dry-run',
+                      '--state-file', os.path.join(directory, '{org}.json')])
+
+            self.assertTrue(os.path.exists(os.path.join(directory, 'fake-org.json')))
+
+        # the org that does not exist fails on its own, and each org's output is kept together in config order
+        self.assertEqual(exit_code.exception.code, 1)
+        output = out.getvalue()
+        missing_org, fake_org = output.split('Org fake-org:\n')
+        self.assertTrue(missing_org.startswith('Org missing-org:\n'))
+        self.assertIn('404', missing_org)
+        self.assertIn('Summary: 5 repos processed', fake_org)
+
+    def test_paths_must_be_per_org(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, 'orgs.toml')
+            with open(config, 'w', encoding='utf-8') as f:
+                f.write('[[orgs]]\nname = "a"\ncredentials = [{ token_env = "GH_TOKEN" }]\n'
+                        '[[orgs]]\nname = "b"\ncredentials = [{ token_env = "GH_TOKEN" }]\n')
+            with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                main(['--config', config, '--state-file', 'state.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from github import Auth
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.config import CredentialConfig, OrgConfig
+from github_standards.credentials import CredentialPool, credential_pool
+from github_standards.test.fake_github import FakeGitHub, synthetic_org
+
+
+def _request_with(token):
+    request = PreparedRequest()
+    request.prepare(method='GET', url='https://api.github.com/orgs/my-org', headers={'Authorization': f'token {token}'})
+    return request
+
+
+def _send_with(pool, remaining, reset=3600):
+    request = _request_with(pool.token)
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Reset': str(reset),
+                                            'X-RateLimit-Resource': 'core'})
+    return pool.send(request, lambda r: response)
+
+
+class TestCredentialPool(unittest.TestCase):
+    def test_unused_credentials_are_tried_in_turn(self):
+        pool = CredentialPool([Auth.Token('a'), Auth.Token('b'), Auth.Token('c')], clock=lambda: 0)
+
+        self.assertEqual([pool.token for _ in range(6)], ['a', 'b', 'c', 'a', 'b', 'c'])
+
+    def test_credential_with_most_left_is_used(self):
+        pool = CredentialPool([Auth.Token('a'), Auth.Token('b')], clock=lambda: 0)
+        _send_with(pool, remaining=100)
+        _send_with(pool, remaining=4000)
+
+        self.assertEqual([pool.token for _ in range(3)], ['b', 'b', 'b'])
+
+    def test_credential_is_full_again_after_its_reset(self):
+        now = [0]
+        pool = CredentialPool([Auth.Token('a'), Auth.Token('b')], clock=lambda: now[0])
+        _send_with(pool, remaining=10, reset=100)
+        _send_with(pool, remaining=4000, reset=3600)
+
+        now[0] = 200
+        self.assertEqual(pool.token, 'a')
+
+    def test_credential_is_named_the_same_when_its_token_changes(self):
+        installation = Auth.AppInstallationAuth(Auth.AppAuth(1, 'private key'), 2)
+        pool = CredentialPool([installation, Auth.Token('a')], clock=lambda: 0)
+
+        names = []
+        # the pool takes turns, so each hour it authenticates one request with the installation and one with the token
+        for token in ('first hour', 'second hour'):
+            with mock.patch.object(Auth.AppInstallationAuth, 'token', new_callable=mock.PropertyMock,
+                                   return_value=token):
+                names.extend(pool.credential_of(_request_with(pool.token)) for _ in range(2))
+
+        # a personal access token is named by its hash
+        token_name = f'token {hashlib.sha256(b"a").hexdigest()[:16]}'
+        self.assertEqual(names, ['app 1 installation 2', token_name] * 2)
+        self.assertIsNone(pool.credential_of(_request_with('not from the pool')))
+
+    def test_missing_token(self):
+        org = OrgConfig('my-org', (CredentialConfig(token_env='NO_SUCH_TOKEN_VARIABLE'),))
+        with mock.patch.dict(os.environ, {}, clear=True):
+            with self.assertRaisesRegex(ValueError, 'NO_SUCH_TOKEN_VARIABLE environment variable not set'):
+                credential_pool(org, 'https://api.github.com')
+
+    def test_run_is_spread_across_tokens(self):
+        with tempfile.TemporaryDirectory() as directory, FakeGitHub(GH_ORG_NAME, synthetic_org(20)) as fake, \
+                mock.patch.dict(os.environ, {'FIRST_TOKEN': 'first', 'SECOND_TOKEN': 'second'}), \
+                contextlib.redirect_stdout(io.StringIO()):
+            config = os.path.join(directory, 'orgs.toml')
+            with open(config, 'w', encoding='utf-8') as f:
+                f.write(f'[[orgs]]\nname = "{GH_ORG_NAME}"\n'
+                        'credentials = [{ token_env = "FIRST_TOKEN" }, { token_env = "SECOND_TOKEN" }]\n')
+            main(['--api-url', fake.url, '--config', config, '--dry-run'])
+
+        self.assertEqual(set(fake.tokens), {'first', 'second'})
+        self.assertLessEqual(abs(fake.tokens['first'] - fake.tokens['second']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.events import FINDING, REPORTED, Event, EventLog, emit, read_events, render
+from github_standards.runner import run_for_each_repo
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'events', 'log.jsonl')
+
+    def test_events_of_each_repo_are_kept_together(self):
+        log = EventLog(self.path)
+
+        def action(repo):
+            for rule in ['has_wiki', 'has_projects']:
+                emit(Event(FINDING, repo.name, rule, expected=False, actual=True, action=REPORTED))
+            return 'has_wiki,has_projects'
+
+        repos = [SimpleNamespace(name=f'repo-{n:03d}') for n in range(200)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_for_each_repo(repos, log.track(action), workers=8)
+        log.close()
+
+        events = list(read_events(self.path))
+        self.assertEqual(log.written, 600)
+        self.assertEqual(len(events), 600)
+        for i in range(0, 600, 3):
+            names = {event['repo'] for event in events[i:i + 3]}
+            self.assertEqual(len(names), 1)
+            self.assertEqual([event['type'] for event in events[i:i + 3]], ['finding', 'finding', 'repo'])
+            self.assertEqual(events[i + 2]['missing'], ['has_wiki', 'has_projects'])
+
+    def test_outcomes(self):
+        log = EventLog(self.path, clock=iter(range(100)).__next__)
+
+        def action(repo):
+            if repo.name == 'broken':
+                raise ValueError('no such branch')
+            return None if repo.name == 'skipped' else ''
+
+        tracked = log.track(action)
+        tracked(SimpleNamespace(name='ok'))
+        tracked(SimpleNamespace(name='skipped'))
+        with self.assertRaises(ValueError):
+            tracked(SimpleNamespace(name='broken'))
+
+        async def async_action(repo):
+            await asyncio.to_thread(emit, Event(FINDING, repo.name, 'has_wiki', expected=False, actual=True))
+            return 'has_wiki'
+
+        asyncio.run(log.track_async(async_action)(SimpleNamespace(name='async')))
+        log.close()
+
+        events = list(read_events(self.path))
+        self.assertEqual([(event['repo'], event.get('action')) for event in events],
+                         [('ok', 'assessed'), ('skipped', 'skipped'), ('broken', 'failed'), ('async', None),
+                          ('async', 'assessed')])
+        self.assertEqual(events[0]['duration'], 1)
+        self.assertEqual(events[2]['error'], 'ValueError: no such branch')
+
+    def test_emitting_outside_a_repo_only_prints(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            emit(Event(FINDING, 'repo', 'has_wiki', expected=False, actual=True, action=REPORTED))
+        self.assertEqual(output.getvalue(), 'repo has_wiki is True, expected False (reported)\n')
+
+    def test_without_a_path_outcomes_are_only_printed(self):
+        log = EventLog(clock=iter(range(100)).__next__)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            log.track(lambda repo: 'has_wiki')(SimpleNamespace(name='repo'))
+        log.close()
+        self.assertEqual(output.getvalue(), 'repo assessed in 1.00s - missing has_wiki\n')
+        self.assertEqual(log.written, 0)
+
+    def test_torn_last_line_is_left_out(self):
+        with open(self.path.replace('events/', ''), 'w') as f:
+            f.write('{"type": "repo", "repo": "a", "action": "skipped"}\n{"type": "rep')
+        self.assertEqual(len(list(read_events(self.path.replace('events/', '')))), 1)
+
+    def test_render(self):
+        self.assertEqual(render({'time': 't', 'type': 'finding', 'repo': 'a', 'branch': 'main', 'rule': 'has_wiki',
+                                 'expected': False, 'actual': True, 'action': 'applied'}),
+                         't a:main has_wiki is True, expected False (applied)')
+        self.assertEqual(render({'time': 't', 'type': 'repo', 'repo': 'a', 'action': 'assessed', 'duration': 0.5,
+                                 'missing': ['has_wiki']}),
+                         't a assessed in 0.50s - missing has_wiki')
+        self.assertEqual(render({'type': 'note', 'repo': 'a', 'branch': 'master', 'message': 'no branch master'}),
+                         'a:master no branch master')
+
+
+class TestEventLogAgainstFakeGitHub(unittest.TestCase):
+
+    def test_run_logs_what_it_found(self):
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+        drifted.protection['allow_force_pushes'] = True
+
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, [drifted, FakeRepo('fine')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(tmp, 'events.jsonl')
+            main(['--api-url', fake.url, '--dry-run', '--event-log', path])
+            events = list(read_events(path))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(['render-events', path, '--repo', 'drifted'])
+
+        findings = [(event['repo'], event.get('branch'), event['rule'], event['expected'], event['actual'])
+                    for event in events if event['type'] == 'finding']
+        self.assertEqual(findings, [('drifted', None, 'has_wiki', False, True),
+                                    ('drifted', 'main', 'allow_force_pushes', False, True)])
+        self.assertEqual({event['repo']: event['missing'] for event in events if event['type'] == 'repo'},
+                         {'drifted': ['has_wiki', 'allow_force_pushes'], 'fine': []})
+        self.assertIn('drifted:main allow_force_pushes is True, expected False (reported)', output.getvalue())
+        self.assertNotIn('fine', output.getvalue())
+
+    def test_console_reads_as_the_log_does(self):
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, [drifted, FakeRepo('fine')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}):
+            path = os.path.join(tmp, 'events.jsonl')
+            console = io.StringIO()
+            with contextlib.redirect_stdout(console):
+                main(['--api-url', fake.url, '--dry-run', '--workers', '1', '--event-log', path])
+            rendered = [render({name: value for name, value in event.items() if name != 'time'})
+                        for event in read_events(path)]
+
+        self.assertEqual(console.getvalue().splitlines()[:len(rendered)], rendered)
+        self.assertEqual(rendered[0], 'drifted has_wiki is True, expected False (reported)')
+
+
+if __name__ == '__main__':
+    unittest.main()
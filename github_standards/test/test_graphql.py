@@ -0,0 +1,156 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from unittest import mock
+from unittest.mock import MagicMock
+
+from github import GithubException
+
+from github_standards import graphql, standards
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.properties import CustomPropertyIndex
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+PROPERTIES = CustomPropertyIndex({'repo-a': {'Auto-Apply-Standards': 'true'}})
+
+
+def _node(name, rule=None, **overrides):
+    node = {
+        'name': name,
+        'autoMergeAllowed': False,
+        'mergeCommitAllowed': True,
+        'rebaseMergeAllowed': False,
+        'squashMergeAllowed': True,
+        'allowUpdateBranch': True,
+        'deleteBranchOnMerge': True,
+        'hasDiscussionsEnabled': True,
+        'hasIssuesEnabled': True,
+        'hasProjectsEnabled': False,
+        'hasWikiEnabled': False,
+        'webCommitSignoffRequired': True,
+        'defaultBranchRef': {'name': 'main', 'branchProtectionRule': rule},
+    }
+    node.update(overrides)
+    return node
+
+
+IN_SPEC_RULE = {
+    'allowsDeletions': False,
+    'allowsForcePushes': False,
+    'requiresApprovingReviews': True,
+    'requiresCodeOwnerReviews': True,
+    'requiredApprovingReviewCount': 1,
+    'requiresCommitSignatures': True,
+}
+
+
+def _page(nodes, end_cursor=None):
+    return {}, {'data': {'organization': {'repositories': {
+        'pageInfo': {'hasNextPage': end_cursor is not None, 'endCursor': end_cursor},
+        'nodes': nodes,
+    }}}}
+
+
+def _mock_org(*pages):
+    gh_org = MagicMock()
+    gh_org.login = 'my-org'
+    gh_org._requester.graphql_query.side_effect = list(pages)
+    return gh_org
+
+
+class TestBulkSnapshot(unittest.TestCase):
+    def test_pages_are_followed_with_cursor(self):
+        gh_org = _mock_org(_page([_node('repo-a')], end_cursor='c1'), _page([_node('repo-b')]))
+
+        repos = list(graphql.get_org_repositories(gh_org, PROPERTIES))
+
+        self.assertEqual([r.name for r in repos], ['repo-a', 'repo-b'])
+        self.assertEqual(repos[0].custom_properties, {'Auto-Apply-Standards': 'true'})
+        self.assertEqual(repos[1].custom_properties, {})
+        cursors = [c.args[1]['cursor'] for c in gh_org._requester.graphql_query.call_args_list]
+        self.assertEqual(cursors, [None, 'c1'])
+
+    def test_in_spec_repo_passes_existing_checks(self):
+        repo = list(graphql.get_org_repositories(_mock_org(_page([_node('repo-a', IN_SPEC_RULE)])), PROPERTIES))[0]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(str(standards.check_and_apply_standard_properties_to_repo(repo)), '')
+            branch = repo.get_branch(repo.default_branch)
+            self.assertEqual(str(standards.check_and_apply_standard_properties_to_branch(repo, branch)), '')
+
+    def test_out_of_spec_repo_is_reported_by_existing_checks(self):
+        rule = dict(IN_SPEC_RULE, allowsForcePushes=True, requiresCommitSignatures=False)
+        repo = list(graphql.get_org_repositories(
+            _mock_org(_page([_node('repo-a', rule, hasWikiEnabled=True)])), PROPERTIES))[0]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(str(standards.check_and_apply_standard_properties_to_repo(repo)), 'has_wiki')
+            branch = repo.get_branch(repo.default_branch)
+            self.assertEqual(str(standards.check_and_apply_standard_properties_to_branch(repo, branch)),
+                             'allow_force_pushes,required_signatures')
+
+    def test_unprotected_default_branch(self):
+        repo = list(graphql.get_org_repositories(_mock_org(_page([_node('repo-a')])), PROPERTIES))[0]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = standards.check_and_apply_standard_properties_to_branch(repo, repo.get_branch('main'))
+
+        self.assertEqual(str(result), 'require_code_owner_reviews,required_approving_review_count,required_signatures')
+
+
+class TestBulkPlanAgainstFakeGitHub(unittest.TestCase):
+    def test_bulk_plan_applies_like_a_rest_plan(self):
+        unprotected = FakeRepo('unprotected', protection=None)
+        reviews_off = FakeRepo('reviews-off')
+        reviews_off.protection.update(require_code_owner_reviews=False, required_approving_review_count=0)
+        repos = [unprotected, reviews_off]
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, repos) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            bulk_path, rest_path = os.path.join(tmp, 'bulk.json'), os.path.join(tmp, 'rest.json')
+            main(['--api-url', fake.url, '--graphql', 'plan', bulk_path])
+            main(['--api-url', fake.url, 'plan', rest_path])
+            with open(bulk_path) as bulk, open(rest_path) as rest:
+                self.assertEqual(json.load(bulk)['repos'], json.load(rest)['repos'])
+
+            # apply re-reads each branch over REST, which must find it as the bulk query did
+            main(['--api-url', fake.url, 'apply', bulk_path])
+
+        for repo in repos:
+            self.assertEqual(repo.protection['required_approving_review_count'], 1, repo.name)
+            self.assertTrue(repo.protection['require_code_owner_reviews'], repo.name)
+            self.assertTrue(repo.protection['required_signatures'], repo.name)
+
+    def test_reviews_that_are_not_required_are_not_found(self):
+        repos = list(graphql.get_org_repositories(_mock_org(_page([
+            _node('repo-a', dict(IN_SPEC_RULE, requiresApprovingReviews=False)), _node('repo-b')])), PROPERTIES))
+
+        for repo in repos:
+            with self.subTest(repo.name), self.assertRaises(GithubException) as raised:
+                repo.get_branch('main').get_required_pull_request_reviews()
+            self.assertEqual(raised.exception.status, 404)
+        self.assertIsNone(repos[0].get_branch('main').get_protection().required_pull_request_reviews)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from github import GithubException
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.history import History
+from github_standards.policy import DEFAULT_STANDARDS_POLICY
+from github_standards.test.fake_github import IN_SPEC_PROTECTION, FakeGitHub, FakeRepo
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'history.db')
+        self.now = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    def _run(self, outcomes, dry_run=True, days_later=0, org='my-org'):
+        self.now += timedelta(days=days_later)
+        history = History(self.path, clock=lambda: self.now)
+        for name, missing in outcomes.items():
+            history.record(name, missing)
+        run_id = history.save_run(org, 'run', dry_run)
+        history.close()
+        return run_id
+
+    def _history(self):
+        history = History(self.path, clock=lambda: self.now)
+        self.addCleanup(history.close)
+        return history
+
+    def test_streaks_follow_the_runs(self):
+        first = self._run({'a': 'has_wiki', 'b': '', 'c': None})
+        self._run({'a': 'has_wiki', 'b': 'has_wiki,has_projects', 'c': None}, days_later=5)
+        last = self._run({'a': 'has_wiki', 'b': 'has_projects'}, days_later=5)
+        history = self._history()
+
+        self.assertEqual(history.out_of_standards('has_wiki', days=7),
+                         [('my-org', 'a', '', '2026-10-01T00:00:00+00:00', first)])
+        self.assertEqual([repo for _, repo, _, _, _ in history.out_of_standards('has_projects')], ['b'])
+
+        drifted, fixed = history.changes_since(first)
+        self.assertEqual(sorted((repo, rule) for _, repo, _, rule, _ in drifted), [('b', 'has_projects'),
+                                                                                    ('b', 'has_wiki')])
+        self.assertEqual([(repo, rule, run) for _, repo, _, rule, run in fixed], [('b', 'has_wiki', last)])
+        self.assertEqual(history.runs()[0][6:], (2, 2))
+
+    def test_repos_not_assessed_keep_their_streaks(self):
+        self._run({'a': 'has_wiki'})
+        self._run({'a': None, 'b': ''}, days_later=10)
+
+        self.assertEqual(len(self._history().out_of_standards('has_wiki', days=7)), 1)
+
+    def test_remediated_violations_close_in_the_same_run(self):
+        run_id = self._run({'a': 'has_wiki'}, dry_run=False)
+        history = self._history()
+
+        self.assertEqual(history.out_of_standards('has_wiki'), [])
+        drifted, fixed = history.changes_since(run_id - 1)
+        self.assertEqual((len(drifted), len(fixed)), (1, 1))
+
+    def test_rules_on_protected_branches_are_kept_apart(self):
+        first = self._run({'a': 'allow_force_pushes,release/1.0:allow_force_pushes,release/2.0:allow_force_pushes'})
+        self._run({'a': 'release/2.0:allow_force_pushes'}, days_later=1)
+        history = self._history()
+
+        self.assertEqual([(repo, branch) for _, repo, branch, _, _ in history.out_of_standards('allow_force_pushes')],
+                         [('a', 'release/2.0')])
+        _, fixed = history.changes_since(first)
+        self.assertEqual([(branch, rule) for _, _, branch, rule, _ in fixed],
+                         [('', 'allow_force_pushes'), ('release/1.0', 'allow_force_pushes')])
+        self.assertEqual({rule.rule: rule.open for rule in history.drift(days=30)}, {'allow_force_pushes': 1})
+
+    def test_drift_rate(self):
+        self._run({'a': '', 'b': ''})
+        self._run({'a': 'has_wiki', 'b': ''}, days_later=1)
+        self._run({'a': 'has_wiki', 'b': ''}, days_later=1, org='other-org')
+
+        drift = {rule.rule: rule for rule in self._history().drift(days=30, rules=DEFAULT_STANDARDS_POLICY.rules)}
+        self.assertEqual((drift['has_wiki'].open, drift['has_wiki'].drifted, drift['has_wiki'].assessments), (2, 2, 6))
+        self.assertAlmostEqual(drift['has_wiki'].rate, 1 / 3)
+        self.assertEqual(drift['has_issues'].drifted, 0)
+        self.assertEqual({rule.rule: rule for rule in self._history().drift(30, 'my-org')}['has_wiki'].open, 1)
+
+
+class TestHistoryCommands(unittest.TestCase):
+
+    def test_run_then_report(self):
+        path = os.path.join(tempfile.mkdtemp(), 'history.db')
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+
+        with FakeGitHub(GH_ORG_NAME, [drifted, FakeRepo('in-spec')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            main(['--api-url', fake.url, '--dry-run', '--history-db', path])
+            fake.requests.clear()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(['--history-db', path, 'report', 'out-of-standards', 'has_wiki', '--days', '0'])
+            main(['--history-db', path, 'report', 'runs'])
+            main(['--history-db', path, 'report', 'drift'])
+            main(['--history-db', path, 'report', 'changes', '0'])
+
+        self.assertEqual(fake.total_requests, 0)
+        self.assertIn(f'1 repos have not met has_wiki for 0 days or more:\n    {GH_ORG_NAME}/drifted since',
+                      output.getvalue())
+        self.assertIn(f'1: ', output.getvalue())
+        self.assertIn('has_wiki: 1 out of standards now, 1 drifted, 0 fixed (50.0% of assessments drifted)',
+                      output.getvalue())
+        self.assertIn(f'{GH_ORG_NAME}/drifted: has_wiki (run 1)', output.getvalue())
+
+    def test_run_that_fails_is_still_saved(self):
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'history.db')
+        checkpoint = os.path.join(tmp, 'checkpoint.jsonl')
+
+        output = io.StringIO()
+        with FakeGitHub(GH_ORG_NAME, [FakeRepo('in-spec')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(output):
+            fake.failures['GET /orgs/{org}/repos'] = 100
+            with self.assertRaises(GithubException):
+                main(['--api-url', fake.url, '--retries', '0', '--history-db', path, '--checkpoint-file', checkpoint])
+
+        self.assertIn(f'Results saved to {path} as run 1', output.getvalue())
+        self.assertIn(f'Checkpoint kept in {checkpoint}', output.getvalue())
+        self.assertTrue(os.path.exists(checkpoint))
+        self.assertIn('API calls:', output.getvalue())
+
+    def test_report_follows_the_policy_and_branches(self):
+        directory = tempfile.mkdtemp()
+        path, policy = os.path.join(directory, 'history.db'), os.path.join(directory, 'policy.toml')
+        with open(policy, 'w') as f:
+            f.write('branches = ["release/*"]\n\n[branch_protection]\nallow_force_pushes = false\n')
+        repo = FakeRepo('drifted', branches={'release/1.0': dict(IN_SPEC_PROTECTION, allow_force_pushes=True)})
+
+        with FakeGitHub(GH_ORG_NAME, [repo]) as fake, mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), \
+                contextlib.redirect_stdout(io.StringIO()):
+            main(['--api-url', fake.url, '--dry-run', '--history-db', path, '--policy', policy])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(['--history-db', path, '--policy', policy, 'report', 'out-of-standards', 'allow_force_pushes',
+                  '--days', '0'])
+            main(['--history-db', path, '--policy', policy, 'report', 'drift'])
+
+        self.assertIn(f'{GH_ORG_NAME}/drifted on release/1.0 since', output.getvalue())
+        self.assertIn('allow_force_pushes: 1 out of standards now', output.getvalue())
+        # only the rules of the policy are listed
+        self.assertNotIn('has_wiki', output.getvalue())
+
+    def test_report_needs_history(self):
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+            main(['--history-db', os.path.join(tempfile.mkdtemp(), 'missing.db'), 'report', 'runs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from github import Github
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.listing import PAGE_SIZE, RepoFilter, list_protected_branches, prefetch
+from github_standards.test.fake_github import IN_SPEC_PROTECTION, FakeGitHub, FakeRepo
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_items_come_through_in_order(self):
+        self.assertEqual(list(prefetch(range(250), buffer=10)), list(range(250)))
+
+    def test_runs_ahead_of_the_caller(self):
+        produced = []
+
+        def items():
+            for i in range(5):
+                produced.append(i)
+                yield i
+
+        iterator = prefetch(items(), buffer=10)
+        self.assertEqual(next(iterator), 0)
+        deadline = time.time() + 5
+        while len(produced) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(produced, [0, 1, 2, 3, 4])
+
+    def test_errors_reach_the_caller(self):
+        def items():
+            yield 1
+            raise ValueError('page 2 failed')
+
+        iterator = prefetch(items())
+        self.assertEqual(next(iterator), 1)
+        with self.assertRaisesRegex(ValueError, 'page 2 failed'):
+            next(iterator)
+
+    def test_stopping_early_stops_the_producer(self):
+        iterator = prefetch(iter(range(1000)), buffer=1)
+        next(iterator)
+        iterator.close()
+        deadline = time.time() + 5
+        while any(thread.name == 'github-standards-listing' for thread in threading.enumerate()) \
+                and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name == 'github-standards-listing'])
+
+
+class TestRepoFilter(unittest.TestCase):
+
+    def test_search_query(self):
+        repo_filter = RepoFilter(('java', 'maven'), 'public', True)
+        self.assertEqual(repo_filter.search_query('my-org'),
+                         'org:my-org fork:true topic:java topic:maven is:public archived:false')
+        self.assertFalse(RepoFilter(name_pattern='nexus-*').narrows_server_side)
+
+    def test_matches(self):
+        repo = SimpleNamespace(name='nexus-thing', topics=['java'], visibility='public', archived=False)
+        self.assertTrue(RepoFilter(('java',), 'public', True, 'nexus-*').matches(repo))
+        self.assertFalse(RepoFilter(name_pattern='other-*').matches(repo))
+        self.assertFalse(RepoFilter(('java', 'maven')).matches(repo))
+        self.assertFalse(RepoFilter(visibility='private').matches(repo))
+        self.assertFalse(RepoFilter(exclude_archived=True).matches(SimpleNamespace(**dict(vars(repo), archived=True))))
+
+
+class TestListingAgainstFakeGitHub(unittest.TestCase):
+
+    def setUp(self):
+        self.repos = [FakeRepo(f'repo-{n:03d}') for n in range(250)]
+        for repo in self.repos[:3]:
+            repo.topics = ['java']
+        self.repos[1].archived = True
+
+    def _run(self, *args):
+        output = io.StringIO()
+        with FakeGitHub(GH_ORG_NAME, self.repos) as fake, mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), \
+                contextlib.redirect_stdout(output):
+            main(['--api-url', fake.url, '--dry-run', *args])
+        return fake, output.getvalue()
+
+    def test_listing_uses_the_largest_pages(self):
+        fake, _ = self._run()
+
+        self.assertEqual(fake.requests['GET /orgs/{org}/repos'], 3)
+        self.assertEqual(fake.requests['GET /orgs/{org}/properties/values'], 3)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}'], 250)
+
+    def test_search_narrows_on_the_server(self):
+        fake, output = self._run('--topic', 'java', '--exclude-archived')
+
+        self.assertEqual(fake.requests['GET /search/repositories'], 1)
+        self.assertNotIn('GET /orgs/{org}/repos', fake.requests)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}'], 2)
+        self.assertIn('Summary: 2 repos processed', output)
+
+    def test_search_beyond_its_limit_lists_everything(self):
+        with mock.patch('github_standards.listing.SEARCH_RESULT_LIMIT', 100):
+            fake, output = self._run('--visibility', 'public')
+
+        self.assertIn('listing every repository instead', output)
+        self.assertEqual(fake.requests['GET /orgs/{org}/repos'], 3)
+        self.assertIn('Summary: 250 repos processed', output)
+
+    def test_name_pattern(self):
+        fake, output = self._run('--name-pattern', 'repo-1*')
+
+        self.assertIn('Summary: 100 repos processed', output)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}'], 100)
+
+
+class TestProtectedBranches(unittest.TestCase):
+
+    def test_streams_matching_protected_branches(self):
+        repo = FakeRepo('many-branches')
+        repo.branches = {f'feature/{n:04d}': None for n in range(2000)}
+        repo.branches.update({f'release/{n}.0': dict(IN_SPEC_PROTECTION) for n in range(150)})
+        repo.branches['hotfix/1'] = dict(IN_SPEC_PROTECTION)
+
+        with FakeGitHub(GH_ORG_NAME, [repo]) as fake:
+            gh = Github(base_url=fake.url, per_page=PAGE_SIZE)
+            gh_repo = gh.get_organization(GH_ORG_NAME).get_repo('many-branches')
+            names = [branch.name for branch in list_protected_branches(gh_repo, ['release/*', 'main'])]
+
+        self.assertEqual(names, [f'release/{n}.0' for n in range(150)])
+        # only the protected branches are listed, two pages of them, and none is fetched on its own
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}/branches'], 2)
+        self.assertNotIn('GET /repos/{org}/{repo}/branches/{branch}', fake.requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import tempfile
+import unittest
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+from github_standards.metrics import RequestMetrics, endpoint_template, repo_of
+
+
+def _request(method='GET', url='https://api.github.com/repos/my-org/my-repo/branches/main/protection'):
+    request = PreparedRequest()
+    request.prepare(method=method, url=url)
+    return request
+
+
+def _response(status=200, content=b'{}', **headers):
+    response = Response()
+    response.status_code = status
+    response._content = content
+    response.headers = CaseInsensitiveDict(headers)
+    return response
+
+
+class _FakeClock:
+    def __init__(self, latency):
+        self.now = 0.0
+        self.latency = latency
+        self.started = False
+
+    def __call__(self):
+        # each request takes `latency`: the clock moves on between the start and end of a request
+        if self.started:
+            self.now += self.latency
+        self.started = not self.started
+        return self.now
+
+
+class TestEndpoints(unittest.TestCase):
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template('https://api.github.com/repos/my-org/my-repo/branches/main/protection'),
+                         '/repos/{owner}/{repo}/branches/{branch}/protection')
+        self.assertEqual(endpoint_template('https://api.github.com/orgs/my-org/repos?per_page=100&page=2'),
+                         '/orgs/{org}/repos')
+        self.assertEqual(endpoint_template('https://ghes.example.com/api/v3/repos/my-org/my-repo'),
+                         '/api/v3/repos/{owner}/{repo}')
+        self.assertEqual(endpoint_template('https://api.github.com/graphql'), '/graphql')
+
+    def test_endpoint_template_of_branch_with_slashes(self):
+        base = 'https://api.github.com/repos/my-org/my-repo/branches/release/1.0'
+        self.assertEqual(endpoint_template(base), '/repos/{owner}/{repo}/branches/{branch}')
+        self.assertEqual(endpoint_template(f'{base}/protection'), '/repos/{owner}/{repo}/branches/{branch}/protection')
+        self.assertEqual(endpoint_template(f'{base}/protection/required_signatures'),
+                         '/repos/{owner}/{repo}/branches/{branch}/protection/required_signatures')
+        self.assertEqual(endpoint_template(f'{base}/rename'), '/repos/{owner}/{repo}/branches/{branch}/rename')
+
+    def test_repo_of(self):
+        self.assertEqual(repo_of('https://api.github.com/repos/my-org/my-repo/branches/main'), 'my-repo')
+        self.assertIsNone(repo_of('https://api.github.com/orgs/my-org/repos'))
+
+
+class TestRequestMetrics(unittest.TestCase):
+    def test_records_status_latency_bytes_and_cost(self):
+        metrics = RequestMetrics(per_repo=True, clock=_FakeClock(0.2))
+
+        metrics.send(_request(), lambda r: _response(content=b'x' * 100))
+        metrics.send(_request(), lambda r: _response(status=304, content=b''))
+        metrics.send(_request(url='https://api.github.com/repos/my-org/other/branches/main/protection'),
+                     lambda r: _response(status=404, content=b'{"message":"Branch not protected"}'))
+
+        data = metrics.to_dict()
+        self.assertEqual(data['requests'], 3)
+        (endpoint,) = data['endpoints']
+        self.assertEqual(endpoint['endpoint'], '/repos/{owner}/{repo}/branches/{branch}/protection')
+        self.assertEqual(endpoint['statuses'], {'200': 1, '304': 1, '404': 1})
+        self.assertEqual(endpoint['bytes'], 134)
+        self.assertEqual(endpoint['rate_limit_cost'], 2)
+        self.assertEqual(endpoint['latency_buckets']['0.25'], 3)
+        self.assertAlmostEqual(endpoint['seconds'], 0.6)
+        self.assertEqual(data['repos']['my-repo']['requests'], 2)
+        self.assertEqual(data['repos']['other']['requests'], 1)
+
+    def test_graphql_cost_is_points_used(self):
+        metrics = RequestMetrics()
+        request = _request('POST', 'https://api.github.com/graphql')
+
+        for used in (1, 3, 6):
+            metrics.send(request, lambda r: _response(**{'X-RateLimit-Resource': 'graphql',
+                                                          'X-RateLimit-Used': str(used)}))
+
+        self.assertEqual(metrics.to_dict()['endpoints'][0]['rate_limit_cost'], 1 + 2 + 3)
+
+    def test_graphql_cost_is_points_used_per_credential(self):
+        metrics = RequestMetrics(credential_of=lambda request: request.headers['Authorization'])
+
+        for token, used in (('first', 10), ('second', 50), ('first', 12), ('second', 53)):
+            request = _request('POST', 'https://api.github.com/graphql')
+            request.headers['Authorization'] = token
+            metrics.send(request, lambda r: _response(**{'X-RateLimit-Resource': 'graphql',
+                                                          'X-RateLimit-Used': str(used)}))
+
+        self.assertEqual(metrics.to_dict()['endpoints'][0]['rate_limit_cost'], 1 + 1 + 2 + 3)
+
+    def test_failed_requests_are_recorded(self):
+        metrics = RequestMetrics()
+
+        def send(request):
+            raise ConnectionError('connection reset')
+
+        with self.assertRaises(ConnectionError):
+            metrics.send(_request(), send)
+        self.assertEqual(metrics.to_dict()['endpoints'][0]['statuses'], {'error': 1})
+
+    def test_prometheus_histogram_is_cumulative(self):
+        metrics = RequestMetrics(per_repo=True, clock=_FakeClock(0.3))
+        metrics.send(_request(), lambda r: _response())
+
+        text = metrics.prometheus()
+
+        labels = 'method="GET",endpoint="/repos/{owner}/{repo}/branches/{branch}/protection"'
+        self.assertIn(f'github_standards_requests_total{{{labels},status="200"}} 1\n', text)
+        self.assertIn(f'github_standards_request_duration_seconds_bucket{{{labels},le="0.25"}} 0\n', text)
+        self.assertIn(f'github_standards_request_duration_seconds_bucket{{{labels},le="0.5"}} 1\n', text)
+        self.assertIn(f'github_standards_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1\n', text)
+        self.assertIn(f'github_standards_request_duration_seconds_count{{{labels}}} 1\n', text)
+        self.assertIn('github_standards_repo_requests_total{repo="my-repo"} 1\n', text)
+
+    def test_save(self):
+        metrics = RequestMetrics()
+        metrics.send(_request(), lambda r: _response())
+        with tempfile.TemporaryDirectory() as directory:
+            metrics.save_prometheus(os.path.join(directory, 'metrics.prom'))
+            metrics.save_json(os.path.join(directory, 'metrics.json'))
+
+            self.assertEqual(sorted(os.listdir(directory)), ['metrics.json', 'metrics.prom'])
+            with open(os.path.join(directory, 'metrics.json'), encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
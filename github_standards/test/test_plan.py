@@ -0,0 +1,140 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from dataclasses import replace
+from unittest import mock
+from unittest.mock import MagicMock
+
+from github.BranchProtection import BranchProtection
+
+from github_standards import plan
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.snapshot import BranchSnapshot, RepoSnapshot
+from github_standards.standards import STANDARD_BRANCH_PROTECTION, STANDARD_PULL_REQUEST_REVIEWS, \
+    STANDARD_REPO_PROPERTIES
+
+IN_SPEC_REPO = RepoSnapshot(name='myrepo', **STANDARD_REPO_PROPERTIES)
+IN_SPEC_BRANCH = BranchSnapshot(name='main', protected=True, allow_deletions=False, allow_force_pushes=False,
+                                require_code_owner_reviews=True, required_approving_review_count=1,
+                                required_signatures=True)
+
+
+def _mock_org(repo_snapshot, branch_snapshot):
+    gh_org = MagicMock()
+    repo = gh_org.get_repo.return_value
+    for field in RepoSnapshot.__slots__:
+        setattr(repo, field, getattr(repo_snapshot, field))
+    branch = repo.get_branch.return_value
+    branch.name = branch_snapshot.name
+    branch.get_protection.return_value = BranchProtection(MagicMock(), {}, {
+        'url': f'https://api.github.com/repos/my-org/myrepo/branches/{branch_snapshot.name}/protection',
+        'allow_deletions': {'enabled': branch_snapshot.allow_deletions},
+        'allow_force_pushes': {'enabled': branch_snapshot.allow_force_pushes},
+        'required_pull_request_reviews': {
+            'require_code_owner_reviews': branch_snapshot.require_code_owner_reviews,
+            'required_approving_review_count': branch_snapshot.required_approving_review_count},
+        'required_signatures': {'enabled': branch_snapshot.required_signatures},
+    }, completed=True)
+    return gh_org, repo, branch
+
+
+class TestPlan(unittest.TestCase):
+    def test_in_spec_repo_has_no_changes(self):
+        self.assertEqual(plan.plan_repo_changes(IN_SPEC_REPO, IN_SPEC_BRANCH), [])
+
+    def test_changes_record_what_was_seen(self):
+        changes = plan.plan_repo_changes(replace(IN_SPEC_REPO, has_wiki=True),
+                                         replace(IN_SPEC_BRANCH, allow_force_pushes=True, required_signatures=False))
+
+        self.assertEqual(changes, [
+            {'action': plan.EDIT_REPO, 'actual': {'has_wiki': True}, 'expected': {'has_wiki': False},
+             'write': STANDARD_REPO_PROPERTIES},
+            {'action': plan.EDIT_BRANCH_PROTECTION, 'branch': 'main', 'protected': True,
+             'actual': {'allow_force_pushes': True}, 'expected': {'allow_force_pushes': False},
+             'write': {**STANDARD_BRANCH_PROTECTION, **STANDARD_PULL_REQUEST_REVIEWS}},
+            {'action': plan.ADD_REQUIRED_SIGNATURES, 'branch': 'main'},
+        ])
+
+    def test_save_and_load(self):
+        saved = plan.Plan('my-org')
+        saved.add('zeta', plan.plan_repo_changes(replace(IN_SPEC_REPO, has_wiki=True), None))
+        saved.add('alpha', plan.plan_repo_changes(IN_SPEC_REPO, IN_SPEC_BRANCH))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'plan.json')
+            saved.save(path)
+            loaded = plan.Plan.load(path)
+
+        self.assertEqual(loaded.org, 'my-org')
+        self.assertEqual([r.name for r in loaded.repo_plans()], ['zeta'])
+        self.assertEqual(loaded.repos, saved.repos)
+
+    def test_apply_makes_only_planned_writes(self):
+        drifted_repo = replace(IN_SPEC_REPO, has_wiki=True)
+        drifted_branch = replace(IN_SPEC_BRANCH, required_signatures=False)
+        gh_org, repo, branch = _mock_org(drifted_repo, drifted_branch)
+        repo_plan = plan.RepoPlan('myrepo', plan.plan_repo_changes(drifted_repo, drifted_branch))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = plan.apply_repo_plan(gh_org, repo_plan)
+
+        self.assertEqual(result, 'has_wiki,add_required_signatures')
+        self.assertEqual(output.getvalue().splitlines(),
+                         ['myrepo has_wiki is True, expected False (applied)',
+                          'myrepo:main required_signatures is False, expected True (applied)'])
+        repo.edit.assert_called_once_with(**STANDARD_REPO_PROPERTIES)
+        branch.add_required_signatures.assert_called_once_with()
+        branch.edit_protection.assert_not_called()
+
+    def test_apply_skips_changes_that_are_no_longer_as_planned(self):
+        planned_repo = replace(IN_SPEC_REPO, has_wiki=True)
+        # someone fixed has_wiki by hand since the plan was made
+        gh_org, repo, branch = _mock_org(IN_SPEC_REPO, IN_SPEC_BRANCH)
+        repo_plan = plan.RepoPlan('myrepo', plan.plan_repo_changes(planned_repo, IN_SPEC_BRANCH))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(plan.StalePlanError):
+                plan.apply_repo_plan(gh_org, repo_plan)
+
+        repo.edit.assert_not_called()
+
+
+class TestApplyCommand(unittest.TestCase):
+
+    def test_plan_that_cannot_be_read_is_reported(self):
+        tmp = tempfile.mkdtemp()
+        other_org = os.path.join(tmp, 'plan.json')
+        plan.Plan('other-org').save(other_org)
+
+        for path, message in [(os.path.join(tmp, 'missing.json'), 'No such file or directory'),
+                              (other_org, f'{other_org} is a plan for other-org, not {GH_ORG_NAME}')]:
+            output = io.StringIO()
+            with mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(output), \
+                    self.assertRaises(SystemExit):
+                main(['apply', path])
+            self.assertIn(message, output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.plan import Plan
+from github_standards.policy import DEFAULT_STANDARDS_POLICY, compile_policy, load_policy
+from github_standards.standards import DEFAULT_POLICY
+from github_standards.test.fake_github import IN_SPEC_PROTECTION, FakeGitHub, FakeRepo
+
+POLICY = '''
+[repository]
+has_wiki = false
+
+[branch_protection]
+allow_force_pushes = false
+required_signatures = true
+
+[pull_request_reviews]
+required_approving_review_count = 1
+
+[[overrides]]
+when = { Repo-Type = "docs" }
+ignore = ["branch_protection", "pull_request_reviews"]
+repository = { has_wiki = true }
+'''
+
+
+class TestLoadPolicy(unittest.TestCase):
+
+    def _load(self, text):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'policy.toml')
+            with open(path, 'w') as f:
+                f.write(text)
+            return load_policy(path)
+
+    def test_default_is_the_standards(self):
+        self.assertEqual(DEFAULT_STANDARDS_POLICY.for_repo({}), DEFAULT_POLICY)
+        self.assertEqual(DEFAULT_STANDARDS_POLICY.exclude, ['.github'])
+        self.assertFalse(DEFAULT_STANDARDS_POLICY.overrides_branch)
+
+    def test_overrides(self):
+        policy = self._load(POLICY)
+
+        base = policy.for_repo({'Repo-Type': 'library'})
+        self.assertEqual(dict(base.repo_properties), {'has_wiki': False})
+        self.assertEqual(dict(base.branch_protection), {'allow_force_pushes': False})
+        self.assertTrue(base.required_signatures)
+        self.assertTrue(base.checks_branch)
+
+        docs = policy.for_repo({'Repo-Type': 'docs'})
+        self.assertEqual(dict(docs.repo_properties), {'has_wiki': True})
+        self.assertFalse(docs.checks_branch)
+        self.assertIs(policy.for_repo({'Repo-Type': ['docs', 'site']}), docs)
+        self.assertTrue(policy.overrides_branch)
+        self.assertEqual(policy.rules,
+                         ('has_wiki', 'allow_force_pushes', 'required_signatures', 'required_approving_review_count'))
+
+    def test_digest_follows_the_contents(self):
+        self.assertEqual(self._load(POLICY).digest, self._load(POLICY).digest)
+        self.assertNotEqual(self._load(POLICY).digest, self._load(POLICY.replace('has_wiki = true', '')).digest)
+
+    def test_mistakes_are_reported(self):
+        for data, message in [
+                ({'repository': {'has_wikis': False}}, 'Unknown settings in \\[repository\\]'),
+                ({'repository': {'has_wiki': 'no'}}, 'has_wiki .* should be a bool'),
+                ({'pull_request_reviews': {'required_approving_review_count': True}}, 'should be a int'),
+                ({'pull_request_reviews': {'required_approving_review_count': -1}}, 'cannot be negative'),
+                ({'branch': {}}, 'Unknown keys'),
+                ({'overrides': [{'ignore': ['has_wiki']}]}, 'needs a when'),
+                ({'overrides': [{'when': {'Repo-Type': 'docs'}, 'ignore': ['wiki']}]}, 'Unknown settings ignored'),
+                ({'exclude': '.github'}, 'list of repository names')]:
+            with self.subTest(data=data), self.assertRaisesRegex(ValueError, message):
+                compile_policy(data)
+
+        with self.assertRaisesRegex(ValueError, 'not valid TOML'):
+            self._load('[repository')
+
+
+class TestPolicyAgainstFakeGitHub(unittest.TestCase):
+
+    def _run(self, repos, policy_text, *args, dry_run=True):
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, repos) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(output):
+            path = os.path.join(tmp, 'policy.toml')
+            with open(path, 'w') as f:
+                f.write(policy_text)
+            main(['--api-url', fake.url, '--policy', path, *(['--dry-run'] if dry_run else []), *args])
+        return fake, output.getvalue()
+
+    def test_overridden_repos_skip_their_branch(self):
+        repos = [FakeRepo(f'repo-{n}') for n in range(4)]
+        for repo in repos[:3]:
+            repo.custom_properties['Repo-Type'] = 'docs'
+            repo.settings['has_wiki'] = True
+        fake, output = self._run(repos, POLICY)
+
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}/branches/{branch}'], 1)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}/branches/{branch}/protection'], 1)
+        self.assertIn('repo-0 branch standards do not apply', output)
+        self.assertNotIn('Out of standards', output)
+        self.assertIn('Summary: 4 repos processed, 4 assessed', output)
+
+    def test_listing_settings_need_no_repository_reads(self):
+        fake, output = self._run([FakeRepo(f'repo-{n}') for n in range(5)], '[repository]\nhas_wiki = false\n')
+
+        self.assertNotIn('GET /repos/{org}/{repo}', fake.requests)
+        self.assertNotIn('GET /repos/{org}/{repo}/branches/{branch}', fake.requests)
+        self.assertIn('Summary: 5 repos processed, 5 assessed', output)
+
+    def test_protected_branches_matching_the_patterns(self):
+        repo = FakeRepo('repo-0')
+        repo.branches = {'release/1.0': dict(IN_SPEC_PROTECTION, allow_force_pushes=True),
+                         'release/2.0': dict(IN_SPEC_PROTECTION), 'feature/x': None}
+        policy = 'branches = ["release/*"]\n' + POLICY
+
+        fake, output = self._run([repo], policy)
+        self.assertIn('repo-0: release/1.0:allow_force_pushes', output)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}/branches/{branch}/protection'], 3)
+
+        fake, output = self._run([repo], policy, '--engine', 'asyncio')
+        self.assertIn('repo-0: release/1.0:allow_force_pushes', output)
+
+        # the bulk query only covers the default branch, the others are listed and read over REST
+        fake, output = self._run([repo], policy, '--graphql')
+        self.assertIn('repo-0: release/1.0:allow_force_pushes', output)
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}/branches/{branch}/protection'], 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            plan_path = os.path.join(tmp, 'plan.json')
+            self._run([repo], policy, '--graphql', 'plan', plan_path, dry_run=False)
+            self.assertEqual([change['branch'] for change in Plan.load(plan_path).repos['repo-0']], ['release/1.0'])
+
+        fake, _ = self._run([repo], policy, dry_run=False)
+        self.assertEqual(fake.writes['PUT /repos/{org}/{repo}/branches/{branch}/protection'], 1)
+        self.assertFalse(repo.branches['release/1.0']['allow_force_pushes'])
+        self.assertIsNone(repo.branches['feature/x'])
+
+    def test_unreadable_policy(self):
+        with contextlib.redirect_stderr(io.StringIO()) as error, self.assertRaises(SystemExit):
+            main(['--policy', '/does/not/exist.toml'])
+        self.assertIn('--policy', error.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from github_standards.properties import CustomPropertyIndex
+
+
+class TestCustomPropertyIndex(unittest.TestCase):
+    def setUp(self):
+        gh_org = MagicMock()
+        gh_org.list_custom_property_values.return_value = [
+            SimpleNamespace(repository_name='managed', properties={'Auto-Apply-Standards': 'true'}),
+            SimpleNamespace(repository_name='unmanaged', properties={'Auto-Apply-Standards': 'false'}),
+            SimpleNamespace(repository_name='.github', properties={'Auto-Apply-Standards': 'true'}),
+        ]
+        self.index = CustomPropertyIndex.for_org(gh_org, excluded_repo_names=['.github'])
+        self.gh_org = gh_org
+
+    def test_loaded_with_one_call(self):
+        self.gh_org.list_custom_property_values.assert_called_once_with()
+        self.assertEqual(self.index.properties_for('managed'), {'Auto-Apply-Standards': 'true'})
+        self.assertEqual(self.index.properties_for('not-listed'), {})
+
+    def test_scope(self):
+        self.assertIsNone(self.index.skip_reason('managed'))
+        self.assertEqual(self.index.skip_reason('unmanaged'), 'Auto-Apply-Standards is not true')
+        self.assertEqual(self.index.skip_reason('not-listed'), 'Auto-Apply-Standards is not true')
+        self.assertEqual(self.index.skip_reason('.github'), 'it is excluded from standards management')
+
+
+if __name__ == '__main__':
+    unittest.main()
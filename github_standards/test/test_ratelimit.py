@@ -0,0 +1,120 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+from github_standards.ratelimit import RateLimitScheduler
+
+
+def _request(url='https://api.github.com/repos/my-org/my-repo', token=None):
+    request = PreparedRequest()
+    request.prepare(method='GET', url=url, headers={'Authorization': f'token {token}'} if token else None)
+    return request
+
+
+def _response(status=200, remaining=4000, limit=5000, reset=3600, used=None, **headers):
+    response = Response()
+    response.status_code = status
+    response._content = b'{}'
+    response.headers = CaseInsensitiveDict({'X-RateLimit-Limit': str(limit),
+                                            'X-RateLimit-Remaining': str(remaining),
+                                            'X-RateLimit-Reset': str(reset),
+                                            'X-RateLimit-Resource': 'core'})
+    if used is not None:
+        response.headers['X-RateLimit-Used'] = str(used)
+    response.headers.update(headers)
+    return response
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.scheduler = RateLimitScheduler(reserve=100, sleep=self.clock.sleep, clock=self.clock.time)
+
+    def test_no_waiting_with_plenty_of_budget(self):
+        for used in range(1, 4):
+            self.scheduler.send(_request(), lambda r: _response(remaining=5000 - used, used=used))
+
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(self.scheduler.consumed(), {'core': 3})
+
+    def test_requests_are_spread_when_budget_is_low(self):
+        # 600 left, 100 reserved, an hour to go: after the first paced request, one request every 7.2s
+        for _ in range(4):
+            self.scheduler.send(_request(), lambda r: _response(remaining=600))
+
+        self.assertEqual(len(self.clock.sleeps), 2)
+        for slept in self.clock.sleeps:
+            self.assertAlmostEqual(slept, 7.2, delta=0.1)
+
+    def test_waits_for_reset_once_only_reserve_is_left(self):
+        self.scheduler.send(_request(), lambda r: _response(remaining=100))
+        self.scheduler.send(_request(), lambda r: _response(remaining=4999, reset=7200))
+
+        self.assertEqual(self.clock.sleeps, [3600])
+
+    def test_budgets_are_kept_per_credential(self):
+        scheduler = RateLimitScheduler(reserve=100, sleep=self.clock.sleep, clock=self.clock.time,
+                                       credential_of=lambda r: r.headers['Authorization'])
+        scheduler.send(_request(token='a'), lambda r: _response(remaining=50, used=4950))
+        # another credential with plenty left goes straight through
+        for used in range(1, 3):
+            scheduler.send(_request(token='b'), lambda r: _response(remaining=5000 - used, used=used))
+        self.assertEqual(self.clock.sleeps, [])
+
+        scheduler.send(_request(token='a'), lambda r: _response(remaining=4999, reset=7200))
+        self.assertEqual(self.clock.sleeps, [3600])
+        self.assertEqual(scheduler.consumed(), {'core': 3})
+
+    def test_secondary_limit_is_retried_after_retry_after(self):
+        responses = [_response(status=403, **{'Retry-After': '30'}), _response()]
+
+        response = self.scheduler.send(_request(), lambda r: responses.pop(0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clock.sleeps, [30])
+        self.assertEqual(self.scheduler.secondary_limits, 1)
+
+    def test_permission_errors_are_not_retried(self):
+        calls = []
+
+        def send(r):
+            calls.append(r)
+            return _response(status=403)
+
+        self.assertEqual(self.scheduler.send(_request(), send).status_code, 403)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
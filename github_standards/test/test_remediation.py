@@ -0,0 +1,74 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+
+class TestStandardsAgainstFakeGitHub(unittest.TestCase):
+
+    def _drifted_repo_with_status_checks(self):
+        repo = FakeRepo('drifted')
+        repo.protection.update(allow_force_pushes=True, enforce_admins=True,
+                               required_status_checks={'strict': True, 'contexts': ['build']})
+        return repo
+
+    def test_remediation_keeps_the_rest_of_the_protection(self):
+        repo = self._drifted_repo_with_status_checks()
+        with FakeGitHub(GH_ORG_NAME, [repo]) as fake, mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), \
+                contextlib.redirect_stdout(io.StringIO()):
+            main(['--api-url', fake.url])
+
+        self.assertFalse(repo.protection['allow_force_pushes'])
+        self.assertEqual(repo.protection['required_status_checks'], {'strict': True, 'contexts': ['build']})
+        self.assertTrue(repo.protection['enforce_admins'])
+
+    def test_applying_a_plan_keeps_the_rest_of_the_protection(self):
+        repo = self._drifted_repo_with_status_checks()
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, [repo]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(tmp, 'plan.json')
+            main(['--api-url', fake.url, 'plan', path])
+            main(['--api-url', fake.url, 'apply', path])
+
+        self.assertFalse(repo.protection['allow_force_pushes'])
+        self.assertEqual(repo.protection['required_status_checks'], {'strict': True, 'contexts': ['build']})
+        self.assertTrue(repo.protection['enforce_admins'])
+
+
+    def test_empty_repo_has_no_branch_to_review(self):
+        for engine in ['threads', 'asyncio']:
+            with self.subTest(engine=engine):
+                output = io.StringIO()
+                with FakeGitHub(GH_ORG_NAME, [FakeRepo('empty', empty=True)]) as fake, \
+                        mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(output):
+                    main(['--api-url', fake.url, '--dry-run', '--engine', engine])
+
+                self.assertIn('empty there is no branch main', output.getvalue())
+                self.assertIn('0 failed', output.getvalue())
+                self.assertEqual(dict(fake.writes), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
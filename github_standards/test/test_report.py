@@ -0,0 +1,75 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import tempfile
+import unittest
+
+from github_standards.report import Report, merge_reports
+from github_standards.runner import RunSummary
+from github_standards.shard import Shard
+
+
+def _summary(assessed=0, skipped=0, out_of_standards=None, failed=None):
+    summary = RunSummary()
+    summary.assessed = assessed
+    summary.skipped = skipped
+    summary.out_of_standards = out_of_standards or {}
+    summary.failed = failed or {}
+    return summary
+
+
+class TestReport(unittest.TestCase):
+    def test_save_and_load(self):
+        report = Report('myorg', _summary(3, 1, {'a': 'has_wiki'}, {'b': 'RuntimeError: boom'}), Shard(2, 3))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            report.save(path)
+            loaded = Report.load(path)
+
+        self.assertEqual(loaded.org, 'myorg')
+        self.assertEqual(loaded.shard, Shard(2, 3))
+        self.assertEqual(loaded.summary.report(), report.summary.report())
+
+    def test_merge_shards(self):
+        summary, missing = merge_reports([
+            Report('myorg', _summary(2, 1, {'a': 'has_wiki'}), Shard(1, 2)),
+            Report('myorg', _summary(1, 0, {'c': 'has_projects'}, {'b': 'RuntimeError: boom'}), Shard(2, 2)),
+        ])
+
+        self.assertEqual(missing, [])
+        self.assertEqual(summary.report(), _summary(3, 1, {'a': 'has_wiki', 'c': 'has_projects'},
+                                                    {'b': 'RuntimeError: boom'}).report())
+
+    def test_missing_shards_are_reported(self):
+        summary, missing = merge_reports([Report('myorg', _summary(2), Shard(2, 3))])
+
+        self.assertEqual(missing, ['1/3', '3/3'])
+        self.assertEqual(summary.assessed, 2)
+
+    def test_reports_from_different_runs_are_rejected(self):
+        for reports in ([Report('myorg', _summary(), Shard(1, 2)), Report('other', _summary(), Shard(2, 2))],
+                        [Report('myorg', _summary(), Shard(1, 2)), Report('myorg', _summary(), Shard(1, 3))],
+                        [Report('myorg', _summary(), Shard(1, 2)), Report('myorg', _summary(), Shard(1, 2))],
+                        [Report('myorg', _summary()), Report('myorg', _summary())],
+                        []):
+            with self.assertRaises(ValueError):
+                merge_reports(reports)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import functools
+import io
+import os
+import unittest
+from unittest import mock
+
+from requests import PreparedRequest, Response
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.retry import TransientRetry, is_idempotent
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+
+def _request(method='GET', url='https://api.github.com/repos/my-org/my-repo'):
+    request = PreparedRequest()
+    request.prepare(method=method, url=url)
+    return request
+
+
+def _response(status=200, **headers):
+    response = Response()
+    response.status_code = status
+    response._content = b'{}'
+    response._content_consumed = True
+    response.headers.update(headers)
+    return response
+
+
+class TestTransientRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.retry = TransientRetry(max_retries=3, base_delay=1.0, max_delay=5.0, sleep=self.sleeps.append,
+                                    jitter=lambda low, high: high)
+
+    def _send(self, request, *outcomes):
+        outcomes = list(outcomes)
+
+        def send(_):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.retry.send(request, send)
+
+    def test_server_errors_are_retried_with_backoff(self):
+        response = self._send(_request(), _response(502), _response(503), _response(504), _response(200))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sleeps, [1.0, 2.0, 4.0])
+        self.assertEqual(self.retry.retried, 3)
+
+    def test_backoff_is_capped_and_jittered(self):
+        retry = TransientRetry(max_retries=5, base_delay=1.0, max_delay=5.0, sleep=self.sleeps.append,
+                               jitter=lambda low, high: (low, high))
+        self.assertEqual([retry._delay(None, attempt) for attempt in range(4)], [(0, 1.0), (0, 2.0), (0, 4.0),
+                                                                                 (0, 5.0)])
+
+    def test_retry_after_is_honoured(self):
+        self._send(_request(), _response(503, **{'Retry-After': '7'}), _response(200))
+        self.assertEqual(self.sleeps, [7.0])
+
+    def test_gives_up_after_max_retries(self):
+        response = self._send(_request(), *[_response(502)] * 4)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(self.retry.gave_up, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertEqual(self._send(_request(), _response(404)).status_code, 404)
+        self.assertEqual(self.sleeps, [])
+
+    def test_read_timeout_on_idempotent_write_is_retried(self):
+        response = self._send(_request('PATCH'), ReadTimeout(), _response(200))
+        self.assertEqual(response.status_code, 200)
+
+    def test_non_idempotent_post_is_only_retried_when_never_sent(self):
+        create = _request('POST', 'https://api.github.com/orgs/my-org/rulesets')
+
+        self.assertEqual(self._send(create, _response(502)).status_code, 502)
+        with self.assertRaises(ReadTimeout):
+            self._send(create, ReadTimeout())
+        self.assertEqual(self._send(create, ConnectTimeout(), _response(201)).status_code, 201)
+        self.assertEqual(self.sleeps, [1.0])
+
+    def test_idempotent_requests(self):
+        self.assertTrue(is_idempotent(_request('PUT')))
+        self.assertTrue(is_idempotent(_request('POST', 'https://api.github.com/graphql')))
+        self.assertTrue(is_idempotent(_request(
+            'POST', 'https://api.github.com/repos/o/r/branches/main/protection/required_signatures')))
+        self.assertFalse(is_idempotent(_request('POST', 'https://api.github.com/orgs/o/rulesets')))
+
+
+class TestRetriesAgainstFakeGitHub(unittest.TestCase):
+
+    def test_outage_is_ridden_out(self):
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+
+        with FakeGitHub(GH_ORG_NAME, [drifted, FakeRepo('in-spec')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), \
+                mock.patch('github_standards.__main__.TransientRetry', functools.partial(TransientRetry, base_delay=0)), \
+                contextlib.redirect_stdout(io.StringIO()):
+            fake.failures['GET /repos/{org}/{repo}'] = 2
+            fake.failures['PATCH /repos/{org}/{repo}'] = 1
+            main(['--api-url', fake.url])
+
+        self.assertEqual(fake.requests['PATCH /repos/{org}/{repo}'], 2)
+        self.assertFalse(drifted.settings['has_wiki'])
+
+
+if __name__ == '__main__':
+    unittest.main()
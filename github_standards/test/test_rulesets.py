@@ -0,0 +1,175 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import dataclasses
+import io
+import os
+import unittest
+import tempfile
+from unittest import mock
+
+from github_standards.__main__ import GH_ORG_NAME, main, parse_args
+from github_standards.events import read_events
+from github_standards.properties import AUTO_APPLY_STANDARDS, CustomPropertyIndex
+from github_standards.rulesets import STANDARDS_RULESET_NAME, merged_conditions, ruleset_not_as_per_standards, \
+    standard_conditions, standard_rules
+from github_standards.standards import DEFAULT_POLICY
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+PROPERTIES = CustomPropertyIndex({'in-spec': {AUTO_APPLY_STANDARDS: 'true'},
+                                  'unmanaged': {AUTO_APPLY_STANDARDS: 'false'},
+                                  '.github': {AUTO_APPLY_STANDARDS: 'true'}}, excluded_repo_names=['.github'])
+
+
+def _standard_ruleset():
+    return {'id': 1, 'name': STANDARDS_RULESET_NAME, 'enforcement': 'active',
+            'conditions': standard_conditions(PROPERTIES), 'rules': standard_rules()}
+
+
+def _managed(*names):
+    return CustomPropertyIndex({name: {AUTO_APPLY_STANDARDS: 'true'} for name in names},
+                               excluded_repo_names=['.github'])
+
+
+class TestRulesetNotAsPerStandards(unittest.TestCase):
+
+    def test_missing_ruleset_misses_every_standard(self):
+        self.assertEqual(ruleset_not_as_per_standards(None, PROPERTIES),
+                         ['allow_deletions', 'allow_force_pushes', 'require_code_owner_reviews',
+                          'required_approving_review_count', 'required_signatures'])
+
+    def test_standard_ruleset(self):
+        self.assertEqual(ruleset_not_as_per_standards(_standard_ruleset(), PROPERTIES), [])
+
+    def test_extra_rules_are_fine(self):
+        ruleset = _standard_ruleset()
+        ruleset['rules'].append({'type': 'required_linear_history'})
+        self.assertEqual(ruleset_not_as_per_standards(ruleset, PROPERTIES), [])
+
+    def test_drifted_ruleset(self):
+        ruleset = _standard_ruleset()
+        ruleset['enforcement'] = 'evaluate'
+        ruleset['conditions']['repository_name']['include'].append('unmanaged')
+        ruleset['rules'] = [rule for rule in ruleset['rules'] if rule['type'] != 'deletion']
+        ruleset['rules'][-2]['parameters']['required_approving_review_count'] = 0
+        self.assertEqual(ruleset_not_as_per_standards(ruleset, PROPERTIES),
+                         ['ruleset_enforcement', 'ruleset_conditions', 'allow_deletions',
+                          'required_approving_review_count'])
+
+    def test_branch_patterns_are_targeted(self):
+        policy = dataclasses.replace(DEFAULT_POLICY, branch_patterns=('release/*',))
+        self.assertEqual(standard_conditions(PROPERTIES, policy)['ref_name']['include'],
+                         ['~DEFAULT_BRANCH', 'refs/heads/release/*'])
+        self.assertEqual(ruleset_not_as_per_standards(_standard_ruleset(), PROPERTIES, policy), ['ruleset_conditions'])
+
+    def test_targets_the_repos_the_classic_backend_manages(self):
+        properties = CustomPropertyIndex({'yes': {AUTO_APPLY_STANDARDS: 'yes'}, 'unset': {},
+                                          'in-spec': {AUTO_APPLY_STANDARDS: 'true'},
+                                          '.github': {AUTO_APPLY_STANDARDS: 'true'}}, excluded_repo_names=['.github'])
+        self.assertEqual(standard_conditions(properties)['repository_name'],
+                         {'include': ['in-spec', 'yes'], 'exclude': ['.github']})
+        self.assertEqual(ruleset_not_as_per_standards(_standard_ruleset(), properties), ['ruleset_conditions'])
+
+    def test_conditions_added_by_hand_are_kept(self):
+        ruleset = _standard_ruleset()
+        ruleset['conditions']['ref_name']['exclude'] = ['refs/heads/legacy']
+        ruleset['conditions']['repository_name']['exclude'].append('sandbox')
+        self.assertEqual(ruleset_not_as_per_standards(ruleset, PROPERTIES), [])
+
+        ruleset['conditions']['repository_name']['include'] = ['unmanaged']
+        self.assertEqual(merged_conditions(ruleset, PROPERTIES),
+                         {'ref_name': {'include': ['~DEFAULT_BRANCH'], 'exclude': ['refs/heads/legacy']},
+                          'repository_name': {'include': ['in-spec'], 'exclude': ['.github', 'sandbox']}})
+
+
+class TestRulesetsBackend(unittest.TestCase):
+
+    def _run(self, fake, *args):
+        output = io.StringIO()
+        with mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(output):
+            main(['--api-url', fake.url, '--backend', 'rulesets', *args])
+        return output.getvalue()
+
+    def test_creates_ruleset_once_and_reads_no_branches(self):
+        drifted = FakeRepo('drifted')
+        drifted.settings['has_wiki'] = True
+        repos = [FakeRepo('in-spec'), drifted, FakeRepo('unprotected', protection=None)]
+
+        with FakeGitHub(GH_ORG_NAME, repos) as fake:
+            output = self._run(fake)
+            writes = dict(fake.writes)
+            fake.writes.clear()
+            fake.requests.clear()
+            second_output = self._run(fake)
+
+        self.assertEqual(writes, {'POST /orgs/{org}/rulesets': 1, 'PATCH /repos/{org}/{repo}': 1})
+        self.assertEqual([ruleset['name'] for ruleset in fake.rulesets.values()], [STANDARDS_RULESET_NAME])
+        self.assertEqual(ruleset_not_as_per_standards(fake.rulesets[1], _managed('in-spec', 'drifted', 'unprotected')),
+                         [])
+        self.assertIn('in-spec: allow_deletions', output)
+        self.assertEqual(dict(fake.writes), {})
+        self.assertEqual(fake.requests['GET /repos/{org}/{repo}'], 3)
+        self.assertFalse([route for route in fake.requests if '/branches/' in route])
+        self.assertNotIn('Out of standards', second_output)
+
+    def test_dry_run_repairs_nothing(self):
+        with FakeGitHub(GH_ORG_NAME, [FakeRepo('in-spec')]) as fake:
+            output = self._run(fake, '--dry-run')
+
+        self.assertEqual(dict(fake.writes), {})
+        self.assertEqual(fake.rulesets, {})
+        self.assertIn('does not exist', output)
+
+    def test_ruleset_findings_are_logged_for_each_repo(self):
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, [FakeRepo('in-spec')]) as fake:
+            fake.rulesets[7] = dict(_standard_ruleset(), enforcement='evaluate')
+            path = os.path.join(tmp, 'events.jsonl')
+            output = self._run(fake, '--dry-run', '--event-log', path)
+            events = list(read_events(path))
+
+        self.assertIn(f'{GH_ORG_NAME} ruleset_enforcement is evaluate, expected active (reported)', output)
+        self.assertEqual([(event['repo'], event.get('branch'), event['rule'], event['expected'], event['actual'])
+                          for event in events if event['type'] == 'finding'],
+                         [('in-spec', 'main', 'ruleset_enforcement', 'active', 'evaluate')])
+        self.assertEqual(events[-1]['missing'], ['ruleset_enforcement'])
+
+    def test_existing_ruleset_is_updated_in_place(self):
+        with FakeGitHub(GH_ORG_NAME, [FakeRepo('in-spec')]) as fake:
+            # as an earlier version made it, matching on the custom property
+            fake.rulesets[7] = {'name': STANDARDS_RULESET_NAME, 'enforcement': 'disabled',
+                                'conditions': {
+                                    'ref_name': {'include': ['~DEFAULT_BRANCH'], 'exclude': ['refs/heads/x']},
+                                    'repository_property': {'include': [], 'exclude': []}},
+                                'rules': [{'type': 'required_linear_history'}]}
+            output = self._run(fake)
+
+        self.assertIn(f'{GH_ORG_NAME} allow_deletions is None, expected False (applied)', output)
+        self.assertEqual(dict(fake.writes), {'PUT /orgs/{org}/rulesets/{ruleset_id}': 1})
+        self.assertEqual(ruleset_not_as_per_standards(fake.rulesets[7], PROPERTIES), [])
+        self.assertEqual(fake.rulesets[7]['conditions'],
+                         {'ref_name': {'include': ['~DEFAULT_BRANCH'], 'exclude': ['refs/heads/x']},
+                          'repository_name': {'include': ['in-spec'], 'exclude': ['.github']}})
+        self.assertIn({'type': 'required_linear_history'}, fake.rulesets[7]['rules'])
+
+    def test_plan_needs_classic_backend(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(['--backend', 'rulesets', 'plan', 'plan.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import contextlib
+import io
+import time
+import unittest
+
+from types import SimpleNamespace
+
+from github_standards import runner
+
+
+def _repo(name):
+    return SimpleNamespace(name=name)
+
+
+def _slow_first_action(repo):
+    print(f'start {repo.name}')
+    # make the first repo finish last so any interleaving would show up in the output
+    time.sleep(0.05 if repo.name == 'repo-0' else 0)
+    print(f'end {repo.name}')
+    return '' if repo.name != 'repo-2' else 'has_wiki'
+
+
+class TestRunForEachRepo(unittest.TestCase):
+    def test_output_is_grouped_and_in_listing_order(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            summary = runner.run_for_each_repo([_repo(f'repo-{i}') for i in range(4)], _slow_first_action,
+                                               workers=4)
+
+        expected = ''.join(f'start repo-{i}\nend repo-{i}\n' for i in range(4))
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(summary.assessed, 4)
+        self.assertEqual(summary.out_of_standards, {'repo-2': 'has_wiki'})
+
+    def test_failure_is_recorded_and_run_continues(self):
+        def action(repo):
+            if repo.name == 'bad':
+                raise RuntimeError('boom')
+            return None if repo.name == 'skipped' else ''
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            summary = runner.run_for_each_repo([_repo('bad'), _repo('good'), _repo('skipped')], action, workers=2)
+
+        self.assertEqual(summary.failed, {'bad': 'RuntimeError: boom'})
+        self.assertEqual(summary.assessed, 1)
+        self.assertEqual(summary.skipped, 1)
+        self.assertIn('RuntimeError: boom', out.getvalue())
+
+    def test_summary_report_is_sorted(self):
+        summary = runner.RunSummary()
+        summary.record('zeta', 'has_wiki', None)
+        summary.record('alpha', 'has_projects', None)
+        summary.record('beta', '', None)
+
+        self.assertEqual(summary.report(), 'Summary: 3 repos processed, 3 assessed, 0 skipped, 0 failed\n'
+                                           '    Out of standards (2):\n'
+                                           '        alpha: has_projects\n'
+                                           '        zeta: has_wiki')
+
+
+
+class _Recorder(runner.Tracker):
+    def __init__(self, name, seen, skip=()):
+        self.name = name
+        self.seen = seen
+        self.skip = skip
+
+    def started(self, item):
+        self.seen.append((self.name, 'started', item.name))
+        return ('from before',) if item.name in self.skip else None
+
+    def finished(self, item, missing, error):
+        self.seen.append((self.name, 'finished', item.name, missing, type(error).__name__ if error else None))
+
+
+class TestTrack(unittest.TestCase):
+    def test_trackers_follow_the_action_first_innermost(self):
+        seen = []
+
+        def action(repo):
+            if repo.name == 'broken':
+                raise ValueError(repo.name)
+            return 'has_wiki'
+
+        tracked = runner.track(action, [_Recorder('inner', seen, skip={'done'}), _Recorder('outer', seen)])
+        self.assertEqual(tracked(_repo('repo')), 'has_wiki')
+        self.assertEqual(tracked(_repo('done')), 'from before')
+        with self.assertRaises(ValueError):
+            tracked(_repo('broken'))
+
+        self.assertEqual(seen, [
+            ('outer', 'started', 'repo'), ('inner', 'started', 'repo'),
+            ('inner', 'finished', 'repo', 'has_wiki', None), ('outer', 'finished', 'repo', 'has_wiki', None),
+            ('outer', 'started', 'done'), ('inner', 'started', 'done'),
+            ('outer', 'finished', 'done', 'from before', None),
+            ('outer', 'started', 'broken'), ('inner', 'started', 'broken'),
+            ('inner', 'finished', 'broken', None, 'ValueError'), ('outer', 'finished', 'broken', None, 'ValueError')])
+
+    def test_async(self):
+        seen = []
+
+        async def action(repo):
+            return ''
+
+        tracked = runner.track_async(action, [_Recorder('only', seen)])
+        self.assertEqual(asyncio.run(tracked(_repo('repo'))), '')
+        self.assertEqual(seen, [('only', 'started', 'repo'), ('only', 'finished', 'repo', '', None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
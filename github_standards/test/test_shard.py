@@ -0,0 +1,57 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+
+from github_standards.plan import RepoPlan
+from github_standards.shard import Shard, shard_of
+
+REPO_NAMES = [f'repo-{i}' for i in range(200)]
+
+
+class TestShard(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(Shard.parse('2/4'), Shard(2, 4))
+        self.assertEqual(str(Shard.parse('2/4')), '2/4')
+        for value in ('0/4', '5/4', '1/0', '2', 'a/b', '-1/4'):
+            with self.assertRaises(ValueError, msg=value):
+                Shard.parse(value)
+
+    def test_shards_are_disjoint_and_cover_every_repo(self):
+        shards = [Shard(index, 4) for index in range(1, 5)]
+        selected = [[name for name in REPO_NAMES if shard.includes(name)] for shard in shards]
+
+        self.assertEqual(sorted(sum(selected, [])), sorted(REPO_NAMES))
+        # roughly even - no shard should be left with (almost) nothing to do
+        for names in selected:
+            self.assertGreater(len(names), len(REPO_NAMES) // 8)
+
+    def test_shard_depends_only_on_the_name(self):
+        # pinned, so a change to the hash (which would move repos between shards and their state) is deliberate
+        self.assertEqual([shard_of(name, 4) for name in REPO_NAMES[:8]], [2, 3, 2, 2, 3, 3, 1, 2])
+
+    def test_select_keeps_listing_order(self):
+        repo_plans = [RepoPlan(name, []) for name in REPO_NAMES]
+
+        selected = list(Shard(3, 4).select(repo_plans))
+
+        self.assertEqual([repo_plan.name for repo_plan in selected],
+                         [name for name in REPO_NAMES if shard_of(name, 4) == 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import unittest
+
+from dataclasses import FrozenInstanceError, replace
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from github import GithubException
+from github.BranchProtection import BranchProtection
+
+from github_standards import standards
+from github_standards.snapshot import BranchSnapshot, fetch_branch_snapshot, protection_settings
+
+IN_SPEC_BRANCH = BranchSnapshot(name='main', protected=True, allow_deletions=False, allow_force_pushes=False,
+                                require_code_owner_reviews=True, required_approving_review_count=1,
+                                required_signatures=True)
+
+
+def _not_found():
+    raise GithubException(status=404, data=None)
+
+
+class TestBranchSnapshot(unittest.TestCase):
+    def test_fetch_reads_the_protection_once(self):
+        branch = MagicMock()
+        branch.name = 'main'
+        branch.get_protection.return_value = BranchProtection(MagicMock(), {}, {
+            'url': 'https://api.github.com/repos/o/r/branches/main/protection',
+            'allow_deletions': {'enabled': False},
+            'allow_force_pushes': {'enabled': True},
+            'required_pull_request_reviews': {'require_code_owner_reviews': True, 'required_approving_review_count': 1},
+            'required_signatures': {'enabled': True},
+        }, completed=True)
+
+        snapshot = fetch_branch_snapshot(branch)
+
+        self.assertEqual(replace(snapshot, settings={}),
+                         BranchSnapshot(name='main', protected=True, allow_deletions=False, allow_force_pushes=True,
+                                        require_code_owner_reviews=True, required_approving_review_count=1,
+                                        required_signatures=True))
+        branch.get_protection.assert_called_once_with()
+        # the reviews and signatures are part of the protection
+        branch.get_required_pull_request_reviews.assert_not_called()
+        branch.get_required_signatures.assert_not_called()
+
+    def test_fetch_unprotected_branch(self):
+        branch = MagicMock()
+        branch.name = 'main'
+        branch.get_protection.side_effect = _not_found
+
+        snapshot = fetch_branch_snapshot(branch)
+
+        self.assertFalse(snapshot.protected)
+        self.assertIsNone(snapshot.require_code_owner_reviews)
+        self.assertFalse(snapshot.required_signatures)
+        branch.get_required_pull_request_reviews.assert_not_called()
+        branch.get_required_signatures.assert_not_called()
+
+    def test_reviews_that_are_not_required(self):
+        branch = MagicMock()
+        branch.get_protection.return_value = BranchProtection(MagicMock(), {}, {
+            'url': 'https://api.github.com/repos/o/r/branches/main/protection',
+            'allow_deletions': {'enabled': False}, 'allow_force_pushes': {'enabled': False}}, completed=True)
+
+        snapshot = fetch_branch_snapshot(branch)
+
+        self.assertTrue(snapshot.protected)
+        self.assertIsNone(snapshot.required_approving_review_count)
+        self.assertFalse(snapshot.required_signatures)
+
+    def test_fetch_does_not_hide_other_errors(self):
+        branch = MagicMock()
+        branch.get_protection.side_effect = GithubException(status=502, data=None)
+
+        with self.assertRaises(GithubException):
+            fetch_branch_snapshot(branch)
+
+    def test_snapshot_is_immutable(self):
+        with self.assertRaises(FrozenInstanceError):
+            IN_SPEC_BRANCH.allow_deletions = True
+
+    def test_checks_against_snapshot_make_no_reads(self):
+        branch = MagicMock()
+        snapshot = BranchSnapshot(name='main', protected=True, allow_deletions=True, allow_force_pushes=False,
+                                  require_code_owner_reviews=True, required_approving_review_count=0,
+                                  required_signatures=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = standards.check_and_apply_standard_properties_to_branch(SimpleNamespace(name='myrepo'), branch,
+                                                                             True, snapshot=snapshot)
+
+        self.assertEqual(str(result), 'allow_deletions,required_approving_review_count,required_signatures')
+        self.assertEqual([c[0] for c in branch.method_calls], ['edit_protection', 'add_required_signatures'])
+
+
+class TestProtectionSettings(unittest.TestCase):
+    def test_whole_protection_is_kept(self):
+        raw = {
+            'url': 'https://api.github.com/repos/o/r/branches/main/protection',
+            'required_status_checks': {'strict': True, 'contexts': ['build'], 'checks': [{'context': 'build'}]},
+            'enforce_admins': {'enabled': True},
+            'required_pull_request_reviews': {
+                'dismiss_stale_reviews': True, 'require_code_owner_reviews': False,
+                'required_approving_review_count': 2,
+                'dismissal_restrictions': {'users': [{'login': 'octocat'}], 'teams': [], 'apps': []},
+                'bypass_pull_request_allowances': {'users': [], 'teams': [{'slug': 'release'}], 'apps': []}},
+            'restrictions': {'users': [], 'teams': [{'slug': 'admins'}], 'apps': [{'slug': 'bot'}]},
+            'required_linear_history': {'enabled': True},
+            'allow_force_pushes': {'enabled': False},
+            'allow_deletions': {'enabled': False},
+            'required_signatures': {'enabled': True},
+        }
+
+        self.assertEqual(protection_settings(raw), {
+            'strict': True, 'contexts': ['build'], 'enforce_admins': True,
+            'dismiss_stale_reviews': True, 'require_code_owner_reviews': False, 'required_approving_review_count': 2,
+            'dismissal_users': ['octocat'], 'dismissal_teams': [], 'dismissal_apps': [],
+            'users_bypass_pull_request_allowances': [], 'teams_bypass_pull_request_allowances': ['release'],
+            'apps_bypass_pull_request_allowances': [],
+            'user_push_restrictions': [], 'team_push_restrictions': ['admins'], 'app_push_restrictions': ['bot'],
+            'required_linear_history': True, 'allow_force_pushes': False, 'allow_deletions': False,
+        })
+
+    def test_nothing_enabled(self):
+        self.assertEqual(protection_settings({'url': 'https://api.github.com/repos/o/r/branches/main/protection'}),
+                         {})
+
+
+if __name__ == '__main__':
+    unittest.main()
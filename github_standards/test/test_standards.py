@@ -24,7 +24,6 @@ from github.Branch import Branch
 from github.BranchProtection import BranchProtection
 from github.Repository import Repository
 from github.Requester import Requester
-from github.RequiredPullRequestReviews import RequiredPullRequestReviews
 
 from github_standards import standards
 
@@ -51,7 +50,7 @@ class TestStandardProps(unittest.TestCase):
                           completed='')
         result = standards.check_and_apply_standard_properties_to_repo(repo)
 
-        self.assertEqual(result, "")
+        self.assertEqual(str(result), "")
 
     def test_props_out_of_spec_makes_a_change(self):
         # noinspection PyTypeChecker
@@ -73,7 +72,9 @@ class TestStandardProps(unittest.TestCase):
         repo.edit = MagicMock()
         result = standards.check_and_apply_standard_properties_to_repo(repo, True)
 
-        self.assertEqual(result, "has_projects")  # add assertion here
+        self.assertEqual(str(result), "has_projects")  # add assertion here
+        self.assertEqual(result.findings, (standards.Finding('has_projects', False, True),))
+        self.assertTrue(result.applied)
         repo.edit.assert_called_with(allow_auto_merge=False,
                                      allow_merge_commit=True,
                                      allow_rebase_merge=False,
@@ -106,7 +107,7 @@ class TestStandardProps(unittest.TestCase):
         repo.edit = MagicMock()
         result = standards.check_and_apply_standard_properties_to_repo(repo, True)
 
-        self.assertEqual(result, "allow_squash_merge,has_projects")  # add assertion here
+        self.assertEqual(str(result), "allow_squash_merge,has_projects")  # add assertion here
         repo.edit.assert_called_with(allow_auto_merge=False,
                                      allow_merge_commit=True,
                                      allow_rebase_merge=False,
@@ -145,24 +146,18 @@ class TestStandardProps(unittest.TestCase):
         # noinspection PyTypeChecker
         bp = BranchProtection(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
                                                                            "allow_deletions": {"enabled": False},
-                                                                           "allow_force_pushes": {"enabled": False}},
-                              completed='')
+                                                                           "allow_force_pushes": {"enabled": False},
+                                                                           "required_pull_request_reviews": {
+                                                                               "url": MOCK_REPO_URL,
+                                                                               "require_code_owner_reviews": True,
+                                                                               "required_approving_review_count": 1},
+                                                                           "required_signatures": {"enabled": True}},
+                              completed=True)
         branch.get_protection.return_value = bp
 
-        branch.get_required_pull_request_reviews = MagicMock()
-        # noinspection PyTypeChecker
-        rprr = RequiredPullRequestReviews(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
-                                                                                       'require_code_owner_reviews': True,
-                                                                                       'required_approving_review_count': 1},
-                                          completed='')
-        branch.get_required_pull_request_reviews.return_value = rprr
-
-        branch.get_required_signatures = MagicMock()
-        branch.get_required_signatures.return_value = True
-
         result = standards.check_and_apply_standard_properties_to_branch(repo, branch)
 
-        self.assertEqual(result, "")
+        self.assertEqual(str(result), "")
 
     def test_props_out_of_spec_branch_makes_a_change_no_branch_protection(self):
         repo = self.create_mock_repo()
@@ -175,23 +170,17 @@ class TestStandardProps(unittest.TestCase):
         branch.get_protection.side_effect = ghe
 
         branch.edit_protection = MagicMock()
-
-        branch.get_required_pull_request_reviews = MagicMock()
-        # noinspection PyTypeChecker
-        rprr = RequiredPullRequestReviews(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
-                                                                                       'require_code_owner_reviews': True,
-                                                                                       'required_approving_review_count': 1},
-                                          completed='')
-        branch.get_required_pull_request_reviews.return_value = rprr
-
-        branch.get_required_signatures = MagicMock()
-        branch.get_required_signatures.return_value = True
+        branch.add_required_signatures = MagicMock()
 
         result = standards.check_and_apply_standard_properties_to_branch(repo, branch, True)
 
-        self.assertEqual(result, "")
+        # an unprotected branch requires neither reviews nor signatures
+        self.assertEqual(str(result), "require_code_owner_reviews,required_approving_review_count,required_signatures")
         branch.edit_protection.assert_called_once_with(allow_deletions=False,
-                                                       allow_force_pushes=False)
+                                                       allow_force_pushes=False,
+                                                       require_code_owner_reviews=True,
+                                                       required_approving_review_count=1)
+        branch.add_required_signatures.assert_called_once_with()
 
     # This test is to cover the case where the branch protection is disabled on the repo and the CI tries to enable it,
     # but the attempt fails. We want CI to fail in this situation.
@@ -210,16 +199,6 @@ class TestStandardProps(unittest.TestCase):
         ghe_branch_protection = GithubException(status=404, data='Branch protection has been disabled on this repository.')
         branch.edit_protection.side_effect = ghe_branch_protection
 
-        branch.get_required_pull_request_reviews = MagicMock()
-        # noinspection PyTypeChecker
-        rprr = RequiredPullRequestReviews(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
-                                                                                       'require_code_owner_reviews': True,
-                                                                                       'required_approving_review_count': 1},
-                                          completed='')
-        branch.get_required_pull_request_reviews.return_value = rprr
-
-        branch.get_required_signatures = MagicMock()
-        branch.get_required_signatures.return_value = True
 
         # result = standards.check_and_apply_standard_properties_to_branch(repo, branch, True)
         result = ""
@@ -229,9 +208,11 @@ class TestStandardProps(unittest.TestCase):
             self.assertEqual(e.status, 404)
             self.assertEqual(e.data, 'Branch protection has been disabled on this repository.')
 
-        self.assertEqual(result, "")
+        self.assertEqual(str(result), "")
         branch.edit_protection.assert_called_once_with(allow_deletions=False,
-                                                       allow_force_pushes=False)
+                                                       allow_force_pushes=False,
+                                                       require_code_owner_reviews=True,
+                                                       required_approving_review_count=1)
 
     def test_props_out_of_spec_branch_makes_a_change(self):
         repo = self.create_mock_repo()
@@ -243,29 +224,24 @@ class TestStandardProps(unittest.TestCase):
         # noinspection PyTypeChecker
         bp = BranchProtection(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
                                                                            "allow_deletions": {"enabled": False},
-                                                                           "allow_force_pushes": {"enabled": True}},
-                              # this is the only change
-                              completed='')
+                                                                           "allow_force_pushes": {"enabled": True},  # this is the only change
+                                                                           "required_pull_request_reviews": {
+                                                                               "url": MOCK_REPO_URL,
+                                                                               "require_code_owner_reviews": True,
+                                                                               "required_approving_review_count": 1},
+                                                                           "required_signatures": {"enabled": True}},
+                              completed=True)
         branch.get_protection.return_value = bp
 
         branch.edit_protection = MagicMock()
 
-        branch.get_required_pull_request_reviews = MagicMock()
-        # noinspection PyTypeChecker
-        rprr = RequiredPullRequestReviews(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
-                                                                                       'require_code_owner_reviews': True,
-                                                                                       'required_approving_review_count': 1},
-                                          completed='')
-        branch.get_required_pull_request_reviews.return_value = rprr
-
-        branch.get_required_signatures = MagicMock()
-        branch.get_required_signatures.return_value = True
-
         result = standards.check_and_apply_standard_properties_to_branch(repo, branch, True)
 
-        self.assertEqual(result, "allow_force_pushes")  # add assertion here
+        self.assertEqual(str(result), "allow_force_pushes")  # add assertion here
         branch.edit_protection.assert_called_once_with(allow_deletions=False,
-                                                       allow_force_pushes=False)  # this is the only change
+                                                       allow_force_pushes=False,  # this is the only change
+                                                       require_code_owner_reviews=True,
+                                                       required_approving_review_count=1)
 
     def test_props_out_of_spec_branch_makes_many_changes(self):
         repo = self.create_mock_repo()
@@ -277,36 +253,58 @@ class TestStandardProps(unittest.TestCase):
         # noinspection PyTypeChecker
         bp = BranchProtection(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
                                                                            "allow_deletions": {"enabled": False},
-                                                                           "allow_force_pushes": {"enabled": True}},
-                              # change 1
-                              completed='')
+                                                                           "allow_force_pushes": {"enabled": True},  # change 1
+                                                                           "required_pull_request_reviews": {
+                                                                               "url": MOCK_REPO_URL,
+                                                                               "require_code_owner_reviews": True,
+                                                                               "required_approving_review_count": 0},  # change 2
+                                                                           "required_signatures": {"enabled": False}},  # change 3
+                              completed=True)
         branch.get_protection.return_value = bp
 
         branch.edit_protection = MagicMock()
 
-        branch.get_required_pull_request_reviews = MagicMock()
+        branch.add_required_signatures = MagicMock()
+
+        result = standards.check_and_apply_standard_properties_to_branch(repo, branch, True)
+
+        self.assertEqual(str(result),
+                         "allow_force_pushes,required_approving_review_count,required_signatures")
+        # a single protection write carries every change, signatures have their own endpoint
+        branch.edit_protection.assert_called_once_with(allow_deletions=False,
+                                                       allow_force_pushes=False,
+                                                       require_code_owner_reviews=True,
+                                                       required_approving_review_count=1)
+        branch.add_required_signatures.assert_called_once_with()
+
+    def test_only_signatures_out_of_spec_branch_skips_protection_write(self):
+        repo = self.create_mock_repo()
+
+        requester = self.create_mock_requester()
         # noinspection PyTypeChecker
-        rprr = RequiredPullRequestReviews(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
-                                                                                       'require_code_owner_reviews': True,
-                                                                                       'required_approving_review_count': 0},
-                                          # change 2
-                                          completed='')
-        branch.get_required_pull_request_reviews.return_value = rprr
+        branch = Branch(requester='', headers='', attributes={}, completed='')
+        branch.get_protection = MagicMock()
+        # noinspection PyTypeChecker
+        bp = BranchProtection(requester=requester, headers='', attributes={"url": MOCK_REPO_URL,
+                                                                           "allow_deletions": {"enabled": False},
+                                                                           "allow_force_pushes": {"enabled": False},
+                                                                           "required_pull_request_reviews": {
+                                                                               "url": MOCK_REPO_URL,
+                                                                               "require_code_owner_reviews": True,
+                                                                               "required_approving_review_count": 1},
+                                                                           "required_signatures": {"enabled": False}},  # the only change
+                              completed=True)
+        branch.get_protection.return_value = bp
 
-        branch.get_required_signatures = MagicMock()
-        branch.get_required_signatures.return_value = False  # change 3
+        branch.edit_protection = MagicMock()
 
         branch.add_required_signatures = MagicMock()
 
         result = standards.check_and_apply_standard_properties_to_branch(repo, branch, True)
 
-        self.assertEqual(result,
-                         "allow_force_pushes,required_approving_review_count,required_signatures")
-        branch.edit_protection.assert_any_call(allow_deletions=False,
-                                               allow_force_pushes=False)
-        branch.edit_protection.assert_called_with(require_code_owner_reviews=True,
-                                                  required_approving_review_count=1)
-        branch.add_required_signatures.assert_called()
+        self.assertEqual(str(result), "required_signatures")
+        branch.edit_protection.assert_not_called()
+        branch.add_required_signatures.assert_called_once_with()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,172 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+from unittest.mock import MagicMock
+
+from github import GithubException
+
+from github_standards.__main__ import GH_ORG_NAME, main
+from github_standards.state import RunState
+from github_standards.test.fake_github import FakeGitHub, FakeRepo
+
+UPDATED_AT = datetime(2024, 5, 1, tzinfo=timezone.utc)
+PROPERTIES = {'Auto-Apply-Standards': 'true'}
+
+
+def _repo(name='myrepo', **overrides):
+    attributes = dict(name=name, updated_at=UPDATED_AT, pushed_at=UPDATED_AT, default_branch='main',
+                      has_discussions=True, has_issues=True, has_projects=False, has_wiki=False)
+    attributes.update(overrides)
+    return SimpleNamespace(**attributes)
+
+
+class TestRunState(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'state.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _saved_state_with(self, repo):
+        state = RunState(self.path)
+        state.record(repo, PROPERTIES)
+        state.save(full_sweep=True)
+        return RunState(self.path)
+
+    def test_unchanged_repo_is_skipped(self):
+        self.assertTrue(self._saved_state_with(_repo()).is_unchanged(_repo(), PROPERTIES))
+
+    def test_unknown_repo_is_not_skipped(self):
+        self.assertFalse(self._saved_state_with(_repo()).is_unchanged(_repo('other'), PROPERTIES))
+
+    def test_push_or_settings_change_is_noticed(self):
+        state = self._saved_state_with(_repo())
+
+        self.assertFalse(state.is_unchanged(_repo(pushed_at=UPDATED_AT + timedelta(hours=1)), PROPERTIES))
+        self.assertFalse(state.is_unchanged(_repo(has_wiki=True), PROPERTIES))
+        self.assertFalse(state.is_unchanged(_repo(), {}))
+
+    def test_forgotten_repo_is_not_skipped(self):
+        state = self._saved_state_with(_repo())
+        state.forget(_repo())
+
+        self.assertFalse(state.is_unchanged(_repo(), PROPERTIES))
+
+    def test_run_that_dies_is_picked_up_from_the_journal(self):
+        state = self._saved_state_with(_repo())
+        state.record(_repo('other'), PROPERTIES)
+        state.forget(_repo())
+
+        state = RunState(self.path)
+
+        self.assertTrue(state.is_unchanged(_repo('other'), PROPERTIES))
+        self.assertFalse(state.is_unchanged(_repo(), PROPERTIES))
+        state.save(full_sweep=False)
+        self.assertFalse(os.path.exists(state.journal_path))
+        self.assertEqual(sorted(RunState(self.path).repos), ['other'])
+
+    def test_journal_of_another_policy_makes_for_a_full_run(self):
+        state = RunState(self.path, policy='standards')
+        state.save(full_sweep=True)
+        RunState(self.path, policy='changed standards').record(_repo(), PROPERTIES)
+
+        self.assertIsNone(RunState(self.path).policy)
+
+    def test_full_sweep_due(self):
+        state = RunState(self.path)
+        self.assertTrue(state.full_sweep_due(7))
+
+        state.save(full_sweep=True)
+        self.assertFalse(RunState(self.path).full_sweep_due(7))
+
+        state.last_full_sweep = datetime.now(timezone.utc) - timedelta(days=8)
+        state.save(full_sweep=False)
+        self.assertTrue(RunState(self.path).full_sweep_due(7))
+
+    def test_repos_in_recent_events_are_not_skipped(self):
+        state = self._saved_state_with(_repo())
+        gh_org = MagicMock()
+        gh_org.get_events.return_value = [
+            SimpleNamespace(created_at=datetime.now(timezone.utc), repo=SimpleNamespace(name='my-org/myrepo')),
+            SimpleNamespace(created_at=state.last_run - timedelta(days=1), repo=SimpleNamespace(name='my-org/old')),
+        ]
+
+        state.load_changes_from_events(gh_org)
+
+        self.assertEqual(state.changed_by_events, {'myrepo'})
+        self.assertFalse(state.is_unchanged(_repo(), PROPERTIES))
+
+    def test_events_unavailable(self):
+        state = self._saved_state_with(_repo())
+        gh_org = MagicMock()
+        gh_org.get_events.side_effect = GithubException(status=403, data=None)
+
+        state.load_changes_from_events(gh_org)
+
+        self.assertTrue(state.is_unchanged(_repo(), PROPERTIES))
+
+
+class TestRunStateAgainstFakeGitHub(unittest.TestCase):
+
+    def test_failed_repo_is_looked_at_again(self):
+        repo = FakeRepo('repo-0')
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, [repo, FakeRepo('repo-1')]) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(tmp, 'state.json')
+            main(['--api-url', fake.url, '--state-file', path])
+
+            # drift that leaves the repo's timestamps alone, found by a run whose fix then fails
+            repo.protection['allow_force_pushes'] = True
+            fake.failures['PUT /repos/{org}/{repo}/branches/{branch}/protection'] = 1
+            with self.assertRaises(SystemExit):
+                main(['--api-url', fake.url, '--state-file', path, '--retries', '0'])
+            with open(path) as f:
+                self.assertEqual(sorted(json.load(f)['repos']), ['repo-1'])
+
+            main(['--api-url', fake.url, '--state-file', path, '--incremental'])
+
+        self.assertFalse(repo.protection['allow_force_pushes'])
+
+    def test_repos_done_before_a_resume_are_recorded(self):
+        repos = [FakeRepo('repo-0'), FakeRepo('repo-1', protection=None)]
+        with tempfile.TemporaryDirectory() as tmp, FakeGitHub(GH_ORG_NAME, repos) as fake, \
+                mock.patch.dict(os.environ, {'GH_TOKEN': 'token'}), contextlib.redirect_stdout(io.StringIO()):
+            checkpoint = os.path.join(tmp, 'checkpoint.jsonl')
+            path = os.path.join(tmp, 'state.json')
+            fake.failures['PUT /repos/{org}/{repo}/branches/{branch}/protection'] = 1
+            with self.assertRaises(SystemExit):
+                main(['--api-url', fake.url, '--checkpoint-file', checkpoint, '--retries', '0'])
+
+            main(['--api-url', fake.url, '--checkpoint-file', checkpoint, '--resume', '--state-file', path])
+
+            with open(path) as f:
+                self.assertEqual(sorted(json.load(f)['repos']), ['repo-0', 'repo-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
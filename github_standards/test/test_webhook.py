@@ -0,0 +1,167 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import hmac
+import json
+import threading
+import unittest
+from unittest import mock
+import urllib.error
+import urllib.request
+
+from github_standards.webhook import DebouncedQueue, WebhookServer, repo_name_for_event, verify_signature
+
+SECRET = b'webhook-secret'
+
+
+def _payload(repo_name='my-repo', org='my-org', **fields):
+    return dict({'repository': {'name': repo_name}, 'organization': {'login': org}}, **fields)
+
+
+def _sign(body, secret=SECRET):
+    return 'sha256=' + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEvents(unittest.TestCase):
+    def test_verify_signature(self):
+        body = b'{"zen": "Keep it logically awesome."}'
+
+        self.assertTrue(verify_signature(SECRET, body, _sign(body)))
+        self.assertFalse(verify_signature(SECRET, body, _sign(body, b'other-secret')))
+        self.assertFalse(verify_signature(SECRET, body + b' ', _sign(body)))
+        self.assertFalse(verify_signature(SECRET, body, None))
+
+    def test_repo_name_for_event(self):
+        self.assertEqual(repo_name_for_event('my-org', 'repository', _payload(action='edited')), 'my-repo')
+        self.assertEqual(repo_name_for_event('my-org', 'branch_protection_rule', _payload(action='deleted')),
+                         'my-repo')
+        self.assertEqual(repo_name_for_event('my-org', 'custom_property_values', _payload(action='updated')),
+                         'my-repo')
+
+        self.assertIsNone(repo_name_for_event('my-org', 'repository', _payload(action='deleted')))
+        self.assertIsNone(repo_name_for_event('my-org', 'push', _payload()))
+        self.assertIsNone(repo_name_for_event('my-org', 'repository', _payload(org='other-org', action='edited')))
+
+
+class TestDebouncedQueue(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.handled = []
+        self.queue = DebouncedQueue(self.handled.append, debounce=10, max_pending=2, clock=self.clock)
+
+    def test_events_in_a_burst_are_handled_once(self):
+        for t in (0, 5, 9):
+            self.clock.now = t
+            self.queue.submit('my-repo')
+
+        self.clock.now = 18
+        self.assertEqual(self.queue.run_due(), 0)
+        self.clock.now = 19
+        self.assertEqual(self.queue.run_due(), 1)
+        self.assertEqual(self.handled, ['my-repo'])
+
+    def test_queue_is_bounded(self):
+        self.assertTrue(self.queue.submit('a'))
+        self.assertTrue(self.queue.submit('b'))
+        self.assertFalse(self.queue.submit('c'))
+        # more events for a repository already waiting are still taken
+        self.assertTrue(self.queue.submit('a'))
+
+        self.clock.now = 10
+        self.queue.run_due()
+        self.assertEqual(sorted(self.handled), ['a', 'b'])
+        self.assertTrue(self.queue.submit('c'))
+
+    def test_failure_does_not_stop_the_queue(self):
+        def action(repo_name):
+            if repo_name == 'bad':
+                raise RuntimeError('boom')
+            self.handled.append(repo_name)
+
+        queue = DebouncedQueue(action, debounce=0, clock=self.clock)
+        queue.submit('bad')
+        queue.submit('good')
+
+        with mock.patch('traceback.print_exc'):
+            self.assertEqual(queue.run_due(), 2)
+        self.assertEqual(self.handled, ['good'])
+
+    def test_workers(self):
+        done = threading.Event()
+        queue = DebouncedQueue(lambda repo_name: done.set(), debounce=0.01)
+        queue.start(workers=2)
+        try:
+            queue.submit('my-repo')
+            self.assertTrue(done.wait(5))
+        finally:
+            queue.stop()
+
+
+class TestWebhookServer(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.handled = []
+        self.queue = DebouncedQueue(self.handled.append, debounce=0, max_pending=1, clock=self.clock)
+        self.server = WebhookServer(('127.0.0.1', 0), SECRET, 'my-org', self.queue)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _post(self, event, payload, signature=None):
+        body = json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'X-GitHub-Event': event, 'X-Hub-Signature-256': signature or _sign(body),
+            'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_signed_event_is_queued(self):
+        self.assertEqual(self._post('repository', _payload(action='edited')), 202)
+
+        self.queue.run_due()
+        self.assertEqual(self.handled, ['my-repo'])
+
+    def test_unsigned_event_is_rejected(self):
+        self.assertEqual(self._post('repository', _payload(action='edited'), signature='sha256=0'), 401)
+        self.assertEqual(self.queue.pending, 0)
+
+    def test_other_events_are_ignored(self):
+        self.assertEqual(self._post('ping', {'zen': 'Design for failure.'}), 200)
+        self.assertEqual(self.queue.pending, 0)
+
+    def test_full_queue_is_refused(self):
+        self.assertEqual(self._post('repository', _payload('a', action='edited')), 202)
+        self.assertEqual(self._post('repository', _payload('b', action='edited')), 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from typing import Callable, List, Protocol, Type, Union
+
+from github import Github
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+
+ConnectionClass = Type[Union[HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass]]
+Send = Callable[[PreparedRequest], Response]
+
+
+class Middleware(Protocol):
+    """
+    Something that sits between PyGithub and the network. It is given each request and a `send` callable that passes
+    the request on to the next middleware (or the network), and returns the response to hand back to PyGithub.
+    """
+
+    def send(self, request: PreparedRequest, send: Send) -> Response:
+        ...
+
+
+class MiddlewareAdapter(HTTPAdapter):
+    """
+    requests transport adapter that runs every request through a chain of middleware before it hits the network.
+    The first middleware in the chain sees the request first and the response last.
+    """
+
+    def __init__(self, middleware: List[Middleware], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.middleware = middleware
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        def send_from(index: int) -> Send:
+            if index == len(self.middleware):
+                return lambda r: super(MiddlewareAdapter, self).send(r, **kwargs)
+            return lambda r: self.middleware[index].send(r, send_from(index + 1))
+
+        return send_from(0)(request)
+
+
+def _connection_class_with_middleware(base: ConnectionClass) -> ConnectionClass:
+    class MiddlewareConnection(base):
+        middleware: List[Middleware] = []
+
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            self.adapter = MiddlewareAdapter(self.middleware, max_retries=self.retry, pool_connections=self.pool_size,
+                                             pool_maxsize=self.pool_size)
+            self.session.mount(f'{self.protocol}://', self.adapter)
+
+    return MiddlewareConnection
+
+
+def install_middleware(gh: Github, *middleware: Middleware) -> None:
+    """
+    Routes every request `gh` (and every object obtained from it) makes through `middleware`, after any middleware
+    installed by earlier calls.
+
+    Must be called before `gh` makes its first request. PyGithub has no public hook for this, so the connection class of
+    this one Requester is swapped - unlike `Requester.injectConnectionClasses` this keeps connections persistent and
+    leaves other Github instances alone.
+    """
+    requester = gh._Github__requester
+    connection_class = requester._Requester__connectionClass
+    if not hasattr(connection_class, 'middleware'):
+        connection_class = _connection_class_with_middleware(connection_class)
+        connection_class.middleware = []
+        requester._Requester__connectionClass = connection_class
+    connection_class.middleware.extend(middleware)
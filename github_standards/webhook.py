@@ -0,0 +1,220 @@
+# -*-: coding: utf-8
+
+#
+# Copyright 2023-Present Sonatype Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import hmac
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Events that can take a repository out of standards (or bring it into scope), and the actions of each that we ignore
+SUPPORTED_EVENTS = {
+    'repository': {'deleted', 'archived'},
+    'branch_protection_rule': set(),
+    'custom_property_values': set(),
+}
+
+# GitHub caps webhook payloads at 25 MB
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+
+DEFAULT_DEBOUNCE_SECONDS = 30.0
+DEFAULT_MAX_PENDING = 1000
+
+
+def verify_signature(secret: bytes, body: bytes, signature: Optional[str]) -> bool:
+    """
+    Whether `signature` (the X-Hub-Signature-256 header) is GitHub's HMAC-SHA256 of `body` under the webhook `secret`.
+    """
+    if not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f'sha256={expected}', signature)
+
+
+def repo_name_for_event(org: str, event: str, payload: Dict[str, Any]) -> Optional[str]:
+    """
+    The repository in `org` that `event` could have taken out of standards, or None when there is nothing to do.
+    """
+    if event not in SUPPORTED_EVENTS or payload.get('action') in SUPPORTED_EVENTS[event]:
+        return None
+    if (payload.get('organization') or {}).get('login') != org:
+        return None
+    return (payload.get('repository') or {}).get('name')
+
+
+class DebouncedQueue:
+    """
+    Repositories waiting to be remediated. A repository is only acted on once `debounce` seconds have passed without
+    another event for it, so a burst of changes (e.g. someone working through the settings page) is handled once, and
+    never by two workers at the same time. At most `max_pending` repositories can be waiting; beyond that `submit`
+    refuses new ones rather than letting the backlog grow without bound.
+    """
+
+    def __init__(self, action: Callable[[str], None], debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+                 max_pending: int = DEFAULT_MAX_PENDING, clock: Callable[[], float] = time.monotonic) -> None:
+        self.action = action
+        self.debounce = debounce
+        self.max_pending = max_pending
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._due: Dict[str, float] = {}
+        self._in_flight: set = set()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, repo_name: str) -> bool:
+        with self._condition:
+            if repo_name not in self._due and len(self._due) >= self.max_pending:
+                return False
+            self._due[repo_name] = self._clock() + self.debounce
+            self._condition.notify()
+            return True
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._due)
+
+    def _take_due(self) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Takes the repository that is due soonest and not already being worked on, if it is due. Otherwise returns how
+        long to wait for it (None when there is nothing to wait for).
+        """
+        ready = [(due, name) for name, due in self._due.items() if name not in self._in_flight]
+        if not ready:
+            return None, None
+        due, name = min(ready)
+        wait = due - self._clock()
+        if wait > 0:
+            return None, wait
+        del self._due[name]
+        self._in_flight.add(name)
+        return name, None
+
+    def _run(self, repo_name: str) -> None:
+        try:
+            self.action(repo_name)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self._condition:
+                self._in_flight.discard(repo_name)
+                self._condition.notify_all()
+
+    def run_due(self) -> int:
+        """
+        Runs everything that is due, on the calling thread, and returns how many repositories that was.
+        """
+        count = 0
+        while True:
+            with self._condition:
+                repo_name, _ = self._take_due()
+            if repo_name is None:
+                return count
+            self._run(repo_name)
+            count += 1
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    repo_name, wait = self._take_due()
+                    if repo_name is not None:
+                        break
+                    self._condition.wait(wait)
+            self._run(repo_name)
+
+    def start(self, workers: int = 1) -> None:
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f'github-standards-webhook-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stops the workers once they finish the repositories they are working on. Repositories still waiting are
+        dropped, the next scheduled run will pick them up.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    server: 'WebhookServer'
+
+    def do_GET(self) -> None:
+        # for load balancer health checks
+        self._respond(200, f'{self.server.queue.pending} repositories pending')
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_PAYLOAD_BYTES:
+            self._respond(413, 'Payload too large')
+            return
+        body = self.rfile.read(length)
+        if not verify_signature(self.server.secret, body, self.headers.get('X-Hub-Signature-256')):
+            self._respond(401, 'Bad signature')
+            return
+
+        event = self.headers.get('X-GitHub-Event', '')
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._respond(400, 'Payload is not JSON')
+            return
+        repo_name = repo_name_for_event(self.server.org, event, payload)
+        if repo_name is None:
+            self._respond(200, f'Ignored {event} event')
+        elif self.server.queue.submit(repo_name):
+            self._respond(202, f'Queued {repo_name}')
+        else:
+            self._respond(503, 'Too many repositories pending')
+
+    def _respond(self, status: int, message: str) -> None:
+        body = f'{message}\n'.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    Receives GitHub webhook deliveries for `org`, checks they were signed with `secret` and queues the repository each
+    supported event is about onto `queue`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], secret: bytes, org: str, queue: DebouncedQueue) -> None:
+        super().__init__(address, _WebhookHandler)
+        self.secret = secret
+        self.org = org
+        self.queue = queue